@@ -1,7 +1,7 @@
 import os
+import asyncio
 import bittensor as bt
 import numpy as np
-import random
 import threading
 import time
 
@@ -11,25 +11,25 @@ from typing import Union
 from webgenie.base.neuron import BaseNeuron
 from webgenie.constants import (
     MAX_COMPETETION_HISTORY_SIZE, 
-    MAX_SYNTHETIC_TASK_SIZE, 
     WORK_DIR,
-    LIGHTHOUSE_SERVER_WORK_DIR,
     TASK_REVEAL_TIME,
     TASK_REVEAL_TIMEOUT,
     SESSION_WINDOW_BLOCKS,
     BLOCK_IN_SECONDS,
+    FILL_DEFERRED_SCORES,
 )
 from webgenie.challenges import (
+    Challenge,
     AccuracyChallenge,
     QualityChallenge,
     SeoChallenge,
 )
-from webgenie.helpers.htmls import preprocess_html, is_valid_resources
+from webgenie.helpers.htmls import normalize_html
 from webgenie.helpers.images import image_debug_str
+from webgenie.helpers.response_validator import precheck_response, response_validator
 from webgenie.protocol import (
     WebgenieImageSynapse, 
     WebgenieTextSynapse,
-    verify_answer_hash,
 )
 from webgenie.storage import store_results_to_database
 from webgenie.tasks import Solution
@@ -39,6 +39,7 @@ from webgenie.tasks.metric_types import (
     SEO_METRIC_NAME,
 )
 from webgenie.tasks.image_task_generator import ImageTaskGenerator
+from webgenie.tasks.task_synthesizer import TaskSynthesizer
 from webgenie.utils.uids import get_all_available_uids
 
 
@@ -49,10 +50,18 @@ class GenieValidator:
         self.config = neuron.config
         self.miner_results = []
         self.synthetic_tasks = []
+        # Tasks that store results after the scores are updated
+        self.background_tasks = set()
 
         self.task_generators = [
             (ImageTaskGenerator(), 1.0), # currently only image task generator is supported
         ]
+        self.task_synthesizer = TaskSynthesizer(
+            self.task_generators,
+            self.synthetic_tasks,
+            self.lock,
+            is_priority=neuron.is_query_window_near,
+        )
 
     async def query_miners(self):
         try:
@@ -113,10 +122,12 @@ class GenieValidator:
                     timeout=TASK_REVEAL_TIMEOUT,
                 )
             
-            solutions = []
-            for reveal_synapse, hash_synapse, miner_uid in zip(all_synapse_reveal_results, all_synapse_hash_results, miner_uids):
+            for reveal_synapse, hash_synapse in zip(all_synapse_reveal_results, all_synapse_hash_results):
                 reveal_synapse.html_hash = hash_synapse.html_hash
-                checked_synapse = await self.checked_synapse(reveal_synapse)
+            checked_synapses, _ = await response_validator.validate(all_synapse_reveal_results)
+
+            solutions = []
+            for checked_synapse, miner_uid in zip(checked_synapses, miner_uids):
                 if checked_synapse is not None:
                     solutions.append(
                         Solution(
@@ -178,14 +189,47 @@ class GenieValidator:
 
         with self.lock:
             current_block = self.neuron.block
-            session_number = self.neuron.session_number
-            session_start_block = session_number * SESSION_WINDOW_BLOCKS
+            session_start_block = challenge.session_number * SESSION_WINDOW_BLOCKS
             session_start_datetime = (
                 datetime.now() - 
                 timedelta(
                     seconds=(current_block - session_start_block) * BLOCK_IN_SECONDS
                 )
             )
+
+        # Scores the challenge didn't need are only filled in for the stats database,
+        # so they are computed after the scores are updated, off the scoring path
+        if FILL_DEFERRED_SCORES:
+            task = asyncio.create_task(
+                self.store_results(challenge, aggregated_scores, scores, session_start_datetime, complete=True)
+            )
+            self.background_tasks.add(task)
+            task.add_done_callback(self.background_tasks.discard)
+        else:
+            await self.store_results(challenge, aggregated_scores, scores, session_start_datetime)
+
+    async def store_results(
+        self,
+        challenge: Challenge,
+        aggregated_scores: np.ndarray,
+        scores: dict[str, np.ndarray],
+        session_start_datetime: datetime,
+        complete: bool = False,
+    ):
+        if complete:
+            try:
+                scores = await challenge.complete_scores(scores)
+            except Exception as e:
+                bt.logging.error(f"Error completing deferred scores: {e}")
+        # Scores that were never computed are stored as NULL, not as a score of 0
+        scores = {
+            metric_name: [None if np.isnan(score) else float(score) for score in metric_scores]
+            for metric_name, metric_scores in scores.items()
+        }
+
+        solutions = challenge.solutions
+        miner_uids = [solution.miner_uid for solution in solutions]
+        with self.lock:
             payload = {
                 "validator": {
                     "hotkey": self.neuron.metagraph.axons[self.neuron.uid].hotkey,
@@ -224,32 +268,6 @@ class GenieValidator:
         except Exception as e:
             bt.logging.error(f"Error storing results to database: {e}")
 
-    async def synthensize_task(self):
-        try:
-            with self.lock:
-                if len(self.synthetic_tasks) > MAX_SYNTHETIC_TASK_SIZE:
-                    bt.logging.info(
-                        f"Synthetic task size {len(self.synthetic_tasks)} exceeds "
-                        f"max size {MAX_SYNTHETIC_TASK_SIZE}, skipping"
-                    )
-                    return
-
-            bt.logging.info(f"Synthensize task")
-            
-            task_generator, _ = random.choices(
-                self.task_generators,
-                weights=[weight for _, weight in self.task_generators],
-            )[0]
-            
-            task, synapse = await task_generator.generate_task()
-            with self.lock:
-                self.synthetic_tasks.append((task, synapse))
-
-            bt.logging.success(f"Successfully generated task for {task.src}")
-        
-        except Exception as e:
-            bt.logging.error(f"Error in synthensize_task: {e}")
-
     async def organic_forward(self, synapse: Union[WebgenieTextSynapse, WebgenieImageSynapse]):
         if isinstance(synapse, WebgenieTextSynapse):
             bt.logging.debug(f"Organic text forward: {synapse.prompt}")
@@ -302,13 +320,13 @@ class GenieValidator:
             return synapse
     
     async def checked_synapse(self, synapse: bt.Synapse) -> bt.Synapse:
-        if synapse.dendrite.status_code == 200:
-            if not verify_answer_hash(synapse):
-                bt.logging.warning(f"Invalid answer hash: {synapse.html_hash}")
-                return None
-
-            html = preprocess_html(synapse.html)
-            if not html or not is_valid_resources(html):
+        rejected_stage = precheck_response(synapse)
+        if rejected_stage == "hash":
+            bt.logging.warning(f"Invalid answer hash: {synapse.html_hash}")
+            return None
+        if rejected_stage is None:
+            html, is_valid_resources = normalize_html(synapse.html)
+            if not html or not is_valid_resources:
                 bt.logging.warning(f"Invalid html or resources: {html}")
                 return None
 
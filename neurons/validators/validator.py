@@ -15,16 +15,25 @@ load_dotenv(find_dotenv(filename=".env.validator"))
 from typing import Tuple, Union
 
 from webgenie.base.validator import BaseValidatorNeuron
+from webgenie.helpers.browser_pool import browser_pool
 from webgenie.constants import (
     API_HOTKEY,
     BLOCK_IN_SECONDS,
     SESSION_WINDOW_BLOCKS,
     QUERING_WINDOW_BLOCKS,
     WEIGHT_SETTING_WINDOW_BLOCKS,
+    SYNTHESIS_PRIORITY_BLOCKS,
     AXON_OFF,
 )
 from webgenie.protocol import WebgenieTextSynapse, WebgenieImageSynapse
-from webgenie.rewards.lighthouse_reward import start_lighthouse_server_thread, stop_lighthouse_server
+from webgenie.rewards.lighthouse_reward import (
+    start_lighthouse_server_thread, 
+    stop_lighthouse_server,
+    start_lighthouse_runners,
+    stop_lighthouse_runners,
+)
+from webgenie.rewards.scoring_executor import start_scoring_executor, stop_scoring_executor
+from webgenie.helpers.response_validator import start_response_validator, stop_response_validator
 from webgenie.utils.uids import get_validator_index
 
 from neurons.validators.genie_validator import GenieValidator
@@ -144,6 +153,38 @@ class Validator(BaseValidatorNeuron):
         except Exception as e:
             bt.logging.error(f"Failed to serve Axon with exception: {e}")
 
+    def get_query_window(self, current_block: int, validator_index: int, validator_count: int) -> Tuple[int, float, int]:
+        """
+        Returns the start and end block of our query window around the current block,
+        and the number of blocks after which the query windows repeat.
+        """
+        all_validator_query_period_blocks = validator_count * QUERING_WINDOW_BLOCKS
+        # Calculate query period blocks
+        start_period_block = (
+            (current_block // all_validator_query_period_blocks) * 
+            all_validator_query_period_blocks + 
+            validator_index * QUERING_WINDOW_BLOCKS
+        )
+        end_period_block = start_period_block + QUERING_WINDOW_BLOCKS / 2
+        return start_period_block, end_period_block, all_validator_query_period_blocks
+
+    def is_query_window_near(self) -> bool:
+        """
+        Whether our query window starts within SYNTHESIS_PRIORITY_BLOCKS blocks or is open.
+        """
+        with self.lock:
+            validator_index, validator_count = get_validator_index(self, self.uid)
+            current_block = self.block
+        if validator_index == -1:
+            return False
+
+        start_period_block, end_period_block, all_validator_query_period_blocks = self.get_query_window(
+            current_block, validator_index, validator_count
+        )
+        if current_block > end_period_block:
+            start_period_block += all_validator_query_period_blocks
+        return start_period_block - current_block <= SYNTHESIS_PRIORITY_BLOCKS
+
     def query_miners_loop(self):    
         bt.logging.info(f"Query miners loop starting")
         while True:
@@ -162,14 +203,9 @@ class Validator(BaseValidatorNeuron):
                 with self.lock:
                     current_block = self.block
 
-                all_validator_query_period_blocks = validator_count * QUERING_WINDOW_BLOCKS
-                # Calculate query period blocks
-                start_period_block = (
-                    (current_block // all_validator_query_period_blocks) * 
-                    all_validator_query_period_blocks + 
-                    validator_index * QUERING_WINDOW_BLOCKS
+                start_period_block, end_period_block, all_validator_query_period_blocks = self.get_query_window(
+                    current_block, validator_index, validator_count
                 )
-                end_period_block = start_period_block + QUERING_WINDOW_BLOCKS / 2
                 bt.logging.info(f"Query window - "
                                 f"Start: {start_period_block}, "
                                 f"End: {end_period_block}, "
@@ -201,7 +237,8 @@ class Validator(BaseValidatorNeuron):
     def score_loop(self):
         bt.logging.info(f"Scoring loop starting")
         while True:
-            time.sleep(1)
+            # Keep the loop running between scores, results are stored in background tasks
+            self.score_event_loop.run_until_complete(asyncio.sleep(1))
             try:
                 with self.lock:
                     self.sync()
@@ -221,22 +258,21 @@ class Validator(BaseValidatorNeuron):
     def synthensize_task_loop(self):
         bt.logging.info(f"Synthensize task loop starting")
         while True:
-            time.sleep(1)
             try:
-                with self.lock:
-                    self.sync()
-                
-                SYNTHETIC_TASK_TIMEOUT = 60 * 15 # 15 minutes
+                # Runs the synthesis workers until the validator stops
                 self.synthensize_task_event_loop.run_until_complete(
-                    asyncio.wait_for(
-                        self.genie_validator.synthensize_task(),
-                        timeout=SYNTHETIC_TASK_TIMEOUT
-                    )
+                    self.genie_validator.task_synthesizer.run()
                 )
             except Exception as e:
                 bt.logging.error(f"Error during synthensize task: {str(e)}")
             if self.should_exit:
                 break
+            time.sleep(1)
+        # Close the browser the random website dataset fetched pages with
+        try:
+            self.synthensize_task_event_loop.run_until_complete(browser_pool.stop())
+        except Exception as e:
+            bt.logging.error(f"Error stopping browser pool: {e}")
     
     def set_weights_loop(self):
         """
@@ -299,6 +335,9 @@ class Validator(BaseValidatorNeuron):
             self.score_thread.start()
             self.set_weights_thread.start()        
             start_lighthouse_server_thread()
+            start_lighthouse_runners()
+            start_scoring_executor()
+            start_response_validator()
             bt.logging.info("Started background threads")
             bt.logging.info("=" * 40)
     
@@ -307,12 +346,16 @@ class Validator(BaseValidatorNeuron):
             bt.logging.info("Stopping background threads")
             self.should_exit = True
             self.is_running = False
+            self.genie_validator.task_synthesizer.stop()
             
             self.synthensize_task_thread.join(5)
             self.query_miners_thread.join(5)
             self.score_thread.join(5)
             self.set_weights_thread.join(5)
             stop_lighthouse_server()
+            stop_lighthouse_runners()
+            stop_scoring_executor()
+            stop_response_validator()
 
             self.synthensize_task_thread = None
             self.query_miners_thread = None
@@ -0,0 +1,123 @@
+# Measures the import time of the miner and the validator with `python -X importtime`.
+#
+# Run it from the root of the repository:
+#   python scripts/benchmark_import_time.py
+#   python scripts/benchmark_import_time.py --runs 5 --top 15 --output import_time.json
+#   python scripts/benchmark_import_time.py --max-ms miner=3000 --max-ms validator=8000
+#
+# The script exits with 1 when a neuron takes longer than its --max-ms, or when it imports one of
+# the heavy dependencies that should only be imported on first use.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+NEURONS = {
+    "miner": "neurons.miners.miner",
+    "validator": "neurons.validators.validator",
+}
+
+# Dependencies that must not be imported when a neuron starts
+LAZY_DEPENDENCIES = {
+    "miner": ["torch", "clip", "bert_score", "sentence_transformers", "playwright", "skimage", "colormath", "fastapi", "wandb"],
+    "validator": ["torch", "clip", "bert_score", "sentence_transformers", "skimage", "colormath", "wandb"],
+}
+
+
+def measure_import_time(module: str) -> dict:
+    """
+    Imports the module in a fresh interpreter and returns the cumulative import time of every module in microseconds.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}:\n{result.stderr[-2000:]}")
+
+    cumulative_us = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        cumulative_us[name.strip()] = int(cumulative)
+    return cumulative_us
+
+
+def benchmark(neuron: str, runs: int, top: int) -> dict:
+    module = NEURONS[neuron]
+    measurements = [measure_import_time(module) for _ in range(runs)]
+    total_ms = [measurement[module] / 1000 for measurement in measurements]
+
+    last = measurements[-1]
+    top_level_ms = {}
+    for name, cumulative in last.items():
+        # Only the top level packages, their cumulative time includes their submodules
+        if "." not in name:
+            top_level_ms[name] = cumulative / 1000
+    slowest = sorted(top_level_ms.items(), key=lambda item: item[1], reverse=True)[:top]
+
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": statistics.median(total_ms),
+        "min_ms": min(total_ms),
+        "max_ms": max(total_ms),
+        "slowest_packages_ms": dict(slowest),
+        "eager_dependencies": [dependency for dependency in LAZY_DEPENDENCIES[neuron] if dependency in last],
+    }
+
+
+def parse_limits(values: list) -> dict:
+    limits = {}
+    for value in values:
+        neuron, max_ms = value.split("=")
+        if neuron not in NEURONS:
+            raise ValueError(f"Unknown neuron {neuron}, expected one of {list(NEURONS)}")
+        limits[neuron] = float(max_ms)
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time benchmark of the miner and the validator")
+    parser.add_argument("--neurons", nargs="+", choices=list(NEURONS), default=list(NEURONS))
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per neuron, the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest top level packages to report")
+    parser.add_argument("--max-ms", action="append", default=[], help="Import time limit, e.g. miner=3000")
+    parser.add_argument("--output", type=str, default=None, help="Write the results to this json file")
+    args = parser.parse_args()
+
+    limits = parse_limits(args.max_ms)
+    results = {}
+    failed = False
+    for neuron in args.neurons:
+        result = benchmark(neuron, args.runs, args.top)
+        results[neuron] = result
+
+        print(f"{neuron} ({result['module']}): median {result['median_ms']:.0f} ms, "
+              f"min {result['min_ms']:.0f} ms, max {result['max_ms']:.0f} ms over {result['runs']} runs")
+        for name, milliseconds in result["slowest_packages_ms"].items():
+            print(f"    {milliseconds:10.1f} ms  {name}")
+        if result["eager_dependencies"]:
+            print(f"    imported at startup: {', '.join(result['eager_dependencies'])}")
+            failed = True
+        if neuron in limits and result["median_ms"] > limits[neuron]:
+            print(f"    slower than the limit of {limits[neuron]:.0f} ms")
+            failed = True
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# Regenerates the word list artifact of the RandomWebsiteDataset from the wordfreq frequency lists.
+#
+# Run it from the root of the repository and commit the generated file:
+#   pip install wordfreq better_profanity
+#   python scripts/build_english_words.py
+#
+# Bump ENGLISH_WORDS_VERSION in webgenie/datasets/word_list.py when the list changes.
+
+import argparse
+
+from webgenie.datasets.word_list import (
+    ENGLISH_WORDS_PATH,
+    ENGLISH_WORDS_SIZE,
+    build_english_words,
+    write_english_words,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the english word list of the RandomWebsiteDataset")
+    parser.add_argument("--size", type=int, default=ENGLISH_WORDS_SIZE, help="Number of most common words to keep")
+    parser.add_argument("--output", type=str, default=ENGLISH_WORDS_PATH)
+    args = parser.parse_args()
+
+    words = build_english_words(args.size)
+    write_english_words(words, args.output)
+    print(f"Wrote {len(words)} words to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
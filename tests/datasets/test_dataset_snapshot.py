@@ -0,0 +1,140 @@
+import sys
+import os
+import tempfile
+import time
+import types
+
+import pyarrow as pa
+import pytest
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(parent_dir)
+
+from webgenie.datasets.dataset_snapshot import DatasetSnapshot
+
+
+class FakeHubDataset:
+    def __init__(self, revision: str):
+        self.revision = revision
+
+    def select_columns(self, columns):
+        return self
+
+    def with_format(self, format):
+        return self
+
+    def __getitem__(self, index):
+        return pa.table({"text": [f"{self.revision}-{i}" for i in range(3)]})
+
+
+class FakeHub:
+    """
+    The hub of the snapshots: its current revision, whether it can be reached and the downloaded revisions.
+    """
+    def __init__(self, revision: str):
+        self.revision = revision
+        self.is_reachable = True
+        self.downloads = []
+
+    def load_dataset(self, dataset_name, split, revision=None):
+        self.downloads.append(revision)
+        return FakeHubDataset(revision)
+
+
+class StubSnapshot(DatasetSnapshot):
+    def __init__(self, hub: FakeHub, root: str, refresh_interval: float = 3600):
+        super().__init__("test/dataset", "train", ["text"], root=root, refresh_interval=refresh_interval)
+        self.hub = hub
+
+    def get_hub_revision(self) -> str:
+        if not self.hub.is_reachable:
+            raise ConnectionError("hub is not reachable")
+        return self.hub.revision
+
+    def download(self, revision: str):
+        datasets = types.ModuleType("datasets")
+        datasets.load_dataset = self.hub.load_dataset
+        previous_datasets = sys.modules.get("datasets")
+        sys.modules["datasets"] = datasets
+        try:
+            return super().download(revision)
+        finally:
+            if previous_datasets is None:
+                del sys.modules["datasets"]
+            else:
+                sys.modules["datasets"] = previous_datasets
+
+
+def wait_for_refresh(snapshot: DatasetSnapshot):
+    for _ in range(100):
+        if not snapshot.refreshing:
+            return
+        time.sleep(0.05)
+    raise TimeoutError("The snapshot refresh didn't finish")
+
+
+def test_manifest_fallback():
+    with tempfile.TemporaryDirectory() as root:
+        hub = FakeHub("r1")
+        hub.is_reachable = False
+        # Without a cached snapshot the hub has to be reached
+        with pytest.raises(ConnectionError):
+            StubSnapshot(hub, root).open()
+
+        hub.is_reachable = True
+        assert StubSnapshot(hub, root).sample()["text"].startswith("r1-")
+
+        # The cached snapshot is used when the hub can't be reached
+        hub.is_reachable = False
+        snapshot = StubSnapshot(hub, root, refresh_interval=0)
+        assert len(snapshot) == 3
+        assert snapshot.sample()["text"].startswith("r1-")
+        assert hub.downloads == ["r1"]
+
+
+def test_revision_check():
+    with tempfile.TemporaryDirectory() as root:
+        hub = FakeHub("r1")
+        StubSnapshot(hub, root).open()
+        checked_at = StubSnapshot(hub, root).load_manifest().checked_at
+
+        # A check older than the refresh interval asks the hub again
+        snapshot = StubSnapshot(hub, root, refresh_interval=0)
+        snapshot.open()
+        manifest = snapshot.load_manifest()
+        assert manifest.revision == "r1" and manifest.checked_at > checked_at
+        # The revision didn't change, so nothing was downloaded again
+        assert hub.downloads == ["r1"]
+
+
+def test_background_swap():
+    with tempfile.TemporaryDirectory() as root:
+        hub = FakeHub("r1")
+        snapshot = StubSnapshot(hub, root, refresh_interval=3600)
+        old_table = snapshot.open()
+        assert snapshot.sample()["text"].startswith("r1-")
+
+        # Sampling before the refresh interval doesn't ask the hub
+        hub.revision = "r2"
+        snapshot.sample()
+        assert not snapshot.refreshing and hub.downloads == ["r1"]
+
+        # Once the interval has passed sample swaps the new revision in, in the background
+        snapshot.next_refresh_at = 0
+        snapshot.manifest.checked_at = 0
+        snapshot.save_manifest(snapshot.manifest)
+        assert snapshot.sample()["text"].startswith("r1-")
+        wait_for_refresh(snapshot)
+        assert hub.downloads == ["r1", "r2"]
+        assert snapshot.manifest.revision == "r2"
+        assert snapshot.sample()["text"].startswith("r2-")
+
+        # The old snapshot file is removed after the swap, the old table stays readable
+        assert sorted(os.listdir(snapshot.directory)) == ["manifest.json", "r2.arrow"]
+        assert old_table.column("text")[0].as_py() == "r1-0"
+
+
+if __name__ == "__main__":
+    test_manifest_fallback()
+    test_revision_check()
+    test_background_swap()
@@ -0,0 +1,113 @@
+import pytest
+import shutil
+import sys
+import os
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(parent_dir)
+
+from webgenie.rewards.lighthouse_reward.audit_plan import AuditPlan
+from webgenie.rewards.lighthouse_reward.native_audits import get_native_audit_score, run_native_audits
+
+
+PLAN = AuditPlan(categories=['accessibility', 'best-practices', 'seo'], throttling_method="provided")
+DATA_DIR = os.path.join(parent_dir, "tests", "data")
+# Largest mean and largest single difference to lighthouse we accept per category
+CALIBRATION_TOLERANCE = 0.1
+CALIBRATION_MAX_TOLERANCE = 0.25
+
+GOOD_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>Coffee Shop</title>
+    <meta name="description" content="Fresh coffee roasted every day.">
+</head>
+<body>
+    <main>
+        <h1>Coffee Shop</h1>
+        <h2>Our beans</h2>
+        <img src="beans.png" alt="Coffee beans">
+        <a href="/menu">See our menu</a>
+        <label for="email">Email</label><input id="email" type="email">
+        <button>Subscribe</button>
+    </main>
+</body>
+</html>"""
+
+BAD_HTML = """<html>
+<head>
+    <meta name="robots" content="noindex">
+    <meta name="viewport" content="width=device-width, user-scalable=no">
+</head>
+<body>
+    <h1>Coffee Shop</h1>
+    <h4>Our beans</h4>
+    <img src="http://example.com/beans.png">
+    <a href="javascript:void(0)">Menu</a>
+    <a href="/menu">click here</a>
+    <input type="text">
+    <button></button>
+    <ul><div>Espresso</div></ul>
+</body>
+</html>"""
+
+
+def load_corpus():
+    htmls = [GOOD_HTML, BAD_HTML]
+    for file_name in sorted(os.listdir(DATA_DIR)):
+        if file_name.endswith(".html"):
+            with open(os.path.join(DATA_DIR, file_name), "r") as f:
+                htmls.append(f.read())
+    return htmls
+
+
+def test_native_audits():
+    good_scores = get_native_audit_score(GOOD_HTML, PLAN)
+    bad_scores = get_native_audit_score(BAD_HTML, PLAN)
+    assert good_scores == {'accessibility': 1, 'best-practices': 1, 'seo': 1}
+    for category in PLAN.categories:
+        assert bad_scores[category] < good_scores[category]
+
+    results = run_native_audits(BAD_HTML, PLAN.categories)
+    for category, audit in [
+        ('seo', 'is-crawlable'), ('seo', 'document-title'), ('seo', 'meta-description'),
+        ('seo', 'link-text'), ('seo', 'crawlable-anchors'), ('seo', 'image-alt'),
+        ('accessibility', 'html-has-lang'), ('accessibility', 'meta-viewport'), ('accessibility', 'button-name'),
+        ('accessibility', 'label'), ('accessibility', 'heading-order'), ('accessibility', 'list'),
+        ('best-practices', 'doctype'), ('best-practices', 'is-on-https'),
+    ]:
+        assert results[category][audit] == 0, f"{category}/{audit} should fail"
+
+
+@pytest.mark.skipif(shutil.which("lighthouse") is None, reason="lighthouse is not installed")
+def test_native_audits_calibration():
+    """
+    Compares the native audits to lighthouse on the fixture corpus, needs the lighthouse cli.
+    """
+    from webgenie.rewards.lighthouse_reward.get_lighthouse_score import get_lighthouse_score
+    from webgenie.rewards.lighthouse_reward.lighthouse_server_fastapi import start_lighthouse_server_thread
+
+    start_lighthouse_server_thread()
+    time.sleep(3)
+    htmls = load_corpus()
+    lighthouse_scores = get_lighthouse_score(htmls, PLAN)
+    if any(lighthouse is None or set(PLAN.categories) - set(lighthouse) for lighthouse in lighthouse_scores):
+        pytest.skip("lighthouse failed to audit the corpus")
+
+    native_scores = [get_native_audit_score(html, PLAN) for html in htmls]
+    for category in PLAN.categories:
+        differences = [
+            abs(native[category] - lighthouse[category])
+            for native, lighthouse in zip(native_scores, lighthouse_scores)
+        ]
+        mean_difference = sum(differences) / len(differences)
+        assert mean_difference <= CALIBRATION_TOLERANCE, f"{category}: mean difference {mean_difference:.3f}"
+        assert max(differences) <= CALIBRATION_MAX_TOLERANCE, f"{category}: max difference {max(differences):.3f}"
+
+
+if __name__ == "__main__":
+    test_native_audits()
+    test_native_audits_calibration()
@@ -0,0 +1,100 @@
+import sys
+import os
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(parent_dir)
+
+from webgenie.rewards.scoring_executor import ScoringExecutor
+
+
+class LocalScoringExecutor(ScoringExecutor):
+    # The workers don't preload the browser and the CLIP model
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def is_alive(pid: int) -> bool:
+    # A killed worker stays a zombie until the pool reaps it
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_queued_jobs_dont_time_out():
+    executor = LocalScoringExecutor(max_workers=2)
+
+    async def run():
+        # Start the workers, so that their startup isn't timed
+        await asyncio.gather(*[executor.run(time.sleep, 0.1, timeout=30) for _ in range(2)])
+        # 8 jobs of 1 second on 2 workers take 4 seconds, but every job only runs for 1 second
+        started_at = time.monotonic()
+        await asyncio.gather(*[executor.run(time.sleep, 1, timeout=3) for _ in range(8)])
+        assert time.monotonic() - started_at >= 4
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.stop()
+
+
+def test_timeout_recycles_pool():
+    executor = LocalScoringExecutor(max_workers=1)
+
+    async def run():
+        hung_pid = await executor.run(os.getpid, timeout=30)
+        try:
+            await executor.run(time.sleep, 60, timeout=1)
+            assert False, "The job should have timed out"
+        except asyncio.TimeoutError:
+            pass
+
+        # The next job runs on a new worker and the hung worker is killed
+        pid = await executor.run(os.getpid, timeout=30)
+        assert pid != hung_pid
+        for _ in range(50):
+            if not is_alive(hung_pid):
+                break
+            await asyncio.sleep(0.1)
+        assert not is_alive(hung_pid)
+        assert len(executor.running_jobs) == 1
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.stop()
+
+
+def test_memory_recycle_under_load():
+    # Every worker uses more memory than allowed, so every finished job recycles the pool
+    executor = LocalScoringExecutor(max_workers=2, max_worker_memory_mb=0)
+
+    async def run():
+        slow_job = asyncio.create_task(executor.run(time.sleep, 2, timeout=30))
+        await executor.run(os.getpid, timeout=30)
+        old_pool = next(iter(executor.running_jobs))
+
+        # New jobs go to a new pool while the slow job is still running on the old one
+        assert executor.pool is None
+        await executor.run(os.getpid, timeout=30)
+        assert old_pool in executor.running_jobs and not slow_job.done()
+
+        # The old pool is shut down once the slow job is finished
+        await slow_job
+        assert old_pool not in executor.running_jobs
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.stop()
+
+
+if __name__ == "__main__":
+    test_queued_jobs_dont_time_out()
+    test_timeout_recycles_pool()
+    test_memory_recycle_under_load()
@@ -0,0 +1,57 @@
+import sys
+import os
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from webgenie.helpers import htmls
+from webgenie.helpers.htmls import (
+    format_html,
+    is_valid_resources,
+    normalize_html,
+    replace_image_sources,
+)
+
+HTML_SAMPLES = [
+    "<!DOCTYPE html><html><head><style> .a { background: url(a.png) } </style>"
+    "<link rel='stylesheet' href='https://evil.com/a.css'></head>"
+    "<body><p>a<br>b<br/>c</p><pre>\n  keep  </pre><img src='b.png'><!-- c --></body></html>",
+    "<div style='background-image: url(x.png)'>  hi &amp; bye </div><textarea> t </textarea>"
+    "<script src='https://code.jquery.com/jquery-3.1.min.js'></script>",
+    "plain text",
+    "",
+]
+
+
+def load_samples():
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    return HTML_SAMPLES + [
+        open(os.path.join(data_dir, file_name)).read()
+        for file_name in sorted(os.listdir(data_dir))
+        if file_name.endswith(".html")
+    ]
+
+
+def test_normalize_html():
+    assert htmls.FORMAT_SOUP_SUPPORTED
+    for html in load_samples():
+        # Same as the separate parses the validator used to run
+        expected_html = replace_image_sources(format_html(html))
+        normalized_html, is_valid = normalize_html(html)
+        assert normalized_html == expected_html
+        assert is_valid == is_valid_resources(expected_html)
+
+
+def test_normalize_html_fallback():
+    # Without the beautifulsoup4 internals the HTML is formatted and parsed again
+    htmls.FORMAT_SOUP_SUPPORTED = False
+    try:
+        for html in load_samples():
+            assert normalize_html(html) == (replace_image_sources(format_html(html)), is_valid_resources(html))
+    finally:
+        htmls.FORMAT_SOUP_SUPPORTED = True
+
+
+if __name__ == "__main__":
+    test_normalize_html()
+    test_normalize_html_fallback()
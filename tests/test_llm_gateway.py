@@ -0,0 +1,84 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from webgenie.helpers import llms
+from webgenie.helpers.llms import LlmGateway, TokenBucket
+
+
+def test_token_bucket():
+    # 0 means no limit
+    assert TokenBucket(0).reserve(1000) == 0
+
+    bucket = TokenBucket(60)
+    # The bucket starts full
+    assert bucket.reserve(60) == 0
+    # One unit per second, the overdrawn units are waited for
+    assert abs(bucket.reserve(30) - 30) < 0.1
+    # Units that were not used are given back
+    bucket.adjust(30)
+    assert abs(bucket.reserve(30) - 30) < 0.1
+
+
+def test_priority_order():
+    async def run():
+        gateway = LlmGateway("test", max_concurrency=1, requests_per_minute=0, tokens_per_minute=0)
+        await gateway.acquire(llms.LLM_PRIORITY_SCORING)
+        served = []
+
+        async def request(priority: int):
+            await gateway.acquire(priority)
+            served.append(priority)
+            gateway.release()
+
+        tasks = [asyncio.create_task(request(priority)) for priority in [10, 0, 5]]
+        await asyncio.sleep(0.01)
+        assert gateway.metrics()["queued"] == {10: 1, 0: 1, 5: 1}
+
+        gateway.release()
+        await asyncio.gather(*tasks)
+        # The waiters are served by priority, not in the order they queued
+        assert served == [0, 5, 10]
+        assert gateway.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_throttled_request_does_not_hold_slot():
+    async def parse(**kwargs):
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(parsed="ok"))])
+
+    gateway = LlmGateway("test", max_concurrency=1, requests_per_minute=60, tokens_per_minute=0)
+
+    async def run():
+        # Use up the request budget, the next request waits about a second
+        gateway.request_bucket.reserve(60)
+        throttled = asyncio.create_task(llms.openai_call([], None))
+        await asyncio.sleep(0.1)
+
+        # The slot is free for other requests while the throttled one waits
+        assert gateway.in_flight == 0
+        await asyncio.wait_for(gateway.acquire(llms.LLM_PRIORITY_SCORING), timeout=0.1)
+        gateway.release()
+
+        assert await throttled == "ok"
+        assert gateway.metrics()["requests"] == 1
+
+    client = SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=parse))))
+    get_client, get_llm_gateway = llms.get_client, llms.get_llm_gateway
+    try:
+        llms.get_client = lambda: client
+        llms.get_llm_gateway = lambda model: gateway
+        asyncio.run(run())
+    finally:
+        llms.get_client, llms.get_llm_gateway = get_client, get_llm_gateway
+
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_priority_order()
+    test_throttled_request_does_not_hold_slot()
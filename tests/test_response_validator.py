@@ -0,0 +1,79 @@
+import sys
+import os
+import asyncio
+import hashlib
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from webgenie.helpers.response_validator import ResponseValidator
+
+VALID_HTML = '<html><body><img src="photo.png"><p>Hello</p></body></html>'
+INVALID_RESOURCES_HTML = '<html><head><script src="https://evil.com/x.js"></script></head><body></body></html>'
+
+
+def make_synapse(html: str, status_code: int = 200, valid_hash: bool = True):
+    nonce = 7
+    html_hash = hashlib.sha256((html + str(nonce)).encode()).hexdigest() if valid_hash else "bad"
+    return SimpleNamespace(
+        html=html,
+        nonce=nonce,
+        html_hash=html_hash,
+        dendrite=SimpleNamespace(status_code=status_code),
+    )
+
+
+def make_synapses():
+    return [
+        make_synapse(VALID_HTML),
+        make_synapse(VALID_HTML, status_code=408),
+        make_synapse(VALID_HTML, valid_hash=False),
+        make_synapse(INVALID_RESOURCES_HTML),
+        make_synapse(""),
+        make_synapse(VALID_HTML.replace("Hello", "World")),
+    ]
+
+
+def check_results(synapses, checked_synapses, report):
+    assert [checked is not None for checked in checked_synapses] == [True, False, False, False, False, True]
+    # The checked synapses keep the order of the responses and get the normalized html
+    assert checked_synapses[0] is synapses[0]
+    assert "Hello" in checked_synapses[0].html and "photo.png" not in checked_synapses[0].html
+    assert "World" in checked_synapses[5].html
+    assert report.received == 6
+    assert report.valid == 2
+    assert report.rejected == {"status": 1, "hash": 1, "html": 1, "resources": 1}
+
+
+class BrokenPool(Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+def test_validate():
+    validator = ResponseValidator(max_workers=2, batch_size=1)
+    try:
+        synapses = make_synapses()
+        checked_synapses, report = asyncio.run(validator.validate(synapses))
+        check_results(synapses, checked_synapses, report)
+    finally:
+        validator.stop()
+
+
+def test_validate_broken_pool():
+    validator = ResponseValidator(max_workers=1, batch_size=2)
+    validator.pool = BrokenPool()
+    synapses = make_synapses()
+    checked_synapses, report = asyncio.run(validator.validate(synapses))
+    # The batches are validated in a thread and the broken pool is dropped
+    check_results(synapses, checked_synapses, report)
+    assert validator.pool is None or not isinstance(validator.pool, BrokenPool)
+    validator.stop()
+
+
+if __name__ == "__main__":
+    test_validate()
+    test_validate_broken_pool()
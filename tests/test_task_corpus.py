@@ -0,0 +1,105 @@
+import sys
+import os
+import base64
+import tempfile
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from webgenie.helpers.task_corpus import TaskCorpus
+
+SCREENSHOT = base64.b64encode(b"\x89PNG fake screenshot").decode()
+
+
+def make_html(i: int) -> str:
+    return f"<html><body><p>Page {i}</p></body></html>"
+
+
+def set_times(corpus: TaskCorpus, key: str, **times):
+    # Moves the usage of an entry back in time instead of waiting
+    for column, value in times.items():
+        corpus._connect().execute(f"UPDATE entries SET {column} = ? WHERE key = ?", (value, key))
+
+
+def test_add_get():
+    with tempfile.TemporaryDirectory() as root:
+        corpus = TaskCorpus(root)
+        key = corpus.add(make_html(0), SCREENSHOT, {"src": "test"})
+        entry = corpus.get(key)
+        assert entry.ground_truth_html == make_html(0)
+        assert entry.base64_image == SCREENSHOT
+        assert entry.metadata["src"] == "test"
+
+        # The same ground truth with other line endings keeps its entry
+        assert corpus.add(make_html(0) + "\r\n") == key
+        assert corpus.size() == 1
+        assert corpus.get("missing") is None
+
+
+def test_sample():
+    with tempfile.TemporaryDirectory() as root:
+        corpus = TaskCorpus(root, max_age=3600, max_uses=3, min_reuse_interval=60)
+        key = corpus.add(make_html(0))
+        # An added ground truth was just used
+        assert corpus.sample() is None
+
+        set_times(corpus, key, used_at=time.time() - 120)
+        assert corpus.sample().key == key
+        # Used again, so it waits for the reuse interval
+        assert corpus.sample() is None
+
+        # It was used 3 times: when it was added and sampled twice
+        set_times(corpus, key, used_at=time.time() - 120)
+        assert corpus.sample().key == key
+        set_times(corpus, key, used_at=time.time() - 120)
+        assert corpus.sample() is None
+
+        other_key = corpus.add(make_html(1))
+        set_times(corpus, other_key, used_at=time.time() - 120, created_at=time.time() - 7200)
+        # Too old to be sampled
+        assert corpus.sample() is None
+
+
+def test_evict():
+    with tempfile.TemporaryDirectory() as root:
+        corpus = TaskCorpus(root, max_entries=2, max_age=3600)
+        keys = [corpus.add(make_html(i)) for i in range(2)]
+        set_times(corpus, keys[0], created_at=time.time() - 20)
+        set_times(corpus, keys[1], created_at=time.time() - 10)
+        keys.append(corpus.add(make_html(2)))
+        # The oldest entry is evicted once there are more than max_entries
+        assert corpus.size() == 2
+        assert corpus.get(keys[0]) is None
+        assert not os.path.exists(corpus.path(keys[0]))
+
+        set_times(corpus, keys[1], created_at=time.time() - 7200)
+        corpus.add(make_html(3))
+        # Entries older than max_age are evicted
+        assert corpus.get(keys[1]) is None
+        assert corpus.get(keys[2]) is not None
+        assert corpus.size() == 2
+
+
+def test_features():
+    with tempfile.TemporaryDirectory() as root:
+        corpus = TaskCorpus(root)
+        key = corpus.add(make_html(0), SCREENSHOT)
+        assert corpus.get_features(key, ["clip.npy"]) is None
+
+        corpus.put_features(key, {"clip.npy": b"clip", "layout.json": b"{}"})
+        assert corpus.get_features(key, ["clip.npy", "layout.json"]) == {"clip.npy": b"clip", "layout.json": b"{}"}
+        assert corpus.get_features(key, ["clip.npy", "missing.npy"]) is None
+        # The entry itself is kept
+        assert corpus.get(key).base64_image == SCREENSHOT
+
+        # Ground truths that are not in the corpus are ignored
+        corpus.put_features("missing", {"clip.npy": b"clip"})
+        assert corpus.get_features("missing", ["clip.npy"]) is None
+
+
+if __name__ == "__main__":
+    test_add_get()
+    test_sample()
+    test_evict()
+    test_features()
@@ -1,5 +1,6 @@
+import asyncio
 import numpy as np
-from typing import List, Optional
+from typing import ClassVar, List, Optional
 from pydantic import BaseModel, Field
 
 from webgenie.challenges.challenge_types import (
@@ -7,6 +8,7 @@ from webgenie.challenges.challenge_types import (
     QUALITY_COMPETITION_TYPE,
     SEO_COMPETITION_TYPE,
 )
+from webgenie.constants import ACCURACY_GATE_THRESHOLD
 from webgenie.tasks.metric_types import (
     ACCURACY_METRIC_NAME, 
     QUALITY_METRIC_NAME,
@@ -22,15 +24,68 @@ class Challenge(BaseModel):
     competition_type: str = Field(default="", description="The type of competition")
     session_number: int = Field(default=0, description="The session number")
 
+    # The metrics the aggregated score depends on
+    required_metrics: ClassVar[List[str]] = []
+    # The required metrics that only count for solutions with accuracy above ACCURACY_GATE_THRESHOLD
+    gated_metrics: ClassVar[List[str]] = []
+
     async def calculate_scores(self) -> dict[str, np.ndarray]:
         pass
 
+    async def compute_required_scores(self) -> dict[str, np.ndarray]:
+        """
+        Compute only the scores the challenge needs.
+        Accuracy is computed first and gated metrics are only computed for the solutions that pass the gate.
+        Scores that are not computed are left as nan, see `complete_scores`.
+        """
+        generator = self.task.generator
+        scores = {
+            metric_name: np.full(len(self.solutions), np.nan) 
+            for metric_name in generator.metrics
+        }
+
+        ungated_metrics = [
+            metric_name for metric_name in self.required_metrics 
+            if metric_name not in self.gated_metrics
+        ]
+        scores.update(await generator.calculate_scores(self.task, self.solutions, ungated_metrics))
+        if not self.gated_metrics:
+            return scores
+
+        passed = scores[ACCURACY_METRIC_NAME] > ACCURACY_GATE_THRESHOLD
+        passed_solutions = [solution for solution, is_passed in zip(self.solutions, passed) if is_passed]
+        if passed_solutions:
+            gated_scores = await generator.calculate_scores(self.task, passed_solutions, self.gated_metrics)
+            for metric_name in self.gated_metrics:
+                scores[metric_name][passed] = gated_scores[metric_name]
+        return scores
+
+    async def complete_scores(self, scores: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        """
+        Fill in the scores that were skipped by `compute_required_scores`.
+        They don't affect the aggregated score and are only used for the stats database.
+        """
+        generator = self.task.generator
+
+        async def complete_metric(metric_name: str):
+            missing = np.isnan(scores[metric_name])
+            missing_solutions = [solution for solution, is_missing in zip(self.solutions, missing) if is_missing]
+            if not missing_solutions:
+                return
+            missing_scores = await generator.calculate_scores(self.task, missing_solutions, [metric_name])
+            scores[metric_name][missing] = missing_scores[metric_name]
+
+        await asyncio.gather(*[complete_metric(metric_name) for metric_name in scores])
+        return scores
+
 
 class AccuracyChallenge(Challenge):
     competition_type: str = Field(default=ACCURACY_COMPETITION_TYPE, description="The type of competition")
 
+    required_metrics: ClassVar[List[str]] = [ACCURACY_METRIC_NAME, QUALITY_METRIC_NAME]
+
     async def calculate_scores(self) -> dict[str, np.ndarray]:
-        scores = await self.task.generator.calculate_scores(self.task, self.solutions)
+        scores = await self.compute_required_scores()
         aggregated_scores = scores[ACCURACY_METRIC_NAME] * 0.9 + scores[QUALITY_METRIC_NAME] * 0.1
         return aggregated_scores, scores
 
@@ -38,20 +93,26 @@ class AccuracyChallenge(Challenge):
 class SeoChallenge(Challenge):
     competition_type: str = Field(default=SEO_COMPETITION_TYPE, description="The type of competition")
 
+    required_metrics: ClassVar[List[str]] = [ACCURACY_METRIC_NAME, SEO_METRIC_NAME]
+    gated_metrics: ClassVar[List[str]] = [SEO_METRIC_NAME]
+
     async def calculate_scores(self) -> dict[str, np.ndarray]:
-        scores = await self.task.generator.calculate_scores(self.task, self.solutions)
+        scores = await self.compute_required_scores()
         accuracy_scores = scores[ACCURACY_METRIC_NAME]
         seo_scores = scores[SEO_METRIC_NAME]
-        aggregated_scores = np.where(accuracy_scores > 0.7, seo_scores, 0)
+        aggregated_scores = np.where(accuracy_scores > ACCURACY_GATE_THRESHOLD, seo_scores, 0)
         return aggregated_scores, scores
 
 
 class QualityChallenge(Challenge):
     competition_type: str = Field(default=QUALITY_COMPETITION_TYPE, description="The type of competition")
 
+    required_metrics: ClassVar[List[str]] = [ACCURACY_METRIC_NAME, QUALITY_METRIC_NAME]
+    gated_metrics: ClassVar[List[str]] = [QUALITY_METRIC_NAME]
+
     async def calculate_scores(self) -> dict[str, np.ndarray]:
-        scores = await self.task.generator.calculate_scores(self.task, self.solutions)
+        scores = await self.compute_required_scores()
         accuracy_scores = scores[ACCURACY_METRIC_NAME]
         quality_scores = scores[QUALITY_METRIC_NAME]
-        aggregated_scores = np.where(accuracy_scores > 0.7, quality_scores, 0)
+        aggregated_scores = np.where(accuracy_scores > ACCURACY_GATE_THRESHOLD, quality_scores, 0)
         return aggregated_scores, scores
@@ -19,12 +19,45 @@ TASK_REVEAL_TIMEOUT = 20
 # lighthouse server port
 LIGHTHOUSE_SERVER_PORT = int(os.getenv("LIGHTHOUSE_SERVER_PORT",5000))
 
+# accuracy a solution needs before its seo or quality score counts
+ACCURACY_GATE_THRESHOLD = 0.7
+
+# compute the scores a challenge doesn't use after scoring, for the stats database.
+# Off by default: it runs on the scoring path and spends the work the accuracy gate saved
+FILL_DEFERRED_SCORES = os.getenv("FILL_DEFERRED_SCORES", "False").lower() == "true"
+
+# number of lighthouse audits that run in parallel
+LIGHTHOUSE_RUNNER_CONCURRENCY = int(os.getenv("LIGHTHOUSE_RUNNER_CONCURRENCY", 4))
+
+# lighthouse audit timeout per url (seconds)
+LIGHTHOUSE_AUDIT_TIMEOUT = 180
+
+# how seo challenges audit htmls: "native" audits the html in python, "lighthouse" runs lighthouse,
+# "cross_check" scores with the native audits and logs how far lighthouse disagrees.
+# Stays on lighthouse until the native audits are calibrated against it
+LIGHTHOUSE_AUDIT_MODE = os.getenv("LIGHTHOUSE_AUDIT_MODE", "lighthouse").lower()
+
 # max competition history size
 MAX_COMPETETION_HISTORY_SIZE = 10
 
 # max synthetic task size
 MAX_SYNTHETIC_TASK_SIZE = 10
 
+# concurrent task synthesis workers, and how many of them run when our query window is not near
+SYNTHESIS_WORKER_COUNT = int(os.getenv("SYNTHESIS_WORKER_COUNT", 4))
+SYNTHESIS_BACKGROUND_WORKER_COUNT = int(os.getenv("SYNTHESIS_BACKGROUND_WORKER_COUNT", 1))
+
+# concurrency of the task synthesis stages: dataset fetch, html preprocessing and screenshot rendering
+SYNTHESIS_FETCH_CONCURRENCY = int(os.getenv("SYNTHESIS_FETCH_CONCURRENCY", 4))
+SYNTHESIS_PREPROCESS_CONCURRENCY = int(os.getenv("SYNTHESIS_PREPROCESS_CONCURRENCY", 2))
+SYNTHESIS_RENDER_CONCURRENCY = int(os.getenv("SYNTHESIS_RENDER_CONCURRENCY", 2))
+
+# all synthesis workers run from this many blocks before our query window until it ends
+SYNTHESIS_PRIORITY_BLOCKS = int(os.getenv("SYNTHESIS_PRIORITY_BLOCKS", 30))
+
+# timeout of one synthetic task (seconds)
+SYNTHETIC_TASK_TIMEOUT = 60 * 15
+
 # max debug image string length
 MAX_DEBUG_IMAGE_STRING_LENGTH = 20
 
@@ -43,6 +76,20 @@ CHROME_HTML_LOAD_TIME = 60000
 # javascript running time
 JAVASCRIPT_RUNNING_TIME = 1000
 
+# pages the shared browser of the task synthesis can have open at a time
+BROWSER_POOL_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", 4))
+
+# candidate urls the random website dataset fetches concurrently, the first valid page is used
+RANDOM_WEBSITE_CANDIDATES = int(os.getenv("RANDOM_WEBSITE_CANDIDATES", 3))
+
+# stage timeouts of the random website dataset: search (seconds), page load and network idle (milliseconds)
+RANDOM_WEBSITE_SEARCH_TIMEOUT = 20
+RANDOM_WEBSITE_LOAD_TIMEOUT = 30000
+RANDOM_WEBSITE_IDLE_TIMEOUT = 10000
+
+# pages larger than this (bytes) are rejected
+RANDOM_WEBSITE_MAX_HTML_BYTES = 2000000
+
 
 # miner html load time
 MINER_HTML_LOAD_TIME = 2000
@@ -50,11 +97,70 @@ MINER_HTML_LOAD_TIME = 2000
 # max miner html length
 MAX_MINER_HTML_LEN = 1000000
 
+# processes that validate the revealed miner htmls, and how many htmls a process validates per job
+VALIDATION_WORKER_COUNT = int(os.getenv("VALIDATION_WORKER_COUNT", max(1, os.cpu_count() // 2)))
+VALIDATION_BATCH_SIZE = int(os.getenv("VALIDATION_BATCH_SIZE", 8))
+
 # work dir
 WORK_DIR = "work"
 
-# lighthouse server work dir
-LIGHTHOUSE_SERVER_WORK_DIR = f"{WORK_DIR}/lighthouse_server_work"
+# scoring worker count
+SCORING_WORKER_COUNT = int(os.getenv("SCORING_WORKER_COUNT", os.cpu_count()))
+
+# max tasks a scoring worker runs before it is recycled
+SCORING_WORKER_MAX_TASKS = int(os.getenv("SCORING_WORKER_MAX_TASKS", 200))
+
+# max memory (MB) a scoring worker can use before it is recycled
+SCORING_WORKER_MAX_MEMORY_MB = int(os.getenv("SCORING_WORKER_MAX_MEMORY_MB", 4096))
+
+# visual reward timeout per solution (seconds)
+VISUAL_REWARD_JOB_TIMEOUT = 60 * 10
+
+# lighthouse reward timeout per solution (seconds)
+LIGHTHOUSE_REWARD_JOB_TIMEOUT = 60 * 5
+
+# cpu slots for scoring jobs
+SCORING_CPU_SLOTS = int(os.getenv("SCORING_CPU_SLOTS", SCORING_WORKER_COUNT))
+
+# browser slots for scoring jobs
+SCORING_BROWSER_SLOTS = int(os.getenv("SCORING_BROWSER_SLOTS", max(1, SCORING_WORKER_COUNT // 2)))
+
+# how long the lighthouse server keeps a registered html (seconds)
+LIGHTHOUSE_SERVER_HTML_TTL = 60 * 30
+
+# lighthouse score cache, shared by all the processes on the host
+LIGHTHOUSE_SCORE_CACHE_PATH = f"{WORK_DIR}/cache/lighthouse_scores.db"
+LIGHTHOUSE_SCORE_CACHE_SIZE = int(os.getenv("LIGHTHOUSE_SCORE_CACHE_SIZE", 100000))
+
+# quality score cache, shared by all the processes on the host
+QUALITY_SCORE_CACHE_PATH = f"{WORK_DIR}/cache/quality_scores.db"
+QUALITY_SCORE_CACHE_SIZE = int(os.getenv("QUALITY_SCORE_CACHE_SIZE", 100000))
+QUALITY_SCORE_CACHE_TTL = int(os.getenv("QUALITY_SCORE_CACHE_TTL", 60 * 60 * 24 * 7))
+
+# on-disk corpus of generated ground truths, their screenshots and precomputed scoring features
+TASK_CORPUS_DIR = f"{WORK_DIR}/task_corpus"
+TASK_CORPUS_MAX_ENTRIES = int(os.getenv("TASK_CORPUS_MAX_ENTRIES", 5000))
+
+# freshness policy of the corpus: entries older than max age (seconds) or used max uses times are not sampled,
+# and an entry is not sampled again within the min reuse interval (seconds)
+TASK_CORPUS_MAX_AGE = int(os.getenv("TASK_CORPUS_MAX_AGE", 60 * 60 * 24 * 14))
+TASK_CORPUS_MAX_USES = int(os.getenv("TASK_CORPUS_MAX_USES", 3))
+TASK_CORPUS_MIN_REUSE_INTERVAL = int(os.getenv("TASK_CORPUS_MIN_REUSE_INTERVAL", 60 * 60 * 24))
+
+# share of image tasks sampled from the corpus instead of generated, failed generations always fall back to the corpus
+TASK_CORPUS_REUSE_RATE = float(os.getenv("TASK_CORPUS_REUSE_RATE", 0.1))
+
+# only replay tasks from the corpus, without searching the web or calling the llm
+TASK_CORPUS_OFFLINE = os.getenv("TASK_CORPUS_OFFLINE", "False").lower() == "true"
+
+# local arrow snapshots of the huggingface datasets
+HF_DATASET_SNAPSHOT_DIR = f"{WORK_DIR}/datasets"
+
+# how often the hub is asked for a new revision of a snapshotted dataset (seconds)
+HF_DATASET_REFRESH_INTERVAL = int(os.getenv("HF_DATASET_REFRESH_INTERVAL", 60 * 60 * 24 * 7))
+
+# timeout of a request to the huggingface hub (seconds)
+HF_HUB_TIMEOUT = 10
 
 # html extension
 HTML_EXTENSION = ".html"
@@ -92,6 +198,43 @@ LLM_API_KEY = os.getenv("LLM_API_KEY")
 # llm model url
 LLM_MODEL_URL = os.getenv("LLM_MODEL_URL")
 
+# token budgets of the htmls we send to the llm
+QUALITY_HTML_TOKEN_BUDGET = int(os.getenv("QUALITY_HTML_TOKEN_BUDGET", 8000))
+RTC_HTML_TOKEN_BUDGET = int(os.getenv("RTC_HTML_TOKEN_BUDGET", 4000))
+DATASET_HTML_TOKEN_BUDGET = int(os.getenv("DATASET_HTML_TOKEN_BUDGET", 16000))
+
+# concurrent prompt recovery requests of the rtc reward
+RTC_PROMPT_CONCURRENCY = int(os.getenv("RTC_PROMPT_CONCURRENCY", 8))
+
+# score several solutions in one llm request in the quality reward, batch scores depend on the other
+# solutions of the batch, so they are not cached
+QUALITY_BATCH_SCORING = os.getenv("QUALITY_BATCH_SCORING", "False").lower() == "true"
+QUALITY_BATCH_MAX_SIZE = int(os.getenv("QUALITY_BATCH_MAX_SIZE", 8))
+# prompt tokens of a batch request, keep it well below the context window of the model
+QUALITY_BATCH_MAX_TOKENS = int(os.getenv("QUALITY_BATCH_MAX_TOKENS", 64000))
+# share of batch scored solutions that are also scored one by one to check the batch scores
+QUALITY_BATCH_CALIBRATION_RATE = float(os.getenv("QUALITY_BATCH_CALIBRATION_RATE", 0.05))
+
+# concurrent llm requests per model
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+
+# llm rate limits per model, 0 means no limit
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 0))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 0))
+
+# llm retry backoff (seconds)
+LLM_BACKOFF_BASE = 1
+LLM_BACKOFF_MAX = 30
+
+# load the text embedding and bert score models, processes that never score text can turn them off
+TEXT_MODELS_ENABLED = os.getenv("TEXT_MODELS_ENABLED", "True").lower() == "true"
+
+# quantize the text models to int8 when they run on cpu
+TEXT_MODEL_QUANTIZE = os.getenv("TEXT_MODEL_QUANTIZE", "False").lower() == "true"
+
+# batch size of the text model inference
+TEXT_EMBEDDING_BATCH_SIZE = int(os.getenv("TEXT_EMBEDDING_BATCH_SIZE", 64))
+
 # wandb api key
 WANDB_API_KEY = os.getenv("WANDB_API_KEY")
 
@@ -1,4 +1,5 @@
 from .dataset import Dataset, DatasetEntry
 from .synthetic_dataset import SyntheticDataset
 from .huggingface_dataset import HuggingfaceDataset
-from .random_website_dataset import RandomWebsiteDataset
\ No newline at end of file
+from .random_website_dataset import RandomWebsiteDataset
+from .corpus_dataset import CorpusDataset
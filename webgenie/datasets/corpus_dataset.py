@@ -0,0 +1,26 @@
+import asyncio
+import bittensor as bt
+
+from webgenie.datasets.dataset import Dataset, DatasetEntry
+from webgenie.helpers.task_corpus import TaskCorpus, task_corpus
+
+
+class CorpusDataset(Dataset):
+    """
+    Replays ground truths from the task corpus, with their screenshots.
+    """
+    def __init__(self, corpus: TaskCorpus = task_corpus):
+        self.corpus = corpus
+
+    async def generate_context(self) -> DatasetEntry:
+        entry = await asyncio.to_thread(self.corpus.sample)
+        if entry is None:
+            raise ValueError("No fresh ground truth in the task corpus")
+        bt.logging.info(f"Replaying ground truth {entry.key} from the task corpus")
+        return DatasetEntry(
+            src=f"corpus:{entry.metadata.get('src', '')}",
+            topic=entry.metadata.get("topic", ""),
+            prompt=entry.metadata.get("prompt", ""),
+            ground_truth_html=entry.ground_truth_html,
+            base64_image=entry.base64_image,
+        )
@@ -0,0 +1,197 @@
+import bittensor as bt
+import json
+import os
+import random
+import threading
+import time
+from pydantic import BaseModel, Field
+
+from webgenie.constants import (
+    HF_DATASET_SNAPSHOT_DIR,
+    HF_DATASET_REFRESH_INTERVAL,
+    HF_HUB_TIMEOUT,
+)
+
+ARROW_EXTENSION = ".arrow"
+
+
+class SnapshotManifest(BaseModel):
+    dataset_name: str = Field(description="The name of the dataset on the huggingface hub")
+    split: str = Field(description="The split of the dataset")
+    columns: list = Field(description="The columns kept in the snapshot")
+    revision: str = Field(default="", description="The hub revision the snapshot was taken from")
+    num_rows: int = Field(default=0, description="The number of rows of the snapshot")
+    file_name: str = Field(description="The arrow file of the snapshot, relative to the snapshot directory")
+    checked_at: float = Field(default=0, description="When the hub was last asked for a new revision")
+
+
+class DatasetSnapshot:
+    """
+    A local arrow snapshot of some columns of a huggingface dataset split.
+
+    The snapshot is opened memory mapped on first use, and rows are only read when they are sampled.
+    The hub is asked for a new revision every `refresh_interval` seconds, when the snapshot is opened
+    and then by `sample` in a background thread, which swaps in the new snapshot once it is downloaded.
+    When the hub can't be reached the cached manifest and snapshot are used.
+    """
+    def __init__(
+        self,
+        dataset_name: str,
+        split: str,
+        columns: list,
+        root: str = HF_DATASET_SNAPSHOT_DIR,
+        refresh_interval: float = HF_DATASET_REFRESH_INTERVAL,
+    ):
+        self.dataset_name = dataset_name
+        self.split = split
+        self.columns = columns
+        self.directory = f"{root}/{dataset_name.replace('/', '__')}/{split}"
+        self.refresh_interval = refresh_interval
+
+        self.lock = threading.Lock()
+        self.table = None
+        self.manifest = None
+        # When sample asks the hub again, and whether a background refresh is running
+        self.next_refresh_at = 0
+        self.refreshing = False
+
+    @property
+    def manifest_path(self) -> str:
+        return f"{self.directory}/manifest.json"
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = SnapshotManifest(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            bt.logging.warning(f"Invalid snapshot manifest {self.manifest_path}: {e}")
+            return None
+        if manifest.columns != self.columns or not os.path.exists(f"{self.directory}/{manifest.file_name}"):
+            return None
+        return manifest
+
+    def save_manifest(self, manifest: SnapshotManifest):
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(manifest.model_dump(), f, indent=4)
+        os.replace(temp_path, self.manifest_path)
+
+    def get_hub_revision(self) -> str:
+        from huggingface_hub import HfApi
+
+        return HfApi().dataset_info(self.dataset_name, timeout=HF_HUB_TIMEOUT).sha
+
+    def download(self, revision: str) -> SnapshotManifest:
+        import pyarrow as pa
+        from datasets import load_dataset
+
+        bt.logging.info(f"Downloading snapshot of {self.dataset_name} ({self.split}) at revision {revision}")
+        dataset = load_dataset(self.dataset_name, split=self.split, revision=revision or None)
+        table = dataset.select_columns(self.columns).with_format("arrow")[:]
+
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f"{revision or int(time.time())}{ARROW_EXTENSION}"
+        temp_path = f"{self.directory}/{file_name}.tmp"
+        with pa.OSFile(temp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, f"{self.directory}/{file_name}")
+
+        manifest = SnapshotManifest(
+            dataset_name=self.dataset_name,
+            split=self.split,
+            columns=self.columns,
+            revision=revision,
+            num_rows=table.num_rows,
+            file_name=file_name,
+            checked_at=time.time(),
+        )
+        # The previous snapshot may still be open, it is removed once the new one is swapped in
+        self.save_manifest(manifest)
+        return manifest
+
+    def remove_old_snapshots(self, manifest: SnapshotManifest):
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(ARROW_EXTENSION) and file_name != manifest.file_name:
+                try:
+                    os.remove(f"{self.directory}/{file_name}")
+                except OSError as e:
+                    bt.logging.warning(f"Error removing old snapshot {file_name}: {e}")
+
+    def refresh_manifest(self) -> SnapshotManifest:
+        manifest = self.load_manifest()
+        if manifest is not None and time.time() - manifest.checked_at < self.refresh_interval:
+            return manifest
+
+        try:
+            revision = self.get_hub_revision()
+            if manifest is not None and manifest.revision == revision:
+                manifest.checked_at = time.time()
+                self.save_manifest(manifest)
+                return manifest
+            return self.download(revision)
+        except Exception as e:
+            if manifest is None:
+                raise e
+            bt.logging.warning(f"Can't refresh {self.dataset_name} from the hub, using the cached snapshot: {e}")
+            return manifest
+
+    def _read_table(self, manifest: SnapshotManifest):
+        import pyarrow as pa
+
+        source = pa.memory_map(f"{self.directory}/{manifest.file_name}", "r")
+        # Reading an arrow file from a memory map doesn't copy the data
+        return pa.ipc.open_file(source).read_all()
+
+    def open(self):
+        with self.lock:
+            if self.table is None:
+                manifest = self.refresh_manifest()
+                self.table = self._read_table(manifest)
+                self.manifest = manifest
+                self.next_refresh_at = time.time() + self.refresh_interval
+                self.remove_old_snapshots(manifest)
+                bt.logging.info(f"Opened snapshot of {self.dataset_name} ({self.split}) with {self.table.num_rows} rows")
+            return self.table
+
+    def _refresh(self):
+        try:
+            manifest = self.refresh_manifest()
+            if manifest.file_name != self.manifest.file_name:
+                # The table of the previous snapshot stays readable until it is swapped out
+                table = self._read_table(manifest)
+                with self.lock:
+                    self.table, self.manifest = table, manifest
+                self.remove_old_snapshots(manifest)
+                bt.logging.info(f"Swapped in snapshot of {self.dataset_name} ({self.split}) at revision {manifest.revision}")
+        except Exception as e:
+            bt.logging.warning(f"Error refreshing snapshot of {self.dataset_name}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+    def refresh_if_stale(self):
+        """
+        Asks the hub for a new revision in a background thread when the last check is older than `refresh_interval`.
+        """
+        with self.lock:
+            if self.table is None or self.refreshing or time.time() < self.next_refresh_at:
+                return
+            self.refreshing = True
+            # Failed checks are also only retried after the refresh interval
+            self.next_refresh_at = time.time() + self.refresh_interval
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def __len__(self) -> int:
+        return self.open().num_rows
+
+    def sample(self) -> dict:
+        """
+        Returns a random row, only that row is read from the snapshot.
+        """
+        table = self.open()
+        self.refresh_if_stale()
+        index = random.randrange(table.num_rows)
+        return {column: table.column(column)[index].as_py() for column in self.columns}
@@ -1,12 +1,14 @@
 # https://huggingface.co/datasets/SALT-NLP/Design2Code_human_eval_pairwise
 
+import asyncio
 import bittensor as bt
-import random
-from datasets import load_dataset
 from pydantic import BaseModel, Field
 
+from webgenie.constants import DATASET_HTML_TOKEN_BUDGET
 from webgenie.datasets.dataset import Dataset, DatasetEntry
-from webgenie.helpers.llms import openai_call
+from webgenie.datasets.dataset_snapshot import DatasetSnapshot
+from webgenie.helpers.html_compaction import compact_html, log_token_savings
+from webgenie.helpers.llms import openai_call, LLM_PRIORITY_DATASET
 from webgenie.prompts import PROMPT_MAKE_HTML_COMPLEX
 
 
@@ -20,25 +22,30 @@ class HuggingfaceDataset(Dataset):
         html_column = kwargs["html_column"]
         split = kwargs["split"]
 
-        self.dataset = load_dataset(dataset_name, split=split)
+        # Opened on first use, so that the validator doesn't wait for the hub when it starts
+        self.dataset = DatasetSnapshot(dataset_name, split, [html_column])
         self.html_column = html_column
 
     async def _make_html_complex(self, html: str)->str:
         bt.logging.info("Making HTML complex")
+        # The llm rebuilds the whole page from it, so repeated elements are kept
+        compacted = compact_html(html, DATASET_HTML_TOKEN_BUDGET, collapse_repeats=False)
+        log_token_savings("Huggingface dataset", [compacted])
         response = await openai_call(
             messages = [
                 {"role": "system", "content": PROMPT_MAKE_HTML_COMPLEX},
-                {"role": "user", "content": html},
+                {"role": "user", "content": compacted.html},
             ],
             response_format = HTMLResponse,
+            priority=LLM_PRIORITY_DATASET,
         )
         return response.complex_html
 
     async def generate_context(self)->DatasetEntry:
         try:
             bt.logging.info("Generating Huggingface context")
-            random_index = random.randint(0, len(self.dataset) - 1)
-            html = self.dataset[random_index][self.html_column]
+            row = await asyncio.to_thread(self.dataset.sample)
+            html = row[self.html_column]
             complex_html = await self._make_html_complex(html)
             return DatasetEntry(
                 src="huggingface",
@@ -1,107 +1,114 @@
+import asyncio
 import bittensor as bt
-import nltk
 import random
 
 from bs4 import BeautifulSoup, Tag, NavigableString
-from collections import Counter
 from duckduckgo_search import DDGS
-from nltk.corpus import brown
-from playwright.async_api import async_playwright
 from urllib.parse import urljoin
-from typing import Optional
+from typing import List
 
 from webgenie.datasets.dataset import Dataset, DatasetEntry
+from webgenie.datasets.word_list import load_english_words
+from webgenie.helpers.browser_pool import browser_pool
 from webgenie.constants import (
     GROUND_TRUTH_HTML_LOAD_TIME, 
-    CHROME_HTML_LOAD_TIME,
     JAVASCRIPT_RUNNING_TIME,
+    RANDOM_WEBSITE_CANDIDATES,
+    RANDOM_WEBSITE_SEARCH_TIMEOUT,
+    RANDOM_WEBSITE_LOAD_TIMEOUT,
+    RANDOM_WEBSITE_IDLE_TIMEOUT,
+    RANDOM_WEBSITE_MAX_HTML_BYTES,
 )
 
 class RandomWebsiteDataset(Dataset):
     def __init__(self , **kwargs):
-        nltk.download("brown", quiet=True)
-        words = brown.words()
-        word_freq = Counter(word.lower() for word in words)
-        most_common = word_freq.most_common(25000)
-        common_words = [word for word, _ in most_common]
-        self.english_words = common_words
-
-    async def get_random_website_url(self, retries: int = 3) -> Optional[str]:
-        try:
-            ddg = DDGS()
-            for _ in range(retries):
-                random_words = " ".join(random.sample(self.english_words, 5))
-                results = list(ddg.text(random_words))
-                if results:
-                    website_url = random.choice(results)["href"]
-                    return website_url
-                    
-        except Exception as ex:
-            print(f"Failed to get search results from DuckDuckGo: {ex}")
-        return None
+        self.english_words = load_english_words()
+
+    def search_website_urls(self, query: str) -> List[str]:
+        return [result["href"] for result in DDGS().text(query)]
+
+    async def get_random_website_urls(self, count: int = RANDOM_WEBSITE_CANDIDATES, retries: int = 3) -> List[str]:
+        for _ in range(retries):
+            random_words = " ".join(random.sample(self.english_words, 5))
+            try:
+                # The search client is synchronous, keep it off the event loop
+                urls = await asyncio.wait_for(
+                    asyncio.to_thread(self.search_website_urls, random_words),
+                    timeout=RANDOM_WEBSITE_SEARCH_TIMEOUT,
+                )
+            except Exception as ex:
+                bt.logging.warning(f"Failed to get search results from DuckDuckGo: {ex!r}")
+                continue
+            urls = list(dict.fromkeys(urls))
+            if urls:
+                return random.sample(urls, min(count, len(urls)))
+        return []
 
     async def get_rendered_html(self, url):
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
-                await page.goto(url, timeout=CHROME_HTML_LOAD_TIME)
+            async with browser_pool.page() as page:
+                response = await page.goto(url, timeout=RANDOM_WEBSITE_LOAD_TIMEOUT)
+                content_length = response.headers.get("content-length") if response is not None else None
+                if content_length and content_length.isdigit() and int(content_length) > RANDOM_WEBSITE_MAX_HTML_BYTES:
+                    raise ValueError(f"Page is too large: {content_length} bytes")
                 
-                # Wait for 10 seconds to ensure content loads
-                # await page.wait_for_timeout(GROUND_TRUTH_HTML_LOAD_TIME)
-                
-                await page.wait_for_load_state('networkidle')
+                try:
+                    await page.wait_for_load_state('networkidle', timeout=RANDOM_WEBSITE_IDLE_TIMEOUT)
+                except Exception:
+                    # Pages that keep polling never get idle, use what has loaded so far
+                    bt.logging.debug(f"Page didn't get idle in time: {url}")
                 await page.wait_for_timeout(JAVASCRIPT_RUNNING_TIME)
                 
                 rendered_html = await page.content()  # Get the rendered HTML
-                
-                await page.close()
-                await browser.close()
-
-                # Parse the HTML with BeautifulSoup
-                soup = BeautifulSoup(rendered_html, 'html.parser')
-
-                # Attributes that need to be absolute
-                attributes = ['href', 'src', 'srcset']
-
-                # Find all elements with 'href', 'src', or 'srcset' attributes
-                for attr in attributes:
-                    for element in soup.find_all(attrs={attr: True}):
-                        original_attr = element[attr]
-                        # Handle 'srcset' differently because it can contain multiple URLs
-                        if attr == 'srcset':
-                            new_urls = []
-                            parts = original_attr.split(',')
-                            for part in parts:
-                                # Split on whitespace and check if there is a descriptor
-                                pieces = part.strip().split(maxsplit=1)
-                                if len(pieces) == 2:
-                                    url_part, descriptor = pieces
-                                elif len(pieces) == 1:
-                                    url_part = pieces[0]
-                                    descriptor = ''
-                                else:
-                                    continue
-
-                                new_url = urljoin(url, url_part.strip())
-                                if descriptor:
-                                    new_urls.append(f"{new_url} {descriptor}")
-                                else:
-                                    new_urls.append(new_url)
-
-                            element[attr] = ', '.join(new_urls)
-                        else:
-                            element[attr] = urljoin(url, original_attr)
-                # Remove all script tags
-                for script in soup.find_all('script'):
-                    script.decompose()
-                # Return the modified HTML as a string
-                return str(soup)
+            if len(rendered_html.encode()) > RANDOM_WEBSITE_MAX_HTML_BYTES:
+                raise ValueError(f"Rendered page is too large: {len(rendered_html)} characters")
+
+            return await asyncio.to_thread(self.make_urls_absolute, rendered_html, url)
         except Exception as e:
             bt.logging.error(f"Error in get_rendered_html: {e}")
             raise Exception(f"Error in get_rendered_html: {e}")
-        
-        
+
+    def make_urls_absolute(self, rendered_html: str, url: str) -> str:
+        # Parse the HTML with BeautifulSoup
+        soup = BeautifulSoup(rendered_html, 'html.parser')
+
+        # Attributes that need to be absolute
+        attributes = ['href', 'src', 'srcset']
+
+        # Find all elements with 'href', 'src', or 'srcset' attributes
+        for attr in attributes:
+            for element in soup.find_all(attrs={attr: True}):
+                original_attr = element[attr]
+                # Handle 'srcset' differently because it can contain multiple URLs
+                if attr == 'srcset':
+                    new_urls = []
+                    parts = original_attr.split(',')
+                    for part in parts:
+                        # Split on whitespace and check if there is a descriptor
+                        pieces = part.strip().split(maxsplit=1)
+                        if len(pieces) == 2:
+                            url_part, descriptor = pieces
+                        elif len(pieces) == 1:
+                            url_part = pieces[0]
+                            descriptor = ''
+                        else:
+                            continue
+
+                        new_url = urljoin(url, url_part.strip())
+                        if descriptor:
+                            new_urls.append(f"{new_url} {descriptor}")
+                        else:
+                            new_urls.append(new_url)
+
+                    element[attr] = ', '.join(new_urls)
+                else:
+                    element[attr] = urljoin(url, original_attr)
+        # Remove all script tags
+        for script in soup.find_all('script'):
+            script.decompose()
+        # Return the modified HTML as a string
+        return str(soup)
+
     async def shorten_html(self, html_content, max_p_count = 10, max_text_length = 200):
         """
         Removes excess <p> tags and trims text inside <p> tags if the text length exceeds the max limit.
@@ -139,15 +146,39 @@ class RandomWebsiteDataset(Dataset):
             bt.logging.error(f"Error in shorten_html: {e}")
             raise e
 
+    async def fetch_candidate(self, url: str) -> str:
+        bt.logging.debug(f"Fetching website candidate: {url}")
+        html = await self.get_rendered_html(url)
+        html = await self.shorten_html(html)
+        if not html or not html.strip():
+            raise ValueError(f"Empty page: {url}")
+        return html
+
     async def generate_context(self)->DatasetEntry:
         try:
             bt.logging.info("Generating Random Website context")
-            website_url = await self.get_random_website_url()
-            if website_url is None:
+            website_urls = await self.get_random_website_urls()
+            if not website_urls:
                 raise Exception("Failed to get a valid website URL")
-            bt.logging.debug(f"Generated website URL: {website_url}")
-            html = await self.get_rendered_html(website_url)
-            html = await self.shorten_html(html)
+            bt.logging.debug(f"Generated website URLs: {website_urls}")
+
+            # Fetch the candidates concurrently and keep the first one that renders
+            candidates = [asyncio.create_task(self.fetch_candidate(url)) for url in website_urls]
+            html = None
+            try:
+                for candidate in asyncio.as_completed(candidates):
+                    try:
+                        html = await candidate
+                        break
+                    except Exception as e:
+                        bt.logging.debug(f"Rejected website candidate: {e}")
+            finally:
+                for candidate in candidates:
+                    candidate.cancel()
+                await asyncio.gather(*candidates, return_exceptions=True)
+            if html is None:
+                raise Exception(f"None of the {len(website_urls)} website candidates could be rendered")
+
             return DatasetEntry(
                 src="random_website",
                 topic="random_website",
@@ -158,4 +189,3 @@ class RandomWebsiteDataset(Dataset):
         except Exception as e:
             bt.logging.error(f"Error in generate_context: {e}")
             raise e
-            
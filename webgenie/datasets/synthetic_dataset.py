@@ -8,7 +8,7 @@ from typing import List
 from pydantic import BaseModel, Field
 
 from webgenie.datasets.dataset import Dataset, DatasetEntry
-from webgenie.helpers.llms import openai_call
+from webgenie.helpers.llms import openai_call, LLM_PRIORITY_DATASET
 from webgenie.prompts import PROMPT_GEN_CONCEPT, PROMPT_GEN_HTML
 
 
@@ -32,6 +32,7 @@ class SyntheticDataset(Dataset):
                 {"role": "system", "content": PROMPT_GEN_CONCEPT},
             ],
             response_format = ConceptResponse,
+            priority=LLM_PRIORITY_DATASET,
         )
         return response.concepts
 
@@ -42,6 +43,7 @@ class SyntheticDataset(Dataset):
                 {"role": "system", "content": PROMPT_GEN_HTML.format(concept=concept)},
             ],
             response_format = HTMLResponse,
+            priority=LLM_PRIORITY_DATASET,
         )
         return response.html
         
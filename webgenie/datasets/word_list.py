@@ -0,0 +1,65 @@
+import functools
+import os
+from typing import List, Set
+
+# The word list is a versioned artifact, regenerate it with scripts/build_english_words.py
+ENGLISH_WORDS_VERSION = 2
+ENGLISH_WORDS_SIZE = 25000
+ENGLISH_WORDS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", f"english_words_v{ENGLISH_WORDS_VERSION}.txt"
+)
+
+
+# Words that lead searches to adult sites and are missing from the better_profanity list
+EXTRA_BLOCKED_WORDS = {
+    "escort", "escorted", "escorts", "fetish", "hardcore", "hookers", "nsfw", "nudity", "pornographic",
+    "rapes", "sexiest", "sexually", "sexy", "slutty", "stripper", "strippers",
+}
+
+
+def load_blocked_words() -> Set[str]:
+    """
+    Returns the words that are kept out of the word list: the profanity list of better_profanity
+    and EXTRA_BLOCKED_WORDS. The word list seeds the searches for ground truth pages,
+    so slurs and explicit terms would bring in NSFW sites.
+    """
+    import better_profanity
+
+    path = os.path.join(os.path.dirname(better_profanity.__file__), "profanity_wordlist.txt")
+    with open(path, "r", encoding="utf-8") as f:
+        blocked_words = {line.strip().lower() for line in f if line.strip()}
+    return blocked_words | EXTRA_BLOCKED_WORDS
+
+
+def build_english_words(size: int = ENGLISH_WORDS_SIZE) -> List[str]:
+    """
+    Returns the `size` most common alphabetic english words of wordfreq that are not blocked,
+    most common first. wordfreq ships its frequency lists, so the list can be built offline.
+    """
+    from wordfreq import top_n_list
+
+    blocked_words = load_blocked_words()
+    # Numbers and punctuation make poor search queries, ask for more words than we keep
+    words = [word for word in top_n_list("en", size * 2) if word.isalpha() and word not in blocked_words]
+    return words[:size]
+
+
+def write_english_words(words: List[str], path: str = ENGLISH_WORDS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(f"# The {len(words)} most common alphabetic english words of wordfreq, version {ENGLISH_WORDS_VERSION}\n")
+        f.write("# Profanity, slurs and explicit terms are filtered out with the better_profanity word list\n")
+        f.write("# Word frequencies from wordfreq (https://github.com/rspeer/wordfreq), CC BY-SA 4.0\n")
+        f.write("# Generated by scripts/build_english_words.py, don't edit\n")
+        for word in words:
+            f.write(f"{word}\n")
+    os.replace(temp_path, path)
+
+
+@functools.lru_cache(maxsize=1)
+def load_english_words(path: str = ENGLISH_WORDS_PATH) -> List[str]:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Word list {path} not found, build it with scripts/build_english_words.py")
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip() and not line.startswith("#")]
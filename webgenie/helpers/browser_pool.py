@@ -0,0 +1,74 @@
+import asyncio
+import bittensor as bt
+from contextlib import asynccontextmanager
+
+from webgenie.constants import BROWSER_POOL_MAX_PAGES
+
+
+class BrowserPool:
+    """
+    One headless chromium that is shared by the callers on an event loop, with at most
+    `max_pages` pages open at a time. Every page gets its own browser context, so pages
+    don't share cookies or storage.
+
+    The browser is launched on first use and relaunched when it disconnects.
+    """
+    def __init__(self, max_pages: int = BROWSER_POOL_MAX_PAGES):
+        self.max_pages = max_pages
+        self.web_driver = None
+        self.browser = None
+        self.loop = None
+        self.semaphore = None
+        self.start_lock = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            if self.loop is not None:
+                raise RuntimeError("The browser pool is bound to another event loop")
+            self.loop = loop
+            self.semaphore = asyncio.Semaphore(self.max_pages)
+            self.start_lock = asyncio.Lock()
+
+    async def _ensure_browser(self):
+        async with self.start_lock:
+            if self.browser is not None and self.browser.is_connected():
+                return self.browser
+            if self.web_driver is not None:
+                try:
+                    await self.web_driver.stop()
+                except Exception as e:
+                    bt.logging.error(f"Error stopping web driver: {e}")
+
+            from playwright.async_api import async_playwright
+
+            self.web_driver = await async_playwright().start()
+            self.browser = await self.web_driver.chromium.launch(headless=True)
+            bt.logging.info(f"Started browser pool with {self.max_pages} pages.")
+            return self.browser
+
+    @asynccontextmanager
+    async def page(self):
+        self._bind_loop()
+        async with self.semaphore:
+            browser = await self._ensure_browser()
+            context = await browser.new_context()
+            try:
+                yield await context.new_page()
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    bt.logging.warning(f"Error closing browser context: {e}")
+
+    async def stop(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self.web_driver is not None:
+            await self.web_driver.stop()
+        self.browser = None
+        self.web_driver = None
+        bt.logging.info("Stopped browser pool.")
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,97 @@
+import bittensor as bt
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_cache_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class PersistentCache:
+    """
+    A json key-value cache in a sqlite file, shared by every process on the host.
+
+    When there are more than `max_entries` entries, the least recently used ones are evicted.
+    When `ttl` is set, entries expire `ttl` seconds after they were written.
+    Cache errors are logged and treated as misses, so a broken cache never breaks scoring.
+    """
+    def __init__(self, path: str, max_entries: int, ttl: float = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+        self.connection = None
+        self.connection_pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared with forked processes
+        if self.connection is None or self.connection_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            self.connection = connection
+            self.connection_pid = os.getpid()
+        return self.connection
+
+    def get(self, key: str):
+        try:
+            with self.lock:
+                connection = self._connect()
+                row = connection.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+                now = time.time()
+                if row is not None and self.ttl is not None and row[1] + self.ttl <= now:
+                    connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                connection.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+            return json.loads(row[0])
+        except Exception as e:
+            bt.logging.warning(f"Error reading from cache {self.path}: {e}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value):
+        try:
+            with self.lock:
+                connection = self._connect()
+                now = time.time()
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now),
+                )
+                connection.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except Exception as e:
+            bt.logging.warning(f"Error writing to cache {self.path}: {e}")
+
+    def size(self) -> int:
+        with self.lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0,
+        }
@@ -0,0 +1,148 @@
+import bittensor as bt
+import functools
+import re
+from bs4 import BeautifulSoup, Comment, Tag
+from pydantic import BaseModel, Field
+
+from webgenie.constants import LLM_MODEL_ID
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# Whitespace is meaningful inside these tags
+WHITESPACE_SENSITIVE_TAGS = {"pre", "textarea", "script"}
+WHITESPACE_PATTERN = re.compile(r"\s+")
+CSS_SPACE_PATTERN = re.compile(r"\s*([{}:;,>])\s*")
+TRUNCATION_MARKER = "<!-- truncated -->"
+# Rough size of a token when tiktoken is not available
+CHARACTERS_PER_TOKEN = 4
+
+
+class CompactedHtml(BaseModel):
+    html: str = Field(description="The compacted html")
+    original_tokens: int = Field(description="The number of tokens of the original html")
+    compacted_tokens: int = Field(description="The number of tokens of the compacted html")
+
+
+@functools.lru_cache(maxsize=1)
+def get_encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(LLM_MODEL_ID)
+    except Exception:
+        pass
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        bt.logging.warning(f"Error loading tiktoken encoding, estimating tokens from characters: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return (len(text) + CHARACTERS_PER_TOKEN - 1) // CHARACTERS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARACTERS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def minify_whitespace(soup: BeautifulSoup):
+    for string in list(soup.find_all(string=True)):
+        if isinstance(string, Comment):
+            string.extract()
+            continue
+        if any(parent.name in WHITESPACE_SENSITIVE_TAGS for parent in string.parents):
+            continue
+        if string.parent is not None and string.parent.name == "style":
+            string.replace_with(CSS_SPACE_PATTERN.sub(r"\1", WHITESPACE_PATTERN.sub(" ", string)).strip())
+            continue
+        text = WHITESPACE_PATTERN.sub(" ", string)
+        if text.strip():
+            string.replace_with(text)
+        else:
+            string.extract()
+
+
+def structure_signature(element: Tag, signatures: dict) -> tuple:
+    if id(element) not in signatures:
+        signatures[id(element)] = (
+            element.name,
+            tuple(element.get("class", [])),
+            tuple(structure_signature(child, signatures) for child in element.find_all(recursive=False)),
+        )
+    return signatures[id(element)]
+
+
+def collapse_repeated_siblings(soup: BeautifulSoup, keep: int):
+    """
+    Keeps the first `keep` of every run of siblings with the same structure
+    and replaces the rest with a comment that says how many were removed.
+    """
+    signatures = {}
+    for parent in [soup] + soup.find_all(True):
+        children = parent.find_all(recursive=False)
+        run = []
+        for child in children + [None]:
+            if child is not None and run and structure_signature(child, signatures) == structure_signature(run[0], signatures):
+                run.append(child)
+                continue
+            if len(run) > keep:
+                run[keep].insert_before(Comment(f" {len(run) - keep} more similar <{run[0].name}> elements "))
+                for repeated in run[keep:]:
+                    repeated.extract()
+            run = [child] if child is not None else []
+
+
+def compact_html(
+    html: str,
+    token_budget: int,
+    minify: bool = True,
+    collapse_repeats: bool = True,
+    keep_repeats: int = 2,
+) -> CompactedHtml:
+    """
+    Makes the html smaller before it is sent to an llm: optionally minifies whitespace and removes
+    comments, optionally collapses repeated sibling subtrees, and truncates the html to `token_budget` tokens.
+    With `minify` and `collapse_repeats` off the html is only truncated.
+    """
+    original_tokens = count_tokens(html)
+    if minify or collapse_repeats:
+        soup = BeautifulSoup(html, 'html.parser')
+        if minify:
+            minify_whitespace(soup)
+        if collapse_repeats:
+            collapse_repeated_siblings(soup, keep_repeats)
+        compacted_html = str(soup)
+    else:
+        compacted_html = html
+
+    compacted_tokens = count_tokens(compacted_html)
+    if compacted_tokens > token_budget:
+        compacted_html = truncate_to_tokens(compacted_html, token_budget - count_tokens(TRUNCATION_MARKER)) + TRUNCATION_MARKER
+        compacted_tokens = count_tokens(compacted_html)
+
+    return CompactedHtml(
+        html=compacted_html,
+        original_tokens=original_tokens,
+        compacted_tokens=compacted_tokens,
+    )
+
+
+def log_token_savings(name: str, compacted_htmls: list):
+    original_tokens = sum(compacted.original_tokens for compacted in compacted_htmls)
+    compacted_tokens = sum(compacted.compacted_tokens for compacted in compacted_htmls)
+    if original_tokens:
+        bt.logging.info(
+            f"{name}: compacted {len(compacted_htmls)} htmls from {original_tokens} to {compacted_tokens} tokens "
+            f"({1 - compacted_tokens / original_tokens:.0%} saved)"
+        )
@@ -1,14 +1,15 @@
 import bittensor as bt
 import asyncio
+import hashlib
 import os
 import re
 import uuid
 
 from bs4 import BeautifulSoup
+from bs4.element import Doctype, NavigableString, PreformattedString, Tag
 from lxml import etree
 from lxml.etree import XMLSyntaxError
 from PIL import Image
-from playwright.async_api import async_playwright
 
 from webgenie.constants import (
     WORK_DIR,
@@ -19,34 +20,44 @@ from webgenie.constants import (
 from webgenie.helpers.images import image_to_base64
     
 
-def is_valid_resources(html_content: str) -> bool:
-    """
-    Check if the resources in the HTML content are valid.
-    """
-    # List of allowed patterns for CSS and JavaScript resources
-    allowed_patterns = [
-        r"https?://cdn.jsdelivr.net/npm/tailwindcss@[^/]+/dist/tailwind.min.css",
-        r"https?://stackpath.bootstrapcdn.com/bootstrap/[^/]+/css/bootstrap.min.css",
-        r"https?://code.jquery.com/jquery-[^/]+.min.js",
-        r"https?://stackpath.bootstrapcdn.com/bootstrap/[^/]+/js/bootstrap.bundle.min.js",
-    ]
-    
-    soup = BeautifulSoup(html_content, 'html.parser')
-    resources = soup.find_all(['link', 'script'])
-    
-    for resource in resources:
+# Allowed patterns for CSS and JavaScript resources
+ALLOWED_RESOURCE_PATTERNS = [
+    re.compile(r"https?://cdn.jsdelivr.net/npm/tailwindcss@[^/]+/dist/tailwind.min.css"),
+    re.compile(r"https?://stackpath.bootstrapcdn.com/bootstrap/[^/]+/css/bootstrap.min.css"),
+    re.compile(r"https?://code.jquery.com/jquery-[^/]+.min.js"),
+    re.compile(r"https?://stackpath.bootstrapcdn.com/bootstrap/[^/]+/js/bootstrap.bundle.min.js"),
+]
+
+BACKGROUND_URL_PATTERN = re.compile(r'background\s*:\s*[^;]*url\([^)]+\)')
+BACKGROUND_IMAGE_URL_PATTERN = re.compile(r'background-image\s*:\s*url\([^)]+\)')
+
+
+def is_allowed_resource(url: str) -> bool:
+    return any(pattern.match(url) for pattern in ALLOWED_RESOURCE_PATTERNS)
+
+
+def has_valid_resources(soup: BeautifulSoup) -> bool:
+    for resource in soup.find_all(['link', 'script']):
         if resource.name == 'link' and resource.get('rel') == ['stylesheet']:
             href = resource.get('href')
-            if href and not any(re.match(pattern, href) for pattern in allowed_patterns):
+            if href and not is_allowed_resource(href):
                 return False
         elif resource.name == 'script':
             src = resource.get('src')
-            if src and not any(re.match(pattern, src) for pattern in allowed_patterns):
+            if src and not is_allowed_resource(src):
                 return False
 
     return True
 
 
+def is_valid_resources(html_content: str) -> bool:
+    """
+    Check if the resources in the HTML content are valid.
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    return has_valid_resources(soup)
+
+
 def is_valid_html(html_content: str) -> bool:
     """
     Check if the HTML is valid.
@@ -86,12 +97,14 @@ async def html_to_screenshot(html_content: str, page_load_time: int = 1000) -> s
     """
     Take a screenshot of the HTML content.
     """
+    os.makedirs(WORK_DIR, exist_ok=True)
     html_path = f"{WORK_DIR}/screenshot_{uuid.uuid4()}.html"
     with open(html_path, "w") as f:
         f.write(html_content)
     png_path = f"{WORK_DIR}/screenshot_{uuid.uuid4()}.png"
     url = f"file://{os.path.abspath(html_path)}"
     
+    from playwright.async_api import async_playwright
     try:
         async with async_playwright() as p:
             # Choose a browser, e.g., Chromium, Firefox, or WebKit
@@ -136,12 +149,16 @@ def format_html(html_content: str) -> str:
     return soup.prettify()
 
 
-def replace_image_sources(html_content: str, new_url: str = PLACE_HOLDER_IMAGE_URL) -> str:
+def replace_background_urls(style: str, new_url: str) -> str:
+    # Match both background-image and shorthand background property
+    style = BACKGROUND_URL_PATTERN.sub(f'background: url({new_url})', style)
+    return BACKGROUND_IMAGE_URL_PATTERN.sub(f'background-image: url({new_url})', style)
+
+
+def replace_soup_image_sources(soup: BeautifulSoup, new_url: str = PLACE_HOLDER_IMAGE_URL):
     """
-    Replace the image sources in the HTML content.
+    Replace the image sources of the parsed HTML content in place.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
     # Replace 'src' attribute in <img> tags
     for img_tag in soup.find_all('img'):
         img_tag['src'] = new_url
@@ -153,32 +170,227 @@ def replace_image_sources(html_content: str, new_url: str = PLACE_HOLDER_IMAGE_U
     
     # Replace URLs in inline styles (background-image) in elements
     for tag in soup.find_all(style=True):
-        style = tag['style']
-        # Match both background-image and shorthand background property
-        updated_style = re.sub(r'background\s*:\s*[^;]*url\([^)]+\)', f'background: url({new_url})', style)
-        updated_style = re.sub(r'background-image\s*:\s*url\([^)]+\)', f'background-image: url({new_url})', updated_style)
-        tag['style'] = updated_style
+        tag['style'] = replace_background_urls(tag['style'], new_url)
     
     # Replace URLs in <style> blocks
     for style_tag in soup.find_all('style'):
         style_content = style_tag.string
         if style_content:
-            # Update both shorthand background and background-image URLs
-            updated_content = re.sub(r'background\s*:\s*[^;]*url\([^)]+\)', f'background: url({new_url})', style_content)
-            updated_content = re.sub(r'background-image\s*:\s*url\([^)]+\)', f'background-image: url({new_url})', updated_content)
-            style_tag.string.replace_with(updated_content)
-    
+            style_tag.string.replace_with(replace_background_urls(style_content, new_url))
+
+
+def replace_image_sources(html_content: str, new_url: str = PLACE_HOLDER_IMAGE_URL) -> str:
+    """
+    Replace the image sources in the HTML content.
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    replace_soup_image_sources(soup, new_url)
     return str(soup)
 
 
+# format_soup walks the tree with beautifulsoup4 internals, the version is pinned in pyproject.toml.
+# Other versions fall back to formatting and parsing the HTML again.
+FORMAT_SOUP_SUPPORTED = (
+    hasattr(BeautifulSoup, "_event_stream")
+    and hasattr(Tag, "_should_pretty_print")
+    and hasattr(Tag, "_format_tag")
+    and hasattr(Tag, "START_ELEMENT_EVENT")
+)
+
+# The characters html.parser treats as whitespace between two tags
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+class ReparsedHtmlWriter:
+    """
+    Writes the HTML that BeautifulSoup with html.parser reads back from a stream of markup and text,
+    without building the tree. format_html followed by another parse is what the validator used to
+    do, so its output must stay the same:
+
+    - Whitespace-only text between two tags becomes a newline or a space, except in <pre> and <textarea>.
+    - A void tag written as <br> is closed right away and a later </br> is ignored.
+    - A void tag written as <br/> after such a <br> stays open until its parent is closed.
+    """
+    def __init__(self, soup: BeautifulSoup):
+        self.builder = soup.builder
+        self.preserve_whitespace_tags = soup.builder.preserve_whitespace_tags or set()
+        self.void_element_close_prefix = soup.formatter_for_name("minimal").void_element_close_prefix or ''
+        self.pieces = []
+        self.data = []
+        # Open tags as [name, closing markup, index of the opening piece, has children]
+        self.open_tags = []
+        self.preserved_count = 0
+        self.already_closed_empty_elements = []
+
+    def add_child(self):
+        if self.open_tags:
+            self.open_tags[-1][3] = True
+
+    def end_data(self):
+        if not self.data:
+            return
+        text = "".join(self.data)
+        self.data = []
+        if not text:
+            return
+        if not self.preserved_count and not text.strip(ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        self.pieces.append(text)
+        self.add_child()
+
+    def text(self, text: str):
+        self.data.append(text)
+
+    def markup(self, markup: str):
+        # Comments, doctypes and other declarations
+        self.end_data()
+        self.pieces.append(markup)
+        self.add_child()
+
+    def push(self, name: str, opening: str, closing: str):
+        self.end_data()
+        self.add_child()
+        self.pieces.append(opening)
+        self.open_tags.append([name, closing, len(self.pieces) - 1, False])
+        if name in self.preserve_whitespace_tags:
+            self.preserved_count += 1
+
+    def pop(self):
+        name, closing, index, has_children = self.open_tags.pop()
+        if name in self.preserve_whitespace_tags:
+            self.preserved_count -= 1
+        if has_children or not self.builder.can_be_empty_element(name):
+            self.pieces.append(closing)
+        else:
+            # An empty void tag is written as <br/>
+            self.pieces[index] = self.pieces[index][:-1] + self.void_element_close_prefix + ">"
+
+    def pop_to_tag(self, name: str):
+        if not any(open_tag[0] == name for open_tag in self.open_tags):
+            return
+        while self.open_tags[-1][0] != name:
+            self.pop()
+        self.pop()
+
+    def start_tag(self, name: str, opening: str, closing: str):
+        self.push(name, opening, closing)
+        if self.builder.can_be_empty_element(name):
+            self.end_data()
+            self.pop_to_tag(name)
+            self.already_closed_empty_elements.append(name)
+
+    def empty_tag(self, name: str, opening: str, closing: str):
+        self.push(name, opening, closing)
+        self.end_tag(name)
+
+    def end_tag(self, name: str):
+        if name in self.already_closed_empty_elements:
+            self.already_closed_empty_elements.remove(name)
+            return
+        self.end_data()
+        self.pop_to_tag(name)
+
+    def getvalue(self) -> str:
+        self.end_data()
+        while self.open_tags:
+            self.pop()
+        return "".join(self.pieces)
+
+
+def format_soup(soup: BeautifulSoup) -> str:
+    """
+    Format the parsed HTML content, same as format_html followed by another html.parser parse.
+
+    The HTML is prettified the way Tag.decode of beautifulsoup4 4.12 does, and written through
+    ReparsedHtmlWriter instead of being parsed again.
+    """
+    formatter = soup.formatter_for_name("minimal")
+    writer = ReparsedHtmlWriter(soup)
+    indent_level = 0
+    string_literal_tag = None
+
+    for event, element in soup._event_stream():
+        if event is Tag.END_ELEMENT_EVENT:
+            indent_level -= 1
+
+        indent = string_literal_tag is None
+        if event is Tag.START_ELEMENT_EVENT and indent and not element._should_pretty_print():
+            string_literal_tag = element
+            space_before, space_after = True, False
+        elif event is Tag.END_ELEMENT_EVENT and element is string_literal_tag:
+            string_literal_tag = None
+            space_before, space_after = False, True
+        else:
+            space_before = space_after = indent
+
+        if isinstance(element, NavigableString) and not isinstance(element, PreformattedString):
+            piece = element.output_ready(formatter)
+            if space_before or space_after:
+                piece = piece.strip()
+                if piece:
+                    if space_before and indent_level:
+                        piece = formatter.indent * indent_level + piece
+                    if space_after:
+                        piece += "\n"
+            writer.text(piece)
+            continue
+
+        if space_before and indent_level:
+            writer.text(formatter.indent * indent_level)
+        if isinstance(element, NavigableString):
+            writer.markup(element.output_ready(formatter))
+            if isinstance(element, Doctype) and not (space_before or space_after):
+                # An unstripped doctype ends with a newline that is read back as text
+                writer.text("\n")
+        elif event is Tag.END_ELEMENT_EVENT:
+            writer.end_tag(element.name)
+        else:
+            opening = element._format_tag(None, formatter, opening=True)
+            closing = f"</{element.prefix + ':' if element.prefix else ''}{element.name}>"
+            if event is Tag.EMPTY_ELEMENT_EVENT:
+                # The writer adds the closing slash back when the tag stays empty
+                opening = opening[:-1 - len(formatter.void_element_close_prefix or '')] + ">"
+                writer.empty_tag(element.name, opening, closing)
+            else:
+                writer.start_tag(element.name, opening, closing)
+        if space_after:
+            writer.text("\n")
+
+        if event is Tag.START_ELEMENT_EVENT:
+            indent_level += 1
+
+    return writer.getvalue()
+
+
+def normalize_html(html_content: str, new_url: str = PLACE_HOLDER_IMAGE_URL) -> tuple[str, bool]:
+    """
+    Preprocess the HTML content and check its resources with a single parse.
+
+    Returns the same HTML as preprocess_html, and whether is_valid_resources holds for it.
+    """
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+    except Exception as e:
+        bt.logging.error(f"An error occurred: {e}")
+        return "", False
+
+    # The image sources are replaced before formatting, formatting only changes the
+    # whitespace around the strings and the resources aren't touched by the replacement.
+    is_valid = has_valid_resources(soup)
+    if FORMAT_SOUP_SUPPORTED:
+        try:
+            replace_soup_image_sources(soup, new_url)
+            return format_soup(soup), is_valid
+        except (AttributeError, TypeError) as e:
+            bt.logging.warning(f"Formatting the parsed HTML failed, formatting it again: {e}")
+    return replace_image_sources(format_html(html_content), new_url), is_valid
+
+
 def preprocess_html(html_content: str) -> str:
     """
     Preprocess the HTML content.
     """
-    if not is_valid_html(html_content):
-        return ""
-    html_content = format_html(html_content)
-    html_content = replace_image_sources(html_content)
+    html_content, _ = normalize_html(html_content)
     return html_content
 
 
@@ -201,3 +413,11 @@ def is_empty_html(html_content: str) -> bool:
         return True
         
     return False
+
+
+def normalized_html_hash(html_content: str) -> str:
+    """
+    Hash of the HTML content that ignores line endings and surrounding whitespace.
+    """
+    normalized_html = html_content.replace("\r\n", "\n").strip()
+    return hashlib.sha256(normalized_html.encode()).hexdigest()
@@ -0,0 +1,20 @@
+import importlib
+
+
+def lazy_exports(package: str, exports: dict):
+    """
+    Returns the module level __getattr__ and __dir__ of a package whose exports are imported
+    on first access (PEP 562). `exports` maps every exported name to its module, relative to `package`.
+    """
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package), name)
+        # Cache it on the package, so that the next access doesn't go through __getattr__
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,174 @@
+# A local stand-in for an OpenAI compatible llm server, for offline scoring and load tests.
+#
+# It implements the chat completions endpoint with structured outputs and answers every request
+# with a deterministic json instance of the requested schema. Start it and point the neurons to it:
+#   python -m webgenie.helpers.llm_stub_server --port 8100 --latency-ms 500 --error-rate 0.05
+#   LLM_MODEL_URL=http://localhost:8100/v1 LLM_API_KEY=stub LLM_MODEL_ID=stub
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+STUB_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>Stub Page</title>
+    <meta name="description" content="A page generated by the llm stub server.">
+</head>
+<body>
+    <header><h1>Stub Page</h1></header>
+    <main>
+        <section>
+            <h2>About</h2>
+            <p>This page was generated by the llm stub server.</p>
+        </section>
+    </main>
+    <footer><p>Stub footer</p></footer>
+</body>
+</html>"""
+STUB_TEXT = "Create a simple landing page with a header, an about section and a footer."
+STUB_ARRAY_SIZE = 10
+# Used when a number has no bounds, e.g. the 0 to 100 quality scores
+STUB_NUMBER_RANGE = (0, 100)
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 0, latency_jitter_ms: float = 0, error_rate: float = 0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.seed = seed
+
+
+config = StubConfig()
+app = FastAPI()
+
+
+def stub_value(schema: dict, definitions: dict, rng: random.Random, name: str = "", index: int = 0):
+    if "$ref" in schema:
+        return stub_value(definitions[schema["$ref"].split("/")[-1]], definitions, rng, name, index)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return stub_value(options[0] if options else {"type": "null"}, definitions, rng, name, index)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+
+    schema_type = schema.get("type", "string")
+    if schema_type == "object":
+        return {
+            property_name: stub_value(property_schema, definitions, rng, property_name, index)
+            for property_name, property_schema in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [
+            stub_value(schema.get("items", {}), definitions, rng, name, i)
+            for i in range(STUB_ARRAY_SIZE)
+        ]
+    if schema_type == "integer":
+        # Items of a list often carry their index, e.g. batch scores
+        if name == "id":
+            return index
+        return rng.randint(schema.get("minimum", STUB_NUMBER_RANGE[0]), schema.get("maximum", STUB_NUMBER_RANGE[1]))
+    if schema_type == "number":
+        return round(rng.uniform(schema.get("minimum", STUB_NUMBER_RANGE[0]), schema.get("maximum", STUB_NUMBER_RANGE[1])), 2)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    if schema_type == "null":
+        return None
+    if "html" in name:
+        return STUB_HTML
+    if name == "prompt":
+        return STUB_TEXT
+    return f"stub {name} {index}".strip()
+
+
+def stub_content(body: dict, seed: int) -> str:
+    rng = random.Random(f"{seed}:{json.dumps(body.get('messages', []), sort_keys=True)}")
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"]["schema"]
+        return json.dumps(stub_value(schema, schema.get("$defs", {}), rng))
+    if response_format.get("type") == "json_object":
+        return json.dumps({"result": STUB_TEXT})
+    return STUB_TEXT
+
+
+def count_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "stub", "object": "model", "created": 0, "owned_by": "stub"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if config.latency_ms or config.latency_jitter_ms:
+        latency_ms = max(0, random.gauss(config.latency_ms, config.latency_jitter_ms))
+        await asyncio.sleep(latency_ms / 1000)
+    if random.random() < config.error_rate:
+        status_code = random.choice([429, 500])
+        return JSONResponse(
+            status_code=status_code,
+            content={"error": {"message": "Injected error", "type": "stub_error", "code": status_code}},
+            headers={"retry-after": "1"} if status_code == 429 else None,
+        )
+
+    content = stub_content(body, config.seed)
+    prompt_tokens = count_tokens(json.dumps(body.get("messages", [])))
+    completion_tokens = count_tokens(content)
+    request_hash = hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+    return {
+        "id": f"chatcmpl-stub-{request_hash[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI compatible llm stub server")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Mean latency of a response")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0, help="Standard deviation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of requests that fail with 429 or 500")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the canned responses")
+    args = parser.parse_args()
+
+    config.latency_ms = args.latency_ms
+    config.latency_jitter_ms = args.latency_jitter_ms
+    config.error_rate = args.error_rate
+    config.seed = args.seed
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
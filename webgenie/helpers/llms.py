@@ -1,40 +1,242 @@
 import bittensor as bt
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
 
 from openai import AsyncOpenAI
 
 from webgenie.constants import (
-    LLM_MODEL_ID, 
-    LLM_API_KEY, 
-    LLM_MODEL_URL
+    LLM_MODEL_ID,
+    LLM_API_KEY,
+    LLM_MODEL_URL,
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
 )
 
-if not LLM_API_KEY or not LLM_MODEL_URL or not LLM_MODEL_ID:
-    raise Exception("LLM_API_KEY, LLM_MODEL_URL, and LLM_MODEL_ID must be set")
+# Created on first use, so that processes that never call the llm don't need the llm settings
+client = None
 
-client = AsyncOpenAI(
-    api_key=LLM_API_KEY,
-    base_url=LLM_MODEL_URL,
-)
 
-async def openai_call(messages, response_format, deterministic=False, retries=3):
-    for _ in range(retries):
+def get_client() -> AsyncOpenAI:
+    global client
+    if client is None:
+        if not LLM_API_KEY or not LLM_MODEL_URL or not LLM_MODEL_ID:
+            raise Exception("LLM_API_KEY, LLM_MODEL_URL, and LLM_MODEL_ID must be set")
+        client = AsyncOpenAI(
+            api_key=LLM_API_KEY,
+            base_url=LLM_MODEL_URL,
+        )
+    return client
+
+# Lower values are served first
+LLM_PRIORITY_SCORING = 0
+LLM_PRIORITY_DATASET = 10
+
+# Output tokens we reserve for a request before we know its real usage
+ESTIMATED_COMPLETION_TOKENS = 1000
+
+
+class TokenBucket:
+    """
+    Allows `rate_per_minute` units per minute. Reservations can overdraw the bucket,
+    the caller then waits until the bucket has refilled.
+    """
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_second = rate_per_minute / 60
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes `amount` units and returns how many seconds the caller has to wait before using them.
+        """
+        if self.rate_per_second <= 0:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+            self.updated_at = now
+            self.tokens -= amount
+            return max(0, -self.tokens / self.rate_per_second)
+
+    def adjust(self, amount: float):
+        if self.rate_per_second <= 0:
+            return
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class LlmGateway:
+    """
+    Shared limits for the llm requests to one model: at most `max_concurrency` requests in flight,
+    request and token rate limits, and a priority queue for the requests that wait for a slot.
+
+    The gateway is thread safe and can be used from any event loop.
+    """
+    def __init__(
+        self,
+        model: str,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.waiters = []
+        self.sequence = itertools.count()
+
+        self.total_requests = 0
+        self.total_retries = 0
+        self.total_failures = 0
+        self.total_queue_seconds = 0
+
+    async def acquire(self, priority: int):
+        with self.lock:
+            if self.in_flight < self.max_concurrency and not self.waiters:
+                self.in_flight += 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            heapq.heappush(self.waiters, (priority, next(self.sequence), loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed to us right before the cancellation
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self.lock:
+            while self.waiters:
+                _, _, loop, future = heapq.heappop(self.waiters)
+                if future.cancelled():
+                    continue
+                # Hand the slot over to the waiter, in_flight doesn't change
+                loop.call_soon_threadsafe(self._wake, future)
+                return
+            self.in_flight -= 1
+
+    def _wake(self, future: asyncio.Future):
+        if future.done():
+            # The waiter was cancelled in the meantime, pass the slot on
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def wait_for_rate_limits(self, estimated_tokens: int):
+        """
+        Reserves rate limit capacity for one request and waits until it can be used.
+        Called before `acquire`, so that a request never holds a slot while it is throttled.
+        """
+        delay = max(
+            self.request_bucket.reserve(1),
+            self.token_bucket.reserve(estimated_tokens),
+        )
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record_request(self, queue_seconds: float):
+        with self.lock:
+            self.total_requests += 1
+            self.total_queue_seconds += queue_seconds
+
+    def record_retry(self):
+        with self.lock:
+            self.total_retries += 1
+
+    def record_failure(self):
+        with self.lock:
+            self.total_failures += 1
+
+    def metrics(self) -> dict:
+        with self.lock:
+            queued = {}
+            for priority, _, _, future in self.waiters:
+                if not future.cancelled():
+                    queued[priority] = queued.get(priority, 0) + 1
+            return {
+                "model": self.model,
+                "in_flight": self.in_flight,
+                "queued": queued,
+                "requests": self.total_requests,
+                "retries": self.total_retries,
+                "failures": self.total_failures,
+                "mean_queue_seconds": self.total_queue_seconds / self.total_requests if self.total_requests else 0,
+            }
+
+
+llm_gateways = {}
+llm_gateways_lock = threading.Lock()
+
+
+def get_llm_gateway(model: str = LLM_MODEL_ID) -> LlmGateway:
+    with llm_gateways_lock:
+        if model not in llm_gateways:
+            llm_gateways[model] = LlmGateway(model)
+        return llm_gateways[model]
+
+
+def estimate_tokens(messages) -> int:
+    # About 4 characters per token for english text and html
+    return len(json.dumps(messages)) // 4 + ESTIMATED_COMPLETION_TOKENS
+
+
+def backoff_delay(attempt: int) -> float:
+    # Exponential backoff with full jitter, so that retries of concurrent requests don't line up
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+
+async def openai_call(messages, response_format, deterministic=False, retries=3, priority=LLM_PRIORITY_SCORING):
+    llm_client = get_client()
+    gateway = get_llm_gateway(LLM_MODEL_ID)
+    estimated_tokens = estimate_tokens(messages)
+    for attempt in range(retries):
+        if attempt > 0:
+            gateway.record_retry()
+            await asyncio.sleep(backoff_delay(attempt))
+
+        await gateway.wait_for_rate_limits(estimated_tokens)
+        queued_at = time.monotonic()
+        await gateway.acquire(priority)
         try:
+            gateway.record_request(time.monotonic() - queued_at)
             if deterministic:
-                completion = await client.beta.chat.completions.parse(
+                completion = await llm_client.beta.chat.completions.parse(
                     model=LLM_MODEL_ID,
                     messages= messages,
                     response_format=response_format,
                     temperature=0,
                 )
             else:
-                completion = await client.beta.chat.completions.parse(
+                completion = await llm_client.beta.chat.completions.parse(
                     model=LLM_MODEL_ID,
                     messages= messages,
                     response_format=response_format,
                     temperature=0.7,
                 )
+            if completion.usage is not None:
+                gateway.token_bucket.adjust(estimated_tokens - completion.usage.total_tokens)
             return completion.choices[0].message.parsed
         except Exception as e:
             bt.logging.error(f"Error calling OpenAI: {e}")
             continue
-    raise Exception("Failed to call OpenAI")
\ No newline at end of file
+        finally:
+            gateway.release()
+    gateway.record_failure()
+    bt.logging.warning(f"LLM gateway metrics: {gateway.metrics()}")
+    raise Exception("Failed to call OpenAI")
@@ -0,0 +1,138 @@
+import bittensor as bt
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Tuple
+
+from webgenie.constants import (
+    VALIDATION_WORKER_COUNT,
+    VALIDATION_BATCH_SIZE,
+)
+from webgenie.helpers.htmls import normalize_html
+from webgenie.protocol import verify_answer_hash
+
+# The stages a response can be rejected at, in order
+REJECTION_STAGES = ["status", "hash", "html", "resources"]
+
+
+class ValidationReport(BaseModel):
+    received: int = Field(default=0, description="The number of validated responses")
+    valid: int = Field(default=0, description="The number of responses that passed every stage")
+    rejected: Dict[str, int] = Field(
+        default_factory=lambda: {stage: 0 for stage in REJECTION_STAGES},
+        description="The number of rejected responses per stage",
+    )
+
+    def __str__(self) -> str:
+        rejected = ", ".join(f"{stage}: {count}" for stage, count in self.rejected.items())
+        return f"{self.valid}/{self.received} valid, rejected by {rejected}"
+
+
+def precheck_response(synapse: bt.Synapse) -> Optional[str]:
+    """
+    Returns the stage that rejects the response without parsing its html, or None.
+    """
+    if synapse.dendrite.status_code != 200:
+        return "status"
+    if not verify_answer_hash(synapse):
+        return "hash"
+    return None
+
+
+def normalize_html_batch(htmls: List[str]) -> List[Tuple[str, bool]]:
+    return [normalize_html(html) for html in htmls]
+
+
+class ResponseValidator:
+    """
+    Validates the revealed miner responses.
+
+    The status codes and answer hashes are checked first, then the htmls of the remaining
+    responses are normalized on a pool of worker processes, `batch_size` htmls per job.
+    """
+    def __init__(self, max_workers: int = VALIDATION_WORKER_COUNT, batch_size: int = VALIDATION_BATCH_SIZE):
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        bt.logging.info(f"Starting response validator with {self.max_workers} workers")
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def start(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = self._create_pool()
+
+    def stop(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            bt.logging.info("Response validator stopped")
+
+    async def _normalize_batch(self, htmls: List[str]) -> List[Tuple[str, bool]]:
+        with self.lock:
+            if self.pool is None:
+                self.pool = self._create_pool()
+            pool = self.pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, normalize_html_batch, htmls)
+        except BrokenProcessPool as e:
+            with self.lock:
+                if self.pool is pool:
+                    self.pool = None
+            bt.logging.error(f"Response validator workers crashed, validating the batch in a thread: {e}")
+            return await asyncio.to_thread(normalize_html_batch, htmls)
+
+    async def validate(self, synapses: List[bt.Synapse]) -> Tuple[List[Optional[bt.Synapse]], ValidationReport]:
+        """
+        Returns the checked synapses in the order of `synapses`, None for the rejected ones,
+        and how many responses every stage rejected.
+        The html of a checked synapse is replaced with its normalized html.
+        """
+        report = ValidationReport(received=len(synapses))
+        # Hashing the htmls of all the miners takes a while, keep it off the event loop
+        rejected_stages = await asyncio.to_thread(lambda: [precheck_response(synapse) for synapse in synapses])
+        for stage in rejected_stages:
+            if stage is not None:
+                report.rejected[stage] += 1
+
+        indices = [index for index, stage in enumerate(rejected_stages) if stage is None]
+        batches = [indices[start:start + self.batch_size] for start in range(0, len(indices), self.batch_size)]
+        results = await asyncio.gather(*[
+            self._normalize_batch([synapses[index].html for index in batch]) for batch in batches
+        ])
+
+        checked_synapses = [None] * len(synapses)
+        for batch, batch_results in zip(batches, results):
+            for index, (html, is_valid_resources) in zip(batch, batch_results):
+                if not html:
+                    report.rejected["html"] += 1
+                elif not is_valid_resources:
+                    report.rejected["resources"] += 1
+                else:
+                    synapses[index].html = html
+                    checked_synapses[index] = synapses[index]
+                    report.valid += 1
+
+        bt.logging.info(f"Validated responses: {report}")
+        return checked_synapses, report
+
+
+response_validator = ResponseValidator()
+
+
+def start_response_validator():
+    response_validator.start()
+
+
+def stop_response_validator():
+    response_validator.stop()
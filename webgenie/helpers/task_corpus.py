@@ -0,0 +1,239 @@
+import bittensor as bt
+import base64
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zipfile
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+from webgenie.constants import (
+    TASK_CORPUS_DIR,
+    TASK_CORPUS_MAX_ENTRIES,
+    TASK_CORPUS_MAX_AGE,
+    TASK_CORPUS_MAX_USES,
+    TASK_CORPUS_MIN_REUSE_INTERVAL,
+)
+from webgenie.helpers.htmls import normalized_html_hash
+
+GROUND_TRUTH_MEMBER = "ground_truth.html"
+SCREENSHOT_MEMBER = "screenshot.png"
+METADATA_MEMBER = "metadata.json"
+FEATURES_PREFIX = "features/"
+# Members that are already compressed are stored as they are
+STORED_EXTENSIONS = (".png", ".jpg", ".npy")
+
+
+class MappedFile:
+    """
+    A memory map with the file methods zipfile needs, mmap only has seekable from python 3.13.
+    """
+    def __init__(self, mapped: mmap.mmap):
+        self.mapped = mapped
+
+    def seekable(self) -> bool:
+        return True
+
+    def __getattr__(self, name):
+        return getattr(self.mapped, name)
+
+
+class CorpusEntry(BaseModel):
+    key: str = Field(description="The normalized hash of the ground truth html")
+    ground_truth_html: str = Field(description="The preprocessed ground truth html")
+    base64_image: str = Field(default="", description="The base64 encoded screenshot of the ground truth html")
+    metadata: dict = Field(default={}, description="The source metadata of the entry")
+
+
+class TaskCorpus:
+    """
+    A content addressed corpus of generated ground truths, keyed by their normalized html hash.
+
+    Every entry is one zip file with the preprocessed html, the screenshot, the source metadata
+    and the precomputed scoring features. Text members are deflated and images are stored as they
+    are, entries are read through a memory map. A sqlite index keeps the usage of every entry for
+    the freshness policy of `sample`.
+    """
+    def __init__(
+        self,
+        root: str,
+        max_entries: int = TASK_CORPUS_MAX_ENTRIES,
+        max_age: float = TASK_CORPUS_MAX_AGE,
+        max_uses: int = TASK_CORPUS_MAX_USES,
+        min_reuse_interval: float = TASK_CORPUS_MIN_REUSE_INTERVAL,
+    ):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.min_reuse_interval = min_reuse_interval
+
+        self.lock = threading.Lock()
+        self.connection = None
+        self.connection_pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared with forked processes
+        if self.connection is None or self.connection_pid != os.getpid():
+            os.makedirs(self.root, exist_ok=True)
+            connection = sqlite3.connect(f"{self.root}/index.db", timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, src TEXT NOT NULL, created_at REAL NOT NULL, "
+                "used_at REAL NOT NULL DEFAULT 0, use_count INTEGER NOT NULL DEFAULT 0)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at)")
+            self.connection = connection
+            self.connection_pid = os.getpid()
+        return self.connection
+
+    def path(self, key: str) -> str:
+        return f"{self.root}/entries/{key[:2]}/{key}.zip"
+
+    def _write_entry(self, key: str, members: Dict[str, bytes]):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4()}.tmp"
+        with zipfile.ZipFile(temp_path, "w") as archive:
+            for name, data in members.items():
+                compression = zipfile.ZIP_STORED if name.endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+                archive.writestr(name, data, compress_type=compression)
+        # Readers that mapped the old file keep reading it
+        os.replace(temp_path, path)
+
+    def _read_members(self, key: str, names: Optional[List[str]] = None) -> Dict[str, bytes]:
+        with open(self.path(key), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with zipfile.ZipFile(MappedFile(mapped)) as archive:
+                    available = archive.namelist()
+                    return {
+                        name: archive.read(name)
+                        for name in (available if names is None else names)
+                        if name in available
+                    }
+
+    def add(self, ground_truth_html: str, base64_image: str = "", metadata: Optional[dict] = None) -> str:
+        """
+        Adds a ground truth to the corpus and returns its key. A ground truth that is already in the corpus keeps its entry.
+        """
+        key = normalized_html_hash(ground_truth_html)
+        metadata = metadata or {}
+        try:
+            with self.lock:
+                connection = self._connect()
+                if connection.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None:
+                    return key
+
+            members = {
+                GROUND_TRUTH_MEMBER: ground_truth_html.encode(),
+                METADATA_MEMBER: json.dumps({**metadata, "created_at": time.time()}).encode(),
+            }
+            if base64_image:
+                members[SCREENSHOT_MEMBER] = base64.b64decode(base64_image)
+            self._write_entry(key, members)
+
+            with self.lock:
+                connection = self._connect()
+                # The ground truth was just used for a fresh task
+                now = time.time()
+                connection.execute(
+                    "INSERT OR IGNORE INTO entries (key, src, created_at, used_at, use_count) VALUES (?, ?, ?, ?, 1)",
+                    (key, metadata.get("src", ""), now, now),
+                )
+            self._evict()
+        except Exception as e:
+            bt.logging.warning(f"Error adding a ground truth to the task corpus: {e}")
+        return key
+
+    def get(self, key: str) -> Optional[CorpusEntry]:
+        try:
+            members = self._read_members(key, [GROUND_TRUTH_MEMBER, SCREENSHOT_MEMBER, METADATA_MEMBER])
+        except FileNotFoundError:
+            return None
+        return CorpusEntry(
+            key=key,
+            ground_truth_html=members[GROUND_TRUTH_MEMBER].decode(),
+            base64_image=base64.b64encode(members[SCREENSHOT_MEMBER]).decode() if SCREENSHOT_MEMBER in members else "",
+            metadata=json.loads(members.get(METADATA_MEMBER, b"{}")),
+        )
+
+    def sample(self) -> Optional[CorpusEntry]:
+        """
+        Returns the least used fresh entry, and counts it as used. Entries older than `max_age`, used
+        `max_uses` times, or used in the last `min_reuse_interval` seconds are not sampled.
+        """
+        try:
+            with self.lock:
+                connection = self._connect()
+                now = time.time()
+                row = connection.execute(
+                    "SELECT key FROM entries WHERE created_at > ? AND use_count < ? AND used_at < ? "
+                    "ORDER BY use_count, RANDOM() LIMIT 1",
+                    (now - self.max_age, self.max_uses, now - self.min_reuse_interval),
+                ).fetchone()
+                if row is None:
+                    return None
+                connection.execute(
+                    "UPDATE entries SET used_at = ?, use_count = use_count + 1 WHERE key = ?",
+                    (now, row[0]),
+                )
+            return self.get(row[0])
+        except Exception as e:
+            bt.logging.warning(f"Error sampling from the task corpus: {e}")
+            return None
+
+    def get_features(self, key: str, names: List[str]) -> Optional[Dict[str, bytes]]:
+        """
+        Returns the precomputed scoring features of an entry, or None when one of them is missing.
+        """
+        try:
+            members = self._read_members(key, [f"{FEATURES_PREFIX}{name}" for name in names])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            bt.logging.warning(f"Error reading features from the task corpus: {e}")
+            return None
+        if len(members) != len(names):
+            return None
+        return {name[len(FEATURES_PREFIX):]: data for name, data in members.items()}
+
+    def put_features(self, key: str, features: Dict[str, bytes]):
+        """
+        Stores scoring features with an entry. Ground truths that are not in the corpus are ignored.
+        """
+        try:
+            with self.lock:
+                members = self._read_members(key)
+                members.update({f"{FEATURES_PREFIX}{name}": data for name, data in features.items()})
+                self._write_entry(key, members)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            bt.logging.warning(f"Error writing features to the task corpus: {e}")
+
+    def _evict(self):
+        with self.lock:
+            connection = self._connect()
+            rows = connection.execute(
+                "SELECT key FROM entries WHERE created_at <= ? OR key IN "
+                "(SELECT key FROM entries ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (time.time() - self.max_age, self.max_entries),
+            ).fetchall()
+            for (key,) in rows:
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                try:
+                    os.remove(self.path(key))
+                except FileNotFoundError:
+                    pass
+
+    def size(self) -> int:
+        with self.lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+task_corpus = TaskCorpus(TASK_CORPUS_DIR)
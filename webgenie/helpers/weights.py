@@ -1,6 +1,5 @@
 import bittensor as bt
 import os
-import wandb
 
 import webgenie
 
@@ -21,6 +20,9 @@ def init_wandb(self):
             wandb_on = False
             return
 
+        # wandb is slow to import, only import it when it is used
+        import wandb
+
         wandb_on = True
         wandb.login(key=WANDB_API_KEY)
 
@@ -48,6 +50,7 @@ def log_wandb(data: dict):
     try:
         if not wandb_on:
             return
+        import wandb
         wandb.log(data)
     except Exception as e:
         bt.logging.error(f"Error logging to wandb: {e}")
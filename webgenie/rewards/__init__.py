@@ -1,6 +1,21 @@
-from .reward import Reward
-from .visual_reward import VisualReward
-from .quality_reward import QualityReward
-from .rtc_reward.rtc_reward import RtcReward
-from .bert_reward import BertReward
-from .lighthouse_reward import LighthouseReward
+# The rewards pull in heavy dependencies (torch, clip, sentence_transformers, playwright, ...),
+# so they are only imported when they are first used.
+from webgenie.helpers.lazy import lazy_exports
+
+__all__ = [
+    "Reward",
+    "VisualReward",
+    "QualityReward",
+    "RtcReward",
+    "BertReward",
+    "LighthouseReward",
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "Reward": ".reward",
+    "VisualReward": ".visual_reward",
+    "QualityReward": ".quality_reward",
+    "RtcReward": ".rtc_reward.rtc_reward",
+    "BertReward": ".bert_reward",
+    "LighthouseReward": ".lighthouse_reward",
+})
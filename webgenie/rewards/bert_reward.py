@@ -1,9 +1,10 @@
-import bert_score
+import asyncio
 import bittensor as bt
 import numpy as np
 from typing import List
 
 from webgenie.rewards.reward import Reward
+from webgenie.rewards.text_models import bert_f1_scores
 from webgenie.tasks import (
     Task,
     Solution,
@@ -26,7 +27,7 @@ class BertReward(Reward):
             original_htmls.append(task.ground_truth_html)
             miner_htmls.append(solution.html)
 
-        P, R, F1 = bert_score.score(original_htmls, miner_htmls, lang='en')
+        F1 = await asyncio.to_thread(bert_f1_scores, original_htmls, miner_htmls, lang='en')
 
         return np.array(F1)
 
@@ -1,5 +1,17 @@
-from .lighthouse_reward import LighthouseReward
-from .lighthouse_server_fastapi import (
-    start_lighthouse_server_thread,
-    stop_lighthouse_server,
-)
\ No newline at end of file
+from webgenie.helpers.lazy import lazy_exports
+
+__all__ = [
+    "LighthouseReward",
+    "start_lighthouse_server_thread",
+    "stop_lighthouse_server",
+    "start_lighthouse_runners",
+    "stop_lighthouse_runners",
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "LighthouseReward": ".lighthouse_reward",
+    "start_lighthouse_server_thread": ".lighthouse_server_fastapi",
+    "stop_lighthouse_server": ".lighthouse_server_fastapi",
+    "start_lighthouse_runners": ".lighthouse_runner",
+    "stop_lighthouse_runners": ".lighthouse_runner",
+})
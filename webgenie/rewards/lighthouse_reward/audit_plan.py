@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List
+
+
+LIGHTHOUSE_CATEGORIES = ['performance', 'accessibility', 'best-practices', 'seo']
+
+
+class AuditPlan(BaseModel):
+    """
+    What lighthouse has to audit for a set of category weights.
+    Categories with zero weight are not audited, so the slow performance trace is skipped unless it counts.
+    """
+    categories: List[str] = Field(default_factory=list, description="The lighthouse categories to audit")
+    form_factor: str = Field(default="mobile", description="The device lighthouse emulates")
+    throttling_method: str = Field(default="simulate", description="The lighthouse throttling method")
+
+    def cli_flags(self) -> List[str]:
+        return [
+            f"--only-categories={','.join(self.categories)}",
+            f"--form-factor={self.form_factor}",
+            f"--throttling-method={self.throttling_method}",
+        ]
+
+    def runner_flags(self) -> dict:
+        return {
+            "onlyCategories": self.categories,
+            "formFactor": self.form_factor,
+            "throttlingMethod": self.throttling_method,
+        }
+
+    def missing_categories(self, audited_categories: List[str]) -> List[str]:
+        return [category for category in self.categories if category not in audited_categories]
+
+
+def plan_audits(weights: Dict[str, float]) -> AuditPlan:
+    unknown_categories = [category for category in weights if category not in LIGHTHOUSE_CATEGORIES]
+    if unknown_categories:
+        raise ValueError(f"Unknown lighthouse categories: {unknown_categories}")
+
+    categories = [category for category in LIGHTHOUSE_CATEGORIES if weights.get(category, 0) > 0]
+    if not categories:
+        raise ValueError("At least one lighthouse category must have a positive weight")
+
+    # Throttling only changes the performance metrics, don't pay for simulating it when they don't count
+    throttling_method = "simulate" if "performance" in categories else "provided"
+    return AuditPlan(categories=categories, throttling_method=throttling_method)
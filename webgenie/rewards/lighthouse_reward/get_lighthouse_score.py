@@ -1,60 +1,98 @@
 import bittensor as bt
+import asyncio
+import functools
 import json
+import requests
 import subprocess
-import threading
-import time
-import uuid
-import os
 
-from http.server import SimpleHTTPRequestHandler, HTTPServer
-from typing import List, Dict
+from typing import List, Dict, Union
 
 from webgenie.constants import (
     LIGHTHOUSE_SERVER_PORT, 
-    LIGHTHOUSE_SERVER_WORK_DIR,
+    LIGHTHOUSE_AUDIT_TIMEOUT,
 )
+from webgenie.rewards.lighthouse_reward.audit_plan import AuditPlan, LIGHTHOUSE_CATEGORIES
+from webgenie.rewards.lighthouse_reward.lighthouse_runner import lighthouse_runner_pool
+
+
+def register_html(html: str) -> str:
+    """
+    Registers the html on the lighthouse server and returns the url it is served at.
+    """
+    response = requests.post(
+        f"http://localhost:{LIGHTHOUSE_SERVER_PORT}/register",
+        data=html.encode(),
+        timeout=10,
+    )
+    response.raise_for_status()
+    return f"http://localhost:{LIGHTHOUSE_SERVER_PORT}/{response.json()['hash']}"
+
+
+@functools.lru_cache(maxsize=1)
+def get_lighthouse_version() -> str:
+    try:
+        result = subprocess.run(['lighthouse', '--version'], capture_output=True, text=True, timeout=30)
+        if result.returncode == 0:
+            return result.stdout.strip()
+    except Exception as e:
+        bt.logging.warning(f"Error getting lighthouse version: {e}")
+    return None
+
+
+def get_lighthouse_score(htmls: List[str], plan: AuditPlan = None) -> List[Dict[str, float]]:
+    """
+    Returns the scores of the audited categories for every html, None for the htmls lighthouse failed on.
+    Only the categories that lighthouse actually audited are in the returned dicts.
+    """
+    if plan is None:
+        plan = AuditPlan(categories=LIGHTHOUSE_CATEGORIES)
 
-def get_lighthouse_score(htmls: List[str]) -> List[Dict[str, float]]:
     def get_lighthouse_score_from_subprocess(url):
         bt.logging.info(f"Getting lighthouse score from {url}...")
         try:
             result = subprocess.run(
-                ['lighthouse', url, '--output=json', '--quiet', '--chrome-flags="--headless --no-sandbox"'],
-                capture_output=True, text=True, timeout=180
+                ['lighthouse', url, '--output=json', '--quiet', '--chrome-flags="--headless --no-sandbox"', *plan.cli_flags()],
+                capture_output=True, text=True, timeout=LIGHTHOUSE_AUDIT_TIMEOUT
             )
             if result.returncode == 0:
                 lighthouse_report = json.loads(result.stdout)
-                scores = {
-                    'performance': lighthouse_report['categories']['performance']['score'],
-                    'accessibility': lighthouse_report['categories']['accessibility']['score'],
-                    'best-practices': lighthouse_report['categories']['best-practices']['score'],
-                    'seo': lighthouse_report['categories']['seo']['score']
+                return {
+                    category: lighthouse_report['categories'][category]['score'] or 0
+                    for category in plan.categories
+                    if category in lighthouse_report['categories']
                 }
-                return scores
             else:
                 bt.logging.error(f"Error running Lighthouse: {result.stderr}")
         except Exception as e:
             bt.logging.error(f"Error running Lighthouse: {e}")
-            return {
-                'performance': 0,
-                'accessibility': 0,
-                'best-practices': 0,
-                'seo': 0
-            }
+        return None
 
     bt.logging.info(f"Getting lighthouse scores from localhost:{LIGHTHOUSE_SERVER_PORT}...")
-    scores = []
-    
-    for i in range(len(htmls)):
-        
-        file_name = f"{uuid.uuid4()}.html"
+    return [get_lighthouse_score_from_subprocess(register_html(html)) for html in htmls]
 
-        with open(f"{LIGHTHOUSE_SERVER_WORK_DIR}/{file_name}", "w") as f:
-            f.write(htmls[i])
 
-        url = f"http://localhost:{LIGHTHOUSE_SERVER_PORT}/{file_name}"
-        scores.append(get_lighthouse_score_from_subprocess(url))
-        
-        os.remove(f"{LIGHTHOUSE_SERVER_WORK_DIR}/{file_name}")
+async def get_lighthouse_score_from_runner(
+    htmls: List[str], plan: AuditPlan = None
+) -> List[Union[Dict[str, float], Exception, None]]:
+    if plan is None:
+        plan = AuditPlan(categories=LIGHTHOUSE_CATEGORIES)
 
-    return scores
\ No newline at end of file
+    bt.logging.info(f"Getting lighthouse scores of {len(htmls)} htmls from lighthouse runners...")
+    urls = await asyncio.gather(*[asyncio.to_thread(register_html, html) for html in htmls])
+    results = await lighthouse_runner_pool.audit(list(urls), flags=plan.runner_flags())
+
+    scores = []
+    for result in results:
+        if isinstance(result, Exception):
+            # The runner batch of the html failed, the html was not audited
+            scores.append(result)
+        elif "error" in result:
+            bt.logging.error(f"Error running Lighthouse on {result['url']}: {result['error']}")
+            scores.append(None)
+        else:
+            scores.append({
+                category: result['scores'][category]
+                for category in plan.categories
+                if category in result['scores']
+            })
+    return scores
@@ -2,59 +2,213 @@
 # (https://arxiv.org/pdf/2402.08699#page=11&zoom=100,384,458) is our inspiration for this reward.
 
 import bittensor as bt
-import os
-import multiprocessing
+import asyncio
 import numpy as np
-from typing import List
+import shutil
+from typing import Dict, List
 
+from webgenie.constants import (
+    WORK_DIR,
+    LIGHTHOUSE_REWARD_JOB_TIMEOUT,
+    LIGHTHOUSE_AUDIT_MODE,
+    LIGHTHOUSE_SCORE_CACHE_PATH,
+    LIGHTHOUSE_SCORE_CACHE_SIZE,
+)
+from webgenie.helpers.cache import PersistentCache, make_cache_key
+from webgenie.helpers.htmls import normalized_html_hash
+from webgenie.rewards.resource_budget import resource_slot, BROWSER_RESOURCE, CPU_RESOURCE
 from webgenie.rewards.reward import Reward
+from webgenie.rewards.scoring_executor import scoring_executor
+from webgenie.rewards.scoring_job import ScoringJob, ContentStore
 from webgenie.tasks import Task, Solution
 
-from .get_lighthouse_score import get_lighthouse_score
+from .audit_plan import AuditPlan, plan_audits
+from .get_lighthouse_score import get_lighthouse_score, get_lighthouse_score_from_runner, get_lighthouse_version
+from .native_audits import get_native_audit_score, NATIVE_AUDITS_VERSION
+
+
+LIGHTHOUSE_AUDIT_MODES = ["native", "lighthouse", "cross_check"]
+
+LIGHTHOUSE_CATEGORY_WEIGHTS = {
+    'performance': 0,
+    'accessibility': 0.25,
+    'best-practices': 0.25,
+    'seo': 0.5,
+}
+
+# Only the categories with a positive weight are audited
+LIGHTHOUSE_AUDIT_PLAN = plan_audits(LIGHTHOUSE_CATEGORY_WEIGHTS)
+
+# Category scores keyed by (normalized html hash, audit engine version, audit plan)
+lighthouse_score_cache = PersistentCache(LIGHTHOUSE_SCORE_CACHE_PATH, LIGHTHOUSE_SCORE_CACHE_SIZE)
+
+
+def weighted_lighthouse_score(score_dict: Dict[str, float], plan: AuditPlan = LIGHTHOUSE_AUDIT_PLAN) -> float:
+    # A weighted category that was not audited would silently count as 0
+    missing_categories = plan.missing_categories(list(score_dict.keys()))
+    if missing_categories:
+        raise ValueError(f"Lighthouse did not audit the weighted categories: {missing_categories}")
+    return sum(
+        score_dict[category] * LIGHTHOUSE_CATEGORY_WEIGHTS[category]
+        for category in plan.categories
+    )
+
+
+def lighthouse_score_job(job: ScoringJob) -> Dict[str, float]:
+    html = ContentStore(job.store_root).get(job.solution_ref)
+    return get_lighthouse_score([html], LIGHTHOUSE_AUDIT_PLAN)[0]
+
+
+def native_audit_job(job: ScoringJob) -> Dict[str, float]:
+    html = ContentStore(job.store_root).get(job.solution_ref)
+    return get_native_audit_score(html, LIGHTHOUSE_AUDIT_PLAN)
+
+
+async def run_lighthouse_job(job: ScoringJob) -> Dict[str, float]:
+    async with resource_slot(BROWSER_RESOURCE):
+        return await scoring_executor.run(lighthouse_score_job, job, timeout=LIGHTHOUSE_REWARD_JOB_TIMEOUT)
+
+
+async def run_native_audit_job(job: ScoringJob) -> Dict[str, float]:
+    async with resource_slot(CPU_RESOURCE):
+        return await scoring_executor.run(native_audit_job, job, timeout=LIGHTHOUSE_REWARD_JOB_TIMEOUT)
 
 
 class LighthouseReward(Reward):
-    def __init__(self):
-        pass
+    def __init__(self, audit_mode: str = LIGHTHOUSE_AUDIT_MODE):
+        if audit_mode not in LIGHTHOUSE_AUDIT_MODES:
+            raise ValueError(f"Invalid lighthouse audit mode: {audit_mode}")
+        self.audit_mode = audit_mode
 
-    def sync_reward_worker(self, htmls: List[str]) -> List[float]:
+    async def cached_score_dicts(self, engine: str, store: ContentStore, jobs: List[ScoringJob], audit) -> list:
+        """
+        Returns the cached score dicts of the jobs and only audits the jobs that are not cached.
+        Failed audits are not cached.
+        """
+        if engine is None:
+            return await audit(jobs)
+
+        keys = [
+            make_cache_key(
+                normalized_html_hash(store.get(job.solution_ref)),
+                engine,
+                LIGHTHOUSE_AUDIT_PLAN.model_dump(),
+            )
+            for job in jobs
+        ]
+        score_dicts = [lighthouse_score_cache.get(key) for key in keys]
+        missing_indices = [i for i, score_dict in enumerate(score_dicts) if score_dict is None]
+        if missing_indices:
+            results = await audit([jobs[i] for i in missing_indices])
+            for i, result in zip(missing_indices, results):
+                score_dicts[i] = result
+                if isinstance(result, dict):
+                    lighthouse_score_cache.set(keys[i], result)
+        bt.logging.info(
+            f"Audited {len(missing_indices)} of {len(jobs)} htmls with {engine}, "
+            f"lighthouse score cache: {lighthouse_score_cache.stats()}"
+        )
+        return score_dicts
+
+    async def lighthouse_score_dicts(self, store: ContentStore, jobs: List[ScoringJob]) -> list:
+        version = await asyncio.to_thread(get_lighthouse_version)
+        engine = f"lighthouse-{version}" if version else None
+        return await self.cached_score_dicts(
+            engine, store, jobs, lambda jobs: self.audit_with_lighthouse(store, jobs)
+        )
+
+    async def native_score_dicts(self, store: ContentStore, jobs: List[ScoringJob]) -> list:
+        return await self.cached_score_dicts(
+            f"native-{NATIVE_AUDITS_VERSION}", store, jobs, self.audit_natively
+        )
+
+    async def audit_with_lighthouse(self, store: ContentStore, jobs: List[ScoringJob]) -> list:
         try:
-            scores_dict = get_lighthouse_score(htmls)
-            scores = []
-            weights = [0, 0.25, 0.25, 0.5]
-            for score_dict in scores_dict:
-                score = (
-                    score_dict['performance'] * weights[0] + 
-                    score_dict['accessibility'] * weights[1] + 
-                    score_dict['best-practices'] * weights[2] + 
-                    score_dict['seo'] * weights[3]
-                )
-                scores.append(score)
-            return scores
+            score_dicts = await get_lighthouse_score_from_runner(
+                [store.get(job.solution_ref) for job in jobs],
+                LIGHTHOUSE_AUDIT_PLAN,
+            )
         except Exception as e:
-            bt.logging.error(f"Error getting lighthouse score: {e}")
-            return [0] * len(htmls)
+            bt.logging.warning(f"Lighthouse runners are not available, falling back to the lighthouse cli: {e}")
+            score_dicts = [e] * len(jobs)
+
+        # Only the htmls whose runner batch failed are audited again with the cli
+        failed_indices = [i for i, score_dict in enumerate(score_dicts) if isinstance(score_dict, Exception)]
+        if failed_indices:
+            bt.logging.warning(f"Auditing {len(failed_indices)} of {len(jobs)} htmls with the lighthouse cli")
+            results = await asyncio.gather(
+                *[run_lighthouse_job(jobs[i]) for i in failed_indices],
+                return_exceptions=True,
+            )
+            for i, result in zip(failed_indices, results):
+                score_dicts[i] = result
+        return score_dicts
+
+    async def audit_natively(self, jobs: List[ScoringJob]) -> list:
+        return await asyncio.gather(
+            *[run_native_audit_job(job) for job in jobs],
+            return_exceptions=True,
+        )
+
+    def log_cross_check(self, native_score_dicts: list, lighthouse_score_dicts: list):
+        differences = {category: [] for category in LIGHTHOUSE_AUDIT_PLAN.categories}
+        for native_scores, lighthouse_scores in zip(native_score_dicts, lighthouse_score_dicts):
+            if not isinstance(native_scores, dict) or not isinstance(lighthouse_scores, dict):
+                continue
+            for category in differences:
+                if category in native_scores and category in lighthouse_scores:
+                    differences[category].append(abs(native_scores[category] - lighthouse_scores[category]))
+        for category, category_differences in differences.items():
+            if category_differences:
+                bt.logging.info(
+                    f"Native audits vs lighthouse on {category}: "
+                    f"mean difference {np.mean(category_differences):.3f}, max difference {np.max(category_differences):.3f}"
+                )
 
     async def reward(self, task: Task, solutions: List[Solution]) -> np.ndarray:
-        bt.logging.info(f"Rewarding lighthouse task")
-        htmls = [solution.html for solution in solutions]
-        
-        # Use ProcessPoolExecutor for parallel processing
-        with multiprocessing.Pool(processes=os.cpu_count()) as pool:
-            # Convert solutions into chunks for parallel processing
-            chunk_size = max(1, len(htmls) // os.cpu_count()) 
-
-            html_chunks = [htmls[i:i + chunk_size] for i in range(0, len(htmls), chunk_size)]
-            
-            # Create partial tasks for each chunk
-            futures = []
-            for chunk in html_chunks:
-                future = pool.apply_async(self.sync_reward_worker, args=(chunk,))
-                futures.append(future)
-            
-            # Gather all results
-            scores = []
-            for future in futures:
-                scores.extend(future.get())
-        return np.array(scores)
-    
\ No newline at end of file
+        bt.logging.info(
+            f"Rewarding lighthouse task, auditing {LIGHTHOUSE_AUDIT_PLAN.categories} in {self.audit_mode} mode"
+        )
+        current_work_dir = f"{WORK_DIR}/lighthouse_{task.task_id}"
+        store = ContentStore(current_work_dir)
+        try:
+            jobs = [
+                ScoringJob(
+                    task_id=task.task_id,
+                    store_root=current_work_dir,
+                    solution_ref=store.put(solution.html),
+                    miner_uid=solution.miner_uid,
+                )
+                for solution in solutions
+            ]
+            # Identical htmls are only audited once
+            jobs_by_ref = {}
+            for job in jobs:
+                jobs_by_ref.setdefault(job.solution_ref, job)
+            unique_jobs = list(jobs_by_ref.values())
+
+            if self.audit_mode == "lighthouse":
+                score_dicts = await self.lighthouse_score_dicts(store, unique_jobs)
+            elif self.audit_mode == "native":
+                score_dicts = await self.native_score_dicts(store, unique_jobs)
+            else:
+                score_dicts, lighthouse_score_dicts = await asyncio.gather(
+                    self.native_score_dicts(store, unique_jobs),
+                    self.lighthouse_score_dicts(store, unique_jobs),
+                )
+                self.log_cross_check(score_dicts, lighthouse_score_dicts)
+        finally:
+            shutil.rmtree(current_work_dir, ignore_errors=True)
+
+        score_by_ref = {}
+        for ref, score_dict in zip(jobs_by_ref, score_dicts):
+            try:
+                if isinstance(score_dict, Exception):
+                    raise score_dict
+                if score_dict is None:
+                    raise RuntimeError("Lighthouse audit failed")
+                score_by_ref[ref] = weighted_lighthouse_score(score_dict)
+            except Exception as e:
+                bt.logging.error(f"Error in lighthouse score job: {e!r}")
+                score_by_ref[ref] = 0
+        return np.array([score_by_ref[job.solution_ref] for job in jobs])
@@ -0,0 +1,130 @@
+// Long-running Lighthouse worker.
+//
+// Keeps one headless Chrome warm and audits the urls it receives on stdin.
+// Every request and response is a single line of JSON:
+//   request:  {"id": "...", "urls": ["http://..."], "flags": {...}, "timeout": 180}
+//   response: {"id": "...", "results": [{"url": "...", "scores": {"seo": 1, ...}, "categories": ["seo", ...]}]}
+// A result has an "error" field instead of "scores" when its audit failed.
+// The runner audits one url at a time, the python side starts several runners for parallel audits.
+
+import { execSync } from 'node:child_process';
+import fs from 'node:fs';
+import path from 'node:path';
+import readline from 'node:readline';
+import { pathToFileURL } from 'node:url';
+
+const CHROME_FLAGS = ['--headless', '--no-sandbox', '--disable-gpu'];
+
+function resolveEntry(pkg) {
+  let entry = pkg.exports;
+  if (entry && typeof entry === 'object' && '.' in entry) {
+    entry = entry['.'];
+  }
+  while (entry && typeof entry === 'object') {
+    entry = entry.import || entry.default || entry.node;
+  }
+  return entry || pkg.main || 'index.js';
+}
+
+async function importModule(name) {
+  try {
+    return await import(name);
+  } catch (e) {
+    // Fall back to the global npm modules, `npm install -g lighthouse` is what we ask validators to run
+  }
+  const globalRoot = process.env.NODE_GLOBAL_ROOT || execSync('npm root -g').toString().trim();
+  const candidates = [
+    path.join(globalRoot, name),
+    path.join(globalRoot, 'lighthouse', 'node_modules', name),
+  ];
+  for (const dir of candidates) {
+    const pkgPath = path.join(dir, 'package.json');
+    if (!fs.existsSync(pkgPath)) {
+      continue;
+    }
+    const pkg = JSON.parse(fs.readFileSync(pkgPath, 'utf8'));
+    return await import(pathToFileURL(path.join(dir, resolveEntry(pkg))).href);
+  }
+  throw new Error(`Cannot find module ${name}`);
+}
+
+const lighthouse = (await importModule('lighthouse')).default;
+const chromeLauncher = await importModule('chrome-launcher');
+
+let chrome = null;
+
+async function getChrome() {
+  if (!chrome) {
+    chrome = await chromeLauncher.launch({ chromeFlags: CHROME_FLAGS });
+  }
+  return chrome;
+}
+
+async function killChrome() {
+  if (chrome) {
+    const oldChrome = chrome;
+    chrome = null;
+    try {
+      await oldChrome.kill();
+    } catch (e) {
+      // chrome is already gone
+    }
+  }
+}
+
+function withTimeout(promise, seconds) {
+  let timer;
+  const timeout = new Promise((_, reject) => {
+    timer = setTimeout(() => reject(new Error(`Lighthouse timed out after ${seconds}s`)), seconds * 1000);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+async function audit(url, flags, config, timeout) {
+  try {
+    const { port } = await getChrome();
+    const result = await withTimeout(
+      lighthouse(url, { output: 'json', logLevel: 'error', ...flags, port }, config),
+      timeout,
+    );
+    const scores = {};
+    for (const [id, category] of Object.entries(result.lhr.categories)) {
+      scores[id] = category.score ?? 0;
+    }
+    return { url, scores, categories: Object.keys(scores) };
+  } catch (e) {
+    // A failed or hanging audit can leave chrome in a bad state, start a fresh one for the next url
+    await killChrome();
+    return { url, error: String(e && e.message ? e.message : e) };
+  }
+}
+
+let queue = Promise.resolve();
+
+function handle(line) {
+  let request;
+  try {
+    request = JSON.parse(line);
+  } catch (e) {
+    process.stderr.write(`Invalid request: ${line}\n`);
+    return;
+  }
+  queue = queue.then(async () => {
+    const results = [];
+    for (const url of request.urls || []) {
+      results.push(await audit(url, request.flags || {}, request.config, request.timeout || 180));
+    }
+    process.stdout.write(JSON.stringify({ id: request.id, results }) + '\n');
+  });
+}
+
+const input = readline.createInterface({ input: process.stdin });
+input.on('line', handle);
+input.on('close', async () => {
+  await queue;
+  await killChrome();
+  process.exit(0);
+});
+
+await getChrome();
+process.stdout.write(JSON.stringify({ ready: true }) + '\n');
@@ -0,0 +1,190 @@
+import bittensor as bt
+import asyncio
+import json
+import os
+import subprocess
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import List, Dict, Union
+
+from webgenie.constants import (
+    LIGHTHOUSE_RUNNER_CONCURRENCY,
+    LIGHTHOUSE_AUDIT_TIMEOUT,
+)
+
+
+RUNNER_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lighthouse_runner.mjs")
+RUNNER_START_TIMEOUT = 60 # seconds
+
+
+class LighthouseRunner:
+    """
+    A long-running node process that keeps a chrome instance warm and audits urls one after another.
+    Requests and responses are json lines over the process stdin and stdout, see lighthouse_runner.mjs.
+    """
+    def __init__(self):
+        self.process = None
+        self.lock = threading.Lock()
+        self.pending: Dict[str, Future] = {}
+        self.ready = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def pending_count(self) -> int:
+        with self.lock:
+            return len(self.pending)
+
+    def start(self):
+        self.ready.clear()
+        self.process = subprocess.Popen(
+            ["node", RUNNER_SCRIPT_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        threading.Thread(target=self._read_responses, args=(self.process,), daemon=True).start()
+        if not self.ready.wait(RUNNER_START_TIMEOUT) or not self.is_running:
+            self.stop()
+            raise RuntimeError("Lighthouse runner failed to start")
+
+    def _read_responses(self, process: subprocess.Popen):
+        for line in process.stdout:
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                bt.logging.warning(f"Invalid lighthouse runner response: {line}")
+                continue
+            if response.get("ready"):
+                self.ready.set()
+                continue
+            with self.lock:
+                future = self.pending.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response["results"])
+
+        # The process exited, fail everything that is still waiting for it
+        self.ready.set()
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Lighthouse runner exited"))
+
+    def submit(self, urls: List[str], flags: dict = None, config: dict = None, timeout: float = LIGHTHOUSE_AUDIT_TIMEOUT) -> Future:
+        request_id = str(uuid.uuid4())
+        future = Future()
+        request = {
+            "id": request_id,
+            "urls": urls,
+            "flags": flags or {},
+            "config": config,
+            "timeout": timeout,
+        }
+        with self.lock:
+            if not self.is_running:
+                raise RuntimeError("Lighthouse runner is not running")
+            self.pending[request_id] = future
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        return future
+
+    def stop(self):
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(10)
+        except Exception:
+            process.kill()
+
+
+class LighthouseRunnerPool:
+    """
+    Runs `concurrency` lighthouse runners, so that this many audits run in parallel.
+    """
+    def __init__(self, concurrency: int = LIGHTHOUSE_RUNNER_CONCURRENCY):
+        self.concurrency = concurrency
+        self.runners: List[LighthouseRunner] = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            self.runners = [runner for runner in self.runners if runner.is_running]
+            while len(self.runners) < self.concurrency:
+                runner = LighthouseRunner()
+                runner.start()
+                self.runners.append(runner)
+        bt.logging.info(f"Started {self.concurrency} lighthouse runners")
+
+    def stop(self):
+        with self.lock:
+            runners, self.runners = self.runners, []
+        for runner in runners:
+            runner.stop()
+
+    async def audit(
+        self,
+        urls: List[str],
+        flags: dict = None,
+        config: dict = None,
+        timeout: float = LIGHTHOUSE_AUDIT_TIMEOUT,
+    ) -> List[Union[dict, Exception]]:
+        """
+        Audit the urls and return one result per url:
+        {"url": url, "scores": {category: score}, "categories": [category]} or {"url": url, "error": message}.
+        The urls of a batch that failed or timed out get the exception of their batch instead,
+        so that the caller can audit them another way.
+        """
+        if not urls:
+            return []
+        if len([runner for runner in self.runners if runner.is_running]) < self.concurrency:
+            await asyncio.to_thread(self.start)
+
+        with self.lock:
+            runners = sorted(self.runners, key=lambda runner: runner.pending_count)
+        # Send a batch to every runner, so that the urls are audited in parallel
+        batch_size = (len(urls) + len(runners) - 1) // len(runners)
+        batches = [urls[i:i + batch_size] for i in range(0, len(urls), batch_size)]
+
+        async def audit_batch(runner: LighthouseRunner, batch: List[str]) -> List[dict]:
+            future = asyncio.wrap_future(runner.submit(batch, flags, config, timeout))
+            try:
+                # Every url in a batch can take up to `timeout` seconds
+                return await asyncio.wait_for(future, timeout=timeout * len(batch) + RUNNER_START_TIMEOUT)
+            except asyncio.TimeoutError:
+                # The runner would keep auditing the abandoned batch, restart it instead
+                bt.logging.warning(f"Lighthouse runner timed out on {len(batch)} urls, restarting it")
+                await asyncio.to_thread(runner.stop)
+                raise
+
+        batch_results = await asyncio.gather(
+            *[audit_batch(runner, batch) for runner, batch in zip(runners, batches)],
+            return_exceptions=True,
+        )
+        results = []
+        for batch, batch_result in zip(batches, batch_results):
+            if isinstance(batch_result, Exception):
+                results.extend(batch_result for _ in batch)
+            else:
+                results.extend(batch_result)
+        return results
+
+
+lighthouse_runner_pool = LighthouseRunnerPool()
+
+
+def start_lighthouse_runners():
+    try:
+        lighthouse_runner_pool.start()
+    except Exception as e:
+        bt.logging.error(f"Error starting lighthouse runners, falling back to the lighthouse cli: {e}")
+
+
+def stop_lighthouse_runners():
+    lighthouse_runner_pool.stop()
@@ -1,34 +1,75 @@
 import bittensor as bt
-import os
+import hashlib
 import sys
 import threading
+import time
 import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse
 
 from webgenie.constants import (
-    WORK_DIR,
-    LIGHTHOUSE_SERVER_WORK_DIR,
     LIGHTHOUSE_SERVER_PORT,
+    LIGHTHOUSE_SERVER_HTML_TTL,
 )
 
 
+# Same headers for every page, so that lighthouse audits don't depend on when a page was registered
+HTML_RESPONSE_HEADERS = {
+    "Cache-Control": "no-store",
+}
+# Only local processes can register htmls
+LOCAL_CLIENT_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+class HtmlStore:
+    """
+    An in-memory map from html hash to html. Htmls are evicted `ttl` seconds after they were last registered.
+    """
+    def __init__(self, ttl: float = LIGHTHOUSE_SERVER_HTML_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.htmls = {}
+
+    def evict_expired(self):
+        now = time.monotonic()
+        with self.lock:
+            for html_hash in [html_hash for html_hash, (_, expires_at) in self.htmls.items() if expires_at <= now]:
+                del self.htmls[html_hash]
+
+    def put(self, html: str) -> str:
+        self.evict_expired()
+        html_hash = hashlib.sha256(html.encode()).hexdigest()
+        with self.lock:
+            self.htmls[html_hash] = (html, time.monotonic() + self.ttl)
+        return html_hash
+
+    def get(self, html_hash: str) -> str:
+        with self.lock:
+            html, expires_at = self.htmls.get(html_hash, (None, 0))
+        if html is None or expires_at <= time.monotonic():
+            return None
+        return html
+
+
 app = FastAPI()
-static_folder = f"/{LIGHTHOUSE_SERVER_WORK_DIR}"
+html_store = HtmlStore()
 lighthouse_server_thread = None
 
-def make_work_dir():
-    if not os.path.exists(WORK_DIR):
-        os.makedirs(WORK_DIR)
-        bt.logging.info(f"Created work directory at {WORK_DIR}")
 
-    if not os.path.exists(LIGHTHOUSE_SERVER_WORK_DIR):
-        os.makedirs(LIGHTHOUSE_SERVER_WORK_DIR)
-        bt.logging.info(f"Created lighthouse server work directory at {LIGHTHOUSE_SERVER_WORK_DIR}")
+@app.post("/register")
+async def register_html(request: Request):
+    if request.client is None or request.client.host not in LOCAL_CLIENT_HOSTS:
+        raise HTTPException(status_code=403, detail="Htmls can only be registered locally")
+    html = (await request.body()).decode()
+    return {"hash": html_store.put(html)}
+
 
-make_work_dir()
-app.mount("/", StaticFiles(directory=f"{LIGHTHOUSE_SERVER_WORK_DIR}"), name="static")
+@app.get("/{html_hash}")
+async def get_html(html_hash: str):
+    html = html_store.get(html_hash)
+    if html is None:
+        raise HTTPException(status_code=404, detail="Html not found")
+    return HTMLResponse(content=html, headers=HTML_RESPONSE_HEADERS)
 
 
 def stop_lighthouse_server():
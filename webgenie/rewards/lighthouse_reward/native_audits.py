@@ -0,0 +1,442 @@
+# A python implementation of the lighthouse SEO, accessibility and best-practices audits
+# that can be decided from the html alone, so that scoring doesn't need node and chrome.
+# Audits and weights follow lighthouse 12, the category score is the weighted mean of the
+# applicable audits, like lighthouse does.
+
+import re
+from bs4 import BeautifulSoup
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from webgenie.rewards.lighthouse_reward.audit_plan import AuditPlan, LIGHTHOUSE_CATEGORIES
+
+
+# Bump when the audits change, so that cached scores of the old audits are not used
+NATIVE_AUDITS_VERSION = "2"
+
+# An audit returns 1 or 0, or None when it doesn't apply to the page
+Audit = Callable[["AuditContext"], Optional[float]]
+
+GENERIC_LINK_TEXTS = {
+    "click here", "click this", "go", "here", "information", "learn more", "more",
+    "more info", "more information", "right here", "read more", "see more", "start", "this",
+}
+LANGUAGE_CODE_PATTERN = re.compile(r"^[a-zA-Z]{2,3}(-[a-zA-Z0-9]{1,8})*$")
+HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+NOT_LABELLED_INPUT_TYPES = {"hidden", "submit", "button", "image", "reset"}
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "0.0.0.0"}
+
+
+class AuditContext:
+    """
+    The parsed page shared by all the audits.
+    """
+    def __init__(self, html: str):
+        self.html = html
+        self.soup = BeautifulSoup(html, 'html.parser')
+        self.elements_by_id = {}
+        for element in self.soup.find_all(id=True):
+            self.elements_by_id.setdefault(element["id"], []).append(element)
+
+    def meta(self, name: str) -> List:
+        return [
+            meta for meta in self.soup.find_all("meta")
+            if meta.get("name", "").strip().lower() == name
+        ]
+
+    def accessible_name(self, element) -> str:
+        labelledby = element.get("aria-labelledby", "")
+        names = [
+            " ".join(referenced.get_text(" ", strip=True) for referenced in self.elements_by_id.get(id, []))
+            for id in labelledby.split()
+        ]
+        names += [element.get("aria-label", ""), element.get_text(" ", strip=True)]
+        names += [image.get("alt", "") for image in element.find_all("img")]
+        names += [element.get("title", "")]
+        return next((name.strip() for name in names if name and name.strip()), "")
+
+
+def ratio_audit(elements: List, passes: Callable) -> Optional[float]:
+    if not elements:
+        return None
+    return 1 if all(passes(element) for element in elements) else 0
+
+
+# SEO audits
+
+def is_crawlable(context: AuditContext) -> float:
+    robots = context.meta("robots") + context.meta("googlebot")
+    blocked = any(
+        directive.strip() in ("noindex", "none")
+        for meta in robots
+        for directive in meta.get("content", "").lower().split(",")
+    )
+    return 0 if blocked else 1
+
+
+def document_title(context: AuditContext) -> float:
+    title = context.soup.find("title")
+    return 1 if title and title.get_text(strip=True) else 0
+
+
+def meta_description(context: AuditContext) -> float:
+    return 1 if any(meta.get("content", "").strip() for meta in context.meta("description")) else 0
+
+
+def link_text(context: AuditContext) -> float:
+    def is_descriptive(link) -> bool:
+        href = link.get("href", "")
+        if href.startswith("#") or href.lower().startswith("javascript:") or "nofollow" in link.get("rel", []):
+            return True
+        return link.get_text(" ", strip=True).lower() not in GENERIC_LINK_TEXTS
+
+    return 1 if all(is_descriptive(link) for link in context.soup.find_all("a", href=True)) else 0
+
+
+def crawlable_anchors(context: AuditContext) -> float:
+    def is_crawlable_anchor(anchor) -> bool:
+        href = anchor.get("href")
+        if href is None:
+            # Anchors used as buttons need an href to be crawled, named anchors are fine
+            return not anchor.get("onclick")
+        href = href.strip()
+        return not href.lower().startswith("javascript:") and not (href == "" and anchor.get("onclick"))
+
+    return 1 if all(is_crawlable_anchor(anchor) for anchor in context.soup.find_all("a")) else 0
+
+
+def image_alt(context: AuditContext) -> Optional[float]:
+    images = [
+        image for image in context.soup.find_all("img")
+        if image.get("role") not in ("presentation", "none") and image.get("aria-hidden") != "true"
+    ]
+    return ratio_audit(images, lambda image: image.has_attr("alt") or context.accessible_name(image))
+
+
+def hreflang(context: AuditContext) -> float:
+    def is_valid(link) -> bool:
+        language = link.get("hreflang", "").strip()
+        href = link.get("href", "").strip()
+        valid_language = language.lower() == "x-default" or LANGUAGE_CODE_PATTERN.match(language)
+        return bool(valid_language) and bool(urlparse(href).scheme)
+
+    links = context.soup.find_all("link", hreflang=True)
+    return 1 if all(is_valid(link) for link in links) else 0
+
+
+def canonical(context: AuditContext) -> Optional[float]:
+    links = [link for link in context.soup.find_all("link") if "canonical" in link.get("rel", [])]
+    if not links:
+        return None
+    hrefs = {link.get("href", "").strip() for link in links}
+    if len(hrefs) > 1:
+        return 0
+    return 1 if urlparse(hrefs.pop()).scheme in ("http", "https") else 0
+
+
+# Accessibility audits
+
+def html_has_lang(context: AuditContext) -> float:
+    html = context.soup.find("html")
+    return 1 if html and html.get("lang", "").strip() else 0
+
+
+def html_lang_valid(context: AuditContext) -> Optional[float]:
+    html = context.soup.find("html")
+    if not html or not html.get("lang", "").strip():
+        return None
+    return 1 if LANGUAGE_CODE_PATTERN.match(html["lang"].strip()) else 0
+
+
+def valid_lang(context: AuditContext) -> Optional[float]:
+    elements = [element for element in context.soup.find_all(lang=True) if element.name != "html"]
+    return ratio_audit(elements, lambda element: LANGUAGE_CODE_PATTERN.match(element["lang"].strip()))
+
+
+def input_image_alt(context: AuditContext) -> Optional[float]:
+    inputs = context.soup.find_all("input", type=lambda type: type and type.lower() == "image")
+    return ratio_audit(inputs, lambda input: input.get("alt", "").strip() or context.accessible_name(input))
+
+
+def button_name(context: AuditContext) -> Optional[float]:
+    buttons = context.soup.find_all("button") + context.soup.find_all(attrs={"role": "button"})
+    buttons += context.soup.find_all("input", type=lambda type: type and type.lower() in ("button", "submit", "reset"))
+
+    def has_name(button) -> bool:
+        if button.name == "input":
+            return bool(button.get("value", "").strip()) or button["type"].lower() != "button" or bool(context.accessible_name(button))
+        return bool(context.accessible_name(button))
+
+    return ratio_audit(buttons, has_name)
+
+
+def link_name(context: AuditContext) -> Optional[float]:
+    links = [link for link in context.soup.find_all("a", href=True) if link.get("aria-hidden") != "true"]
+    return ratio_audit(links, lambda link: context.accessible_name(link))
+
+
+def label(context: AuditContext) -> Optional[float]:
+    labelled_ids = {label["for"] for label in context.soup.find_all("label", attrs={"for": True})}
+    fields = [
+        field for field in context.soup.find_all(["input", "select", "textarea"])
+        if field.name != "input" or field.get("type", "text").lower() not in NOT_LABELLED_INPUT_TYPES
+    ]
+
+    def is_labelled(field) -> bool:
+        return bool(
+            field.get("id") in labelled_ids
+            or field.find_parent("label")
+            or field.get("aria-label", "").strip()
+            or field.get("aria-labelledby", "").strip()
+            or field.get("title", "").strip()
+            or field.get("placeholder", "").strip()
+        )
+
+    return ratio_audit(fields, is_labelled)
+
+
+def select_name(context: AuditContext) -> Optional[float]:
+    labelled_ids = {label["for"] for label in context.soup.find_all("label", attrs={"for": True})}
+    selects = context.soup.find_all("select")
+    return ratio_audit(
+        selects,
+        lambda select: select.get("id") in labelled_ids or select.find_parent("label")
+        or select.get("aria-label", "").strip() or select.get("aria-labelledby", "").strip()
+        or select.get("title", "").strip(),
+    )
+
+
+def frame_title(context: AuditContext) -> Optional[float]:
+    frames = context.soup.find_all(["iframe", "frame"])
+    return ratio_audit(frames, lambda frame: frame.get("title", "").strip() or frame.get("aria-label", "").strip())
+
+
+def object_alt(context: AuditContext) -> Optional[float]:
+    objects = context.soup.find_all("object")
+    return ratio_audit(objects, lambda object: context.accessible_name(object))
+
+
+def meta_viewport(context: AuditContext) -> Optional[float]:
+    viewports = context.meta("viewport")
+    if not viewports:
+        return None
+    content = viewports[0].get("content", "").lower().replace(" ", "")
+    properties = dict(
+        property.split("=", 1) for property in content.replace(";", ",").split(",") if "=" in property
+    )
+    if properties.get("user-scalable") in ("no", "0"):
+        return 0
+    try:
+        return 0 if float(properties.get("maximum-scale", 5)) < 5 else 1
+    except ValueError:
+        return 1
+
+
+def meta_refresh(context: AuditContext) -> Optional[float]:
+    refreshes = [
+        meta for meta in context.soup.find_all("meta")
+        if meta.get("http-equiv", "").strip().lower() == "refresh"
+    ]
+
+    def is_immediate(meta) -> bool:
+        delay = meta.get("content", "").split(";")[0].split(",")[0].strip()
+        return delay in ("", "0")
+
+    return ratio_audit(refreshes, is_immediate)
+
+
+def heading_order(context: AuditContext) -> Optional[float]:
+    levels = [int(heading.name[1]) for heading in context.soup.find_all(HEADING_TAGS)]
+    if not levels:
+        return None
+    return 1 if all(level - previous <= 1 for previous, level in zip(levels, levels[1:])) else 0
+
+
+def list_audit(context: AuditContext) -> Optional[float]:
+    lists = context.soup.find_all(["ul", "ol"])
+    return ratio_audit(
+        lists,
+        lambda list: all(
+            child.name in ("li", "script", "template")
+            for child in list.find_all(recursive=False)
+        ),
+    )
+
+
+def listitem(context: AuditContext) -> Optional[float]:
+    items = context.soup.find_all("li")
+    return ratio_audit(
+        items,
+        lambda item: item.parent is not None and (
+            item.parent.name in ("ul", "ol", "menu") or item.parent.get("role") == "list"
+        ),
+    )
+
+
+def definition_list(context: AuditContext) -> Optional[float]:
+    lists = context.soup.find_all("dl")
+    return ratio_audit(
+        lists,
+        lambda list: all(
+            child.name in ("dt", "dd", "div", "script", "template")
+            for child in list.find_all(recursive=False)
+        ),
+    )
+
+
+def dlitem(context: AuditContext) -> Optional[float]:
+    items = context.soup.find_all(["dt", "dd"])
+    return ratio_audit(
+        items,
+        lambda item: item.find_parent("dl") is not None,
+    )
+
+
+def duplicate_id_aria(context: AuditContext) -> Optional[float]:
+    referenced_ids = set()
+    for element in context.soup.find_all(attrs={"aria-labelledby": True}) + context.soup.find_all(attrs={"aria-describedby": True}):
+        referenced_ids.update(element.get("aria-labelledby", "").split())
+        referenced_ids.update(element.get("aria-describedby", "").split())
+    referenced_ids &= set(context.elements_by_id)
+    if not referenced_ids:
+        return None
+    return 1 if all(len(context.elements_by_id[id]) == 1 for id in referenced_ids) else 0
+
+
+def aria_hidden_body(context: AuditContext) -> float:
+    body = context.soup.find("body")
+    return 0 if body and body.get("aria-hidden") == "true" else 1
+
+
+def tabindex(context: AuditContext) -> Optional[float]:
+    def is_not_positive(element) -> bool:
+        try:
+            return int(element["tabindex"]) <= 0
+        except ValueError:
+            return True
+
+    return ratio_audit(context.soup.find_all(tabindex=True), is_not_positive)
+
+
+def landmark_one_main(context: AuditContext) -> float:
+    return 1 if context.soup.find("main") or context.soup.find(attrs={"role": "main"}) else 0
+
+
+# Best-practices audits
+
+def doctype(context: AuditContext) -> float:
+    return 1 if re.match(r"\s*<!doctype\s+html\s*>", context.html, re.IGNORECASE) else 0
+
+
+def is_on_https(context: AuditContext) -> float:
+    # The page itself is served from localhost, which lighthouse treats as secure,
+    # but insecure subresources still fail the audit
+    urls = [element.get("src", "") for element in context.soup.find_all(["img", "script", "iframe", "video", "audio", "source"])]
+    urls += [link.get("href", "") for link in context.soup.find_all("link") if "stylesheet" in link.get("rel", [])]
+    for url in urls:
+        parsed_url = urlparse(url.strip())
+        if parsed_url.scheme == "http" and parsed_url.hostname not in LOCAL_HOSTS:
+            return 0
+    return 1
+
+
+def paste_preventing_inputs(context: AuditContext) -> Optional[float]:
+    inputs = context.soup.find_all(["input", "textarea"])
+    return ratio_audit(inputs, lambda input: "return false" not in input.get("onpaste", "").replace(";", "").strip().lower())
+
+
+def needs_runtime(context: AuditContext) -> None:
+    # Audits that need a live page (console errors, deprecations, color contrast, ...)
+    # can't be decided statically, leave them out of the weighted mean instead of passing them
+    return None
+
+
+def not_applicable(context: AuditContext) -> None:
+    return None
+
+
+NATIVE_AUDITS: Dict[str, List[tuple]] = {
+    'seo': [
+        ('is-crawlable', is_crawlable, 4.043),
+        ('document-title', document_title, 1),
+        ('meta-description', meta_description, 1),
+        ('http-status-code', needs_runtime, 1),
+        ('link-text', link_text, 1),
+        ('crawlable-anchors', crawlable_anchors, 1),
+        ('robots-txt', not_applicable, 1),
+        ('image-alt', image_alt, 1),
+        ('hreflang', hreflang, 1),
+        ('canonical', canonical, 1),
+    ],
+    'accessibility': [
+        ('aria-hidden-body', aria_hidden_body, 10),
+        ('button-name', button_name, 10),
+        ('duplicate-id-aria', duplicate_id_aria, 10),
+        ('image-alt', image_alt, 10),
+        ('input-image-alt', input_image_alt, 10),
+        ('meta-refresh', meta_refresh, 10),
+        ('meta-viewport', meta_viewport, 10),
+        ('color-contrast', needs_runtime, 7),
+        ('definition-list', definition_list, 7),
+        ('dlitem', dlitem, 7),
+        ('document-title', document_title, 7),
+        ('frame-title', frame_title, 7),
+        ('html-has-lang', html_has_lang, 7),
+        ('html-lang-valid', html_lang_valid, 7),
+        ('label', label, 7),
+        ('link-name', link_name, 7),
+        ('list', list_audit, 7),
+        ('listitem', listitem, 7),
+        ('object-alt', object_alt, 7),
+        ('select-name', select_name, 7),
+        ('tabindex', tabindex, 7),
+        ('valid-lang', valid_lang, 7),
+        ('heading-order', heading_order, 3),
+        ('landmark-one-main', landmark_one_main, 3),
+    ],
+    'best-practices': [
+        ('is-on-https', is_on_https, 5),
+        ('deprecations', needs_runtime, 5),
+        ('third-party-cookies', needs_runtime, 5),
+        ('paste-preventing-inputs', paste_preventing_inputs, 3),
+        ('geolocation-on-start', needs_runtime, 1),
+        ('notification-on-start', needs_runtime, 1),
+        ('image-aspect-ratio', needs_runtime, 1),
+        ('image-size-responsive', needs_runtime, 1),
+        ('doctype', doctype, 1),
+        ('charset', needs_runtime, 1),
+        ('errors-in-console', needs_runtime, 1),
+        ('inspector-issues', needs_runtime, 1),
+    ],
+}
+
+
+def run_native_audits(html: str, categories: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Returns the result of every audit of the categories, None for the audits that don't apply.
+    """
+    unsupported_categories = [category for category in categories if category not in NATIVE_AUDITS]
+    if unsupported_categories:
+        raise ValueError(f"Native audits don't support the categories: {unsupported_categories}")
+
+    context = AuditContext(html)
+    return {
+        category: {id: audit(context) for id, audit, _ in NATIVE_AUDITS[category]}
+        for category in categories
+    }
+
+
+def get_native_audit_score(html: str, plan: AuditPlan = None) -> Dict[str, float]:
+    if plan is None:
+        plan = AuditPlan(categories=[category for category in LIGHTHOUSE_CATEGORIES if category in NATIVE_AUDITS])
+
+    audit_results = run_native_audits(html, plan.categories)
+    scores = {}
+    for category, results in audit_results.items():
+        weights = {id: weight for id, _, weight in NATIVE_AUDITS[category]}
+        applicable = [(results[id], weights[id]) for id in results if results[id] is not None]
+        total_weight = sum(weight for _, weight in applicable)
+        score = sum(result * weight for result, weight in applicable) / total_weight if total_weight else 0
+        # Lighthouse reports category scores with two decimals
+        scores[category] = round(score, 2)
+    return scores
@@ -3,12 +3,29 @@
 
 import bittensor as bt
 import asyncio
+import hashlib
+import json
 import numpy as np
+import random
 from pydantic import BaseModel, Field
 from typing import List
 
+from webgenie.constants import (
+    LLM_MODEL_ID,
+    QUALITY_HTML_TOKEN_BUDGET,
+    QUALITY_BATCH_SCORING,
+    QUALITY_BATCH_MAX_SIZE,
+    QUALITY_BATCH_MAX_TOKENS,
+    QUALITY_BATCH_CALIBRATION_RATE,
+    QUALITY_SCORE_CACHE_PATH,
+    QUALITY_SCORE_CACHE_SIZE,
+    QUALITY_SCORE_CACHE_TTL,
+)
+from webgenie.helpers.cache import PersistentCache, make_cache_key
+from webgenie.helpers.html_compaction import CompactedHtml, compact_html, count_tokens, log_token_savings
+from webgenie.helpers.htmls import normalized_html_hash
 from webgenie.helpers.llms import openai_call
-from webgenie.prompts import PROMPT_QUALITY
+from webgenie.prompts import PROMPT_QUALITY, PROMPT_QUALITY_BATCH
 from webgenie.rewards.reward import Reward
 from webgenie.tasks import Task, Solution
 
@@ -17,20 +34,159 @@ class ScoreResponse(BaseModel):
     score: float = Field(description="The score of the html code")
 
 
+class HtmlScore(BaseModel):
+    id: int = Field(description="The id of the html code")
+    score: float = Field(description="The score of the html code")
+
+
+class BatchScoreResponse(BaseModel):
+    scores: List[HtmlScore] = Field(description="The score of every html code")
+
+
+# The quality prompt is deterministic, so the score only depends on the prompt, the model, the token budget and the html
+PROMPT_QUALITY_HASH = hashlib.sha256(PROMPT_QUALITY.encode()).hexdigest()
+quality_score_cache = PersistentCache(QUALITY_SCORE_CACHE_PATH, QUALITY_SCORE_CACHE_SIZE, ttl=QUALITY_SCORE_CACHE_TTL)
+
+
+def make_batches(compacted_htmls: List[CompactedHtml], max_size: int, max_tokens: int) -> List[List[int]]:
+    """
+    Splits the htmls into batches of indices, so that the prompt of a batch fits in `max_tokens`.
+    """
+    prompt_tokens = count_tokens(PROMPT_QUALITY_BATCH)
+    batches = []
+    batch, batch_tokens = [], prompt_tokens
+    for i, compacted in enumerate(compacted_htmls):
+        # The html is json encoded in the prompt, with its id around it
+        html_tokens = count_tokens(json.dumps(compacted.html, ensure_ascii=False)) + 10
+        if batch and (len(batch) >= max_size or batch_tokens + html_tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], prompt_tokens
+        batch.append(i)
+        batch_tokens += html_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 class QualityReward(Reward):
+    def __init__(
+        self,
+        html_token_budget: int = QUALITY_HTML_TOKEN_BUDGET,
+        batch_scoring: bool = QUALITY_BATCH_SCORING,
+        batch_max_size: int = QUALITY_BATCH_MAX_SIZE,
+        batch_max_tokens: int = QUALITY_BATCH_MAX_TOKENS,
+        calibration_rate: float = QUALITY_BATCH_CALIBRATION_RATE,
+    ):
+        self.html_token_budget = html_token_budget
+        self.batch_scoring = batch_scoring
+        self.batch_max_size = batch_max_size
+        self.batch_max_tokens = batch_max_tokens
+        self.calibration_rate = calibration_rate
+
+    def _cache_key(self, html_hash: str) -> str:
+        # The html is only truncated, scores of minified htmls aren't reused
+        return make_cache_key(PROMPT_QUALITY_HASH, LLM_MODEL_ID, self.html_token_budget, "truncated", html_hash)
 
-    async def _get_score(self, solution: Solution) -> float:
+    async def _get_score(self, html: str) -> float:
         response = await openai_call(
             messages = [
-                {"role": "system", "content": PROMPT_QUALITY.format(html=solution.html)},
+                {"role": "system", "content": PROMPT_QUALITY.format(html=html)},
             ],
             response_format = ScoreResponse,
             deterministic=True,
         )
         return response.score / 100
 
+    async def _get_batch_scores(self, htmls: List[str]) -> List[float]:
+        """
+        Scores the htmls in one request, falls back to scoring them one by one if the request fails.
+        """
+        if len(htmls) == 1:
+            return [await self._get_score(htmls[0])]
+        try:
+            response = await openai_call(
+                messages = [
+                    # Json encoding keeps an html from closing its own entry and writing into the others
+                    {"role": "system", "content": PROMPT_QUALITY_BATCH.format(htmls=json.dumps(
+                        [{"id": i, "html": html} for i, html in enumerate(htmls)], ensure_ascii=False, indent=1,
+                    ))},
+                ],
+                response_format = BatchScoreResponse,
+                deterministic=True,
+            )
+            score_by_id = {html_score.id: html_score.score / 100 for html_score in response.scores}
+            if sorted(score_by_id) != list(range(len(htmls))):
+                raise ValueError(f"Expected scores for ids 0 to {len(htmls) - 1}, got {sorted(score_by_id)}")
+            return [score_by_id[i] for i in range(len(htmls))]
+        except Exception as e:
+            bt.logging.warning(f"Error in batch quality scoring, scoring {len(htmls)} htmls one by one: {e}")
+            return await asyncio.gather(*[self._get_score(html) for html in htmls])
+
+    async def _get_scores(self, compacted_htmls: List[CompactedHtml]) -> List[float]:
+        if not self.batch_scoring:
+            return await asyncio.gather(*[self._get_score(compacted.html) for compacted in compacted_htmls])
+
+        batches = make_batches(compacted_htmls, self.batch_max_size, self.batch_max_tokens)
+        bt.logging.info(f"Scoring {len(compacted_htmls)} htmls in {len(batches)} quality batches")
+        batch_scores = await asyncio.gather(*[
+            self._get_batch_scores([compacted_htmls[i].html for i in batch]) for batch in batches
+        ])
+        scores = [0] * len(compacted_htmls)
+        for batch, batch_score in zip(batches, batch_scores):
+            for i, score in zip(batch, batch_score):
+                scores[i] = score
+
+        await self._check_calibration(compacted_htmls, scores)
+        return scores
+
+    async def _check_calibration(self, compacted_htmls: List[CompactedHtml], scores: List[float]):
+        """
+        Scores a sample of the htmls one by one and logs how far the batch scores are from them.
+        """
+        sample_size = int(np.ceil(len(compacted_htmls) * self.calibration_rate))
+        if sample_size == 0:
+            return
+        sample = random.sample(range(len(compacted_htmls)), sample_size)
+        try:
+            single_scores = await asyncio.gather(*[self._get_score(compacted_htmls[i].html) for i in sample])
+        except Exception as e:
+            bt.logging.warning(f"Error in quality calibration check: {e}")
+            return
+        differences = [abs(scores[i] - single_score) for i, single_score in zip(sample, single_scores)]
+        bt.logging.info(
+            f"Batch vs single quality scores on {sample_size} htmls: "
+            f"mean difference {np.mean(differences):.3f}, max difference {np.max(differences):.3f}"
+        )
+
     async def reward(self, task: Task, solutions: List[Solution]) -> np.ndarray:
         bt.logging.info(f"Rewarding task in quality reward")
-        get_score_tasks = [self._get_score(solution) for solution in solutions]
-        scores = await asyncio.gather(*get_score_tasks)
-        return np.array(scores)
+        # Identical htmls are only scored once
+        html_hashes = [normalized_html_hash(solution.html) for solution in solutions]
+        htmls_by_hash = {}
+        for html_hash, solution in zip(html_hashes, solutions):
+            htmls_by_hash.setdefault(html_hash, solution.html)
+
+        # Batch scores depend on the other htmls of the batch, so only one by one scores are cached
+        use_cache = not self.batch_scoring
+        score_by_hash = {
+            html_hash: quality_score_cache.get(self._cache_key(html_hash)) if use_cache else None
+            for html_hash in htmls_by_hash
+        }
+        missing_hashes = [html_hash for html_hash, score in score_by_hash.items() if score is None]
+        if use_cache:
+            bt.logging.info(f"Quality score cache: {quality_score_cache.stats()}")
+
+        # Quality is judged on the formatting and the comments of the html, so it is only truncated
+        compacted_htmls = await asyncio.to_thread(
+            lambda: [
+                compact_html(htmls_by_hash[html_hash], self.html_token_budget, minify=False, collapse_repeats=False)
+                for html_hash in missing_hashes
+            ]
+        )
+        log_token_savings("Quality reward", compacted_htmls)
+        scores = await self._get_scores(compacted_htmls)
+        for html_hash, score in zip(missing_hashes, scores):
+            score_by_hash[html_hash] = score
+            if use_cache:
+                quality_score_cache.set(self._cache_key(html_hash), score)
+        return np.array([score_by_hash[html_hash] for html_hash in html_hashes])
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import weakref
+
+from webgenie.constants import (
+    SCORING_CPU_SLOTS,
+    SCORING_BROWSER_SLOTS,
+)
+
+
+CPU_RESOURCE = "cpu"
+BROWSER_RESOURCE = "browser"
+
+RESOURCE_BUDGETS = {
+    CPU_RESOURCE: SCORING_CPU_SLOTS,
+    BROWSER_RESOURCE: SCORING_BROWSER_SLOTS,
+}
+
+# asyncio semaphores are bound to an event loop, so every loop gets its own set of slots
+_semaphores = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+
+def resource_slot(resource: str) -> asyncio.Semaphore:
+    """
+    Get the semaphore that limits how many jobs use `resource` at the same time.
+
+    Example:
+        async with resource_slot(CPU_RESOURCE):
+            await scoring_executor.run(...)
+    """
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphores = _semaphores.setdefault(loop, {})
+        if resource not in semaphores:
+            semaphores[resource] = asyncio.Semaphore(RESOURCE_BUDGETS[resource])
+        return semaphores[resource]
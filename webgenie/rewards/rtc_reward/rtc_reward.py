@@ -2,13 +2,15 @@
 # (https://arxiv.org/pdf/2402.08699#page=11&zoom=100,384,458) is our inspiration for this reward.
 
 import bittensor as bt
-import bert_score
+import asyncio
 import os
 import numpy as np
 from pydantic import BaseModel, Field
 from typing import List
 
 
+from webgenie.constants import RTC_HTML_TOKEN_BUDGET, RTC_PROMPT_CONCURRENCY
+from webgenie.helpers.html_compaction import compact_html
 from webgenie.helpers.llms import openai_call
 from webgenie.prompts import PROMPT_RTC
 from webgenie.rewards.reward import Reward
@@ -21,22 +23,43 @@ class PromptResponse(BaseModel):
 
 
 class RtcReward(Reward):
+    def __init__(self, html_token_budget: int = RTC_HTML_TOKEN_BUDGET, prompt_concurrency: int = RTC_PROMPT_CONCURRENCY):
+        self.html_token_budget = html_token_budget
+        self.prompt_concurrency = prompt_concurrency
 
     async def _get_prompt(self, task: Task, solution: Solution) -> str:
+        html = compact_html(solution.html, self.html_token_budget).html
         response = await openai_call(
             messages = [
-                {"role": "system", "content": PROMPT_RTC.format(html=solution.html, prompt=task.prompt)},
+                {"role": "system", "content": PROMPT_RTC.format(html=html, prompt=task.prompt)},
             ],
             response_format = PromptResponse,
         )
 
-        return response["prompt"]
+        return response.prompt
 
     async def reward(self, task: Task, solutions: List[Solution]) -> np.ndarray:
         bt.logging.info(f"Rewarding task in rtc reward")
-        original_prompts = [task.prompt for _ in solutions]
-        miner_prompts = [await self._get_prompt(task, solution) for solution in solutions]
-        
+        semaphore = asyncio.Semaphore(self.prompt_concurrency)
+
+        async def get_prompt(solution: Solution) -> str:
+            async with semaphore:
+                return await self._get_prompt(task, solution)
+
+        results = await asyncio.gather(
+            *[get_prompt(solution) for solution in solutions],
+            return_exceptions=True,
+        )
+        miner_prompts = []
+        for solution, result in zip(solutions, results):
+            if isinstance(result, Exception):
+                bt.logging.error(f"Error getting the prompt of miner {solution.miner_uid}'s html: {result}")
+                result = None
+            miner_prompts.append(result)
+
         #P, R, F1 = bert_score.score(original_prompts, miner_prompts, lang='en')
-        scores = s_bert.score(original_prompts, miner_prompts)
+        # The original prompt is embedded once and compared to all the miner prompts at once
+        recovered_prompts = [prompt for prompt in miner_prompts if prompt is not None]
+        similarities = iter(await asyncio.to_thread(s_bert.score_against, task.prompt, recovered_prompts))
+        scores = [next(similarities) if prompt is not None else 0 for prompt in miner_prompts]
         return np.array(scores)
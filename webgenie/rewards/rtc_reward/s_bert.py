@@ -1,15 +1,57 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+import threading
+from collections import OrderedDict
+from typing import List
+
+from webgenie.rewards.text_models import encode_sentences
+
+# Normalized embeddings of recently encoded sentences, encode is called from several threads
+EMBEDDING_CACHE_SIZE = 4096
+embedding_cache = OrderedDict()
+embedding_cache_lock = threading.Lock()
+
+
+def encode(sentences: List[str]) -> np.ndarray:
+    """
+    Returns the normalized embeddings of the sentences, only the sentences that are not cached are encoded,
+    in one batch.
+    """
+    found = {}
+    with embedding_cache_lock:
+        for sentence in sentences:
+            if sentence in embedding_cache:
+                embedding_cache.move_to_end(sentence)
+                found[sentence] = embedding_cache[sentence]
+    missing_sentences = list(dict.fromkeys(sentence for sentence in sentences if sentence not in found))
+    if missing_sentences:
+        # The model runs outside the lock, the result is built from the local embeddings
+        embeddings = encode_sentences(missing_sentences)
+        with embedding_cache_lock:
+            for sentence, embedding in zip(missing_sentences, embeddings):
+                found[sentence] = embedding
+                embedding_cache[sentence] = embedding
+            while len(embedding_cache) > EMBEDDING_CACHE_SIZE:
+                embedding_cache.popitem(last=False)
+    return np.array([found[sentence] for sentence in sentences])
+
+
+def score_against(reference: str, sentences: List[str]) -> List[float]:
+    """
+    Returns the cosine similarity of every sentence to the reference sentence.
+    """
+    if not sentences:
+        return []
+    reference_embedding = encode([reference])[0]
+    return (encode(sentences) @ reference_embedding).tolist()
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
 
 def score(sentences1, sentences2):
-    embeddings1 = model.encode(sentences1)
-    embeddings2 = model.encode(sentences2)
-    similarities = cosine_similarity(embeddings1, embeddings2)
-    # Scale similarities to be between 0 and 1
-    scores = [(float(similarity[0]) + 1) / 2 for similarity in similarities]
-    return [similarity[0] for similarity in similarities]
+    """
+    Returns the cosine similarity of every pair of sentences.
+    """
+    embeddings1 = encode(sentences1)
+    embeddings2 = encode(sentences2)
+    return np.sum(embeddings1 * embeddings2, axis=1).tolist()
 
 if __name__ == "__main__":
     # Define a list of sentence pairs
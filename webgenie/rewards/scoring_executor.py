@@ -0,0 +1,237 @@
+import bittensor as bt
+import asyncio
+import collections
+import multiprocessing
+import resource
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from webgenie.constants import (
+    SCORING_WORKER_COUNT,
+    SCORING_WORKER_MAX_TASKS,
+    SCORING_WORKER_MAX_MEMORY_MB,
+)
+
+
+# Event loop of the current scoring worker process. The browser lives on this loop,
+# so every async job of the worker has to run on it.
+worker_loop = None
+
+
+def init_scoring_worker():
+    """
+    Initialize a scoring worker process: preload the browser, fonts and CLIP model
+    so that jobs don't pay the startup cost.
+    """
+    global worker_loop
+    worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(worker_loop)
+    try:
+        from webgenie.rewards.visual_reward.common.browser import ensure_browser, warm_up_browser
+        from webgenie.rewards.visual_reward.high_level_matching_score.clip_matching_score import load_clip_model
+
+        worker_loop.run_until_complete(ensure_browser())
+        worker_loop.run_until_complete(warm_up_browser())
+        load_clip_model()
+    except Exception as e:
+        bt.logging.error(f"Error initializing scoring worker: {e}")
+
+
+def run_in_worker_loop(coroutine):
+    if worker_loop is None:
+        init_scoring_worker()
+    return worker_loop.run_until_complete(coroutine)
+
+
+def get_worker_memory_mb() -> float:
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_scoring_job(fn, args):
+    result = fn(*args)
+    return result, get_worker_memory_mb()
+
+
+def terminate_pool(pool: ProcessPoolExecutor):
+    """
+    Shut the pool down and kill its workers, a job that runs on a worker can't be cancelled otherwise.
+    """
+    terminate_workers = getattr(pool, "terminate_workers", None)
+    if terminate_workers is not None:
+        terminate_workers()
+        return
+    # Before python 3.14 the workers are only reachable through the pool internals,
+    # which shutdown() clears
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+class ScoringExecutor:
+    """
+    A long-lived pool of warm scoring workers.
+
+    At most `max_workers` jobs are submitted at the same time, so a job starts as soon as it is
+    submitted and its timeout doesn't include time spent in the pool queue.
+
+    Workers are recycled after `max_tasks_per_worker` jobs by the process pool itself.
+    When a worker reports more than `max_worker_memory_mb` of memory or a job times out,
+    new jobs go to a new pool and the old pool is shut down once its other jobs are finished.
+    The workers of timed out jobs are killed with it.
+    """
+    def __init__(
+        self,
+        max_workers: int = SCORING_WORKER_COUNT,
+        max_tasks_per_worker: int = SCORING_WORKER_MAX_TASKS,
+        max_worker_memory_mb: int = SCORING_WORKER_MAX_MEMORY_MB,
+    ):
+        self.max_workers = max_workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_worker_memory_mb = max_worker_memory_mb
+
+        self.lock = threading.Lock()
+        self.pool = None
+        # Jobs that haven't finished and jobs that timed out, per pool that is not shut down
+        self.running_jobs = {}
+        self.hung_jobs = {}
+        self.free_slots = max_workers
+        self.waiters = collections.deque()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        bt.logging.info(f"Starting scoring executor with {self.max_workers} workers")
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_scoring_worker,
+            max_tasks_per_child=self.max_tasks_per_worker,
+        )
+
+    def _current_pool(self) -> ProcessPoolExecutor:
+        # Must be called with the lock held
+        if self.pool is None:
+            self.pool = self._create_pool()
+            self.running_jobs[self.pool] = 0
+            self.hung_jobs[self.pool] = 0
+        return self.pool
+
+    def start(self):
+        with self.lock:
+            self._current_pool()
+
+    def stop(self):
+        with self.lock:
+            pools = list(self.running_jobs)
+            self.pool = None
+            self.running_jobs.clear()
+            self.hung_jobs.clear()
+        for pool in pools:
+            terminate_pool(pool)
+        if pools:
+            bt.logging.info("Scoring executor stopped")
+
+    async def _acquire_slot(self):
+        with self.lock:
+            if self.free_slots > 0 and not self.waiters:
+                self.free_slots -= 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed to us right before the cancellation
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        with self.lock:
+            while self.waiters:
+                loop, future = self.waiters.popleft()
+                if future.cancelled():
+                    continue
+                # Hand the slot over to the waiter, free_slots doesn't change
+                loop.call_soon_threadsafe(self._wake, future)
+                return
+            self.free_slots += 1
+
+    def _wake(self, future: asyncio.Future):
+        if future.done():
+            # The waiter was cancelled in the meantime, pass the slot on
+            self._release_slot()
+        else:
+            future.set_result(None)
+
+    def _retire_pool(self, pool: ProcessPoolExecutor, hung: bool = False):
+        """
+        Send new jobs to a new pool and shut `pool` down once the jobs that didn't time out are finished.
+        """
+        with self.lock:
+            if pool not in self.running_jobs:
+                return
+            if hung:
+                self.hung_jobs[pool] += 1
+            if self.pool is pool:
+                self.pool = None
+                bt.logging.info("Recycling scoring workers")
+            is_idle = self.running_jobs[pool] <= self.hung_jobs[pool]
+            if is_idle:
+                del self.running_jobs[pool]
+                del self.hung_jobs[pool]
+        if is_idle:
+            terminate_pool(pool)
+
+    def _on_job_done(self, pool: ProcessPoolExecutor, _future):
+        with self.lock:
+            if pool not in self.running_jobs:
+                return
+            self.running_jobs[pool] -= 1
+            is_retired = self.pool is not pool
+        if is_retired:
+            self._retire_pool(pool)
+
+    async def run(self, fn, *args, timeout: float = None):
+        """
+        Run `fn(*args)` on a scoring worker.
+        `fn` and `args` must be picklable. The job is cancelled if it doesn't finish in `timeout` seconds
+        or if the awaiting task is cancelled, the worker of a job that was already running is killed.
+        """
+        await self._acquire_slot()
+        try:
+            with self.lock:
+                pool = self._current_pool()
+                future = pool.submit(run_scoring_job, fn, args)
+                self.running_jobs[pool] += 1
+            future.add_done_callback(lambda f: self._on_job_done(pool, f))
+
+            try:
+                result, memory_mb = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+            except BrokenProcessPool:
+                self._retire_pool(pool)
+                raise
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # A queued job is cancelled, a running one keeps its worker until the pool is killed
+                if not future.cancel() and future.running():
+                    self._retire_pool(pool, hung=True)
+                raise
+        finally:
+            self._release_slot()
+
+        if memory_mb > self.max_worker_memory_mb:
+            self._retire_pool(pool)
+        return result
+
+
+scoring_executor = ScoringExecutor()
+
+
+def start_scoring_executor():
+    scoring_executor.start()
+
+
+def stop_scoring_executor():
+    scoring_executor.stop()
@@ -0,0 +1,51 @@
+import hashlib
+import os
+import uuid
+from pydantic import BaseModel, Field
+
+from webgenie.constants import HTML_EXTENSION
+
+
+class ScoringJob(BaseModel):
+    """
+    The payload sent to a scoring worker.
+    Htmls are not sent over IPC, only their references in the content store.
+    """
+    task_id: str = Field(default="", description="The id of the task")
+    store_root: str = Field(default="", description="The root directory of the content store")
+    ground_truth_ref: str = Field(default="", description="The content hash of the ground truth html")
+    solution_ref: str = Field(default="", description="The content hash of the solution html")
+    miner_uid: int = Field(default=0, description="The uid of the miner that processed the solution")
+
+    def ground_truth_path(self) -> str:
+        return ContentStore(self.store_root).path(self.ground_truth_ref)
+
+    def solution_path(self) -> str:
+        return ContentStore(self.store_root).path(self.solution_ref)
+
+
+class ContentStore:
+    """
+    A content-addressed store of htmls on disk.
+    The same html is only written once and is shared by all the jobs that reference it.
+    """
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, ref: str, extension: str = HTML_EXTENSION) -> str:
+        return f"{self.root}/{ref}{extension}"
+
+    def put(self, content: str, extension: str = HTML_EXTENSION) -> str:
+        ref = hashlib.sha256(content.encode()).hexdigest()
+        path = self.path(ref, extension)
+        if not os.path.exists(path):
+            os.makedirs(self.root, exist_ok=True)
+            temp_path = f"{path}.{uuid.uuid4()}.tmp"
+            with open(temp_path, "w") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        return ref
+
+    def get(self, ref: str, extension: str = HTML_EXTENSION) -> str:
+        with open(self.path(ref, extension), "r") as f:
+            return f.read()
@@ -0,0 +1,76 @@
+import bittensor as bt
+import threading
+from typing import List
+
+from webgenie.constants import (
+    TEXT_MODELS_ENABLED,
+    TEXT_MODEL_QUANTIZE,
+    TEXT_EMBEDDING_BATCH_SIZE,
+)
+
+# One instance of every text model per process, loaded on first use
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+sentence_models = {}
+bert_scorers = {}
+text_models_lock = threading.Lock()
+
+
+def check_text_models_enabled():
+    if not TEXT_MODELS_ENABLED:
+        raise RuntimeError("Text models are disabled in this process, set TEXT_MODELS_ENABLED=True to score text")
+
+
+def get_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def quantize(model, device: str):
+    """
+    Quantizes the linear layers of the model to int8, only on cpu where it speeds up inference.
+    """
+    if not TEXT_MODEL_QUANTIZE or device != "cpu":
+        return model
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def get_sentence_model(name: str = SENTENCE_MODEL_NAME):
+    check_text_models_enabled()
+    with text_models_lock:
+        if name not in sentence_models:
+            from sentence_transformers import SentenceTransformer
+
+            device = get_device()
+            model = SentenceTransformer(name, device=device)
+            sentence_models[name] = quantize(model, device)
+            bt.logging.info(f"Loaded sentence model {name} on {device}{' (int8)' if sentence_models[name] is not model else ''}.")
+        return sentence_models[name]
+
+
+def get_bert_scorer(lang: str = "en"):
+    check_text_models_enabled()
+    with text_models_lock:
+        if lang not in bert_scorers:
+            from bert_score import BERTScorer
+
+            device = get_device()
+            scorer = BERTScorer(lang=lang, device=device)
+            scorer._model = quantize(scorer._model, device)
+            bert_scorers[lang] = scorer
+            bt.logging.info(f"Loaded bert scorer for {lang} on {device}.")
+        return bert_scorers[lang]
+
+
+def encode_sentences(sentences: List[str], name: str = SENTENCE_MODEL_NAME, batch_size: int = TEXT_EMBEDDING_BATCH_SIZE):
+    """
+    Returns the normalized embeddings of the sentences, encoded in batches of `batch_size`.
+    """
+    model = get_sentence_model(name)
+    return model.encode(sentences, batch_size=batch_size, normalize_embeddings=True)
+
+
+def bert_f1_scores(references: List[str], candidates: List[str], lang: str = "en", batch_size: int = TEXT_EMBEDDING_BATCH_SIZE) -> List[float]:
+    scorer = get_bert_scorer(lang)
+    _, _, f1 = scorer.score(candidates, references, batch_size=batch_size)
+    return f1.tolist()
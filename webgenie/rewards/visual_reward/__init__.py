@@ -1 +1,7 @@
-from .visual_reward import VisualReward
\ No newline at end of file
+from webgenie.helpers.lazy import lazy_exports
+
+__all__ = ["VisualReward"]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "VisualReward": ".visual_reward",
+})
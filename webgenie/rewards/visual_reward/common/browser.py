@@ -24,3 +24,30 @@ async def stop_browser():
     web_player["web_driver"] = None
     web_player["browser"] = None
     bt.logging.info(f"Stopped browser.")
+
+
+async def ensure_browser():
+    global web_player
+    if web_player["browser"] is not None and web_player["browser"].is_connected():
+        return
+    if web_player["web_driver"] is not None:
+        try:
+            await web_player["web_driver"].stop()
+        except Exception as e:
+            bt.logging.error(f"Error stopping web driver: {e}")
+    await start_browser()
+
+
+async def warm_up_browser():
+    # Render a page once so that chromium loads its fonts before the first real job.
+    page = await web_player["browser"].new_page()
+    await page.set_content(
+        "<html><body>"
+        "<p style='font-family: serif'>Warm up</p>"
+        "<p style='font-family: sans-serif'>Warm up</p>"
+        "<p style='font-family: monospace'>Warm up</p>"
+        "</body></html>"
+    )
+    await page.screenshot(full_page=True)
+    await page.close()
+    bt.logging.info(f"Warmed up browser.")
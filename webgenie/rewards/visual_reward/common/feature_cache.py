@@ -0,0 +1,23 @@
+from collections import OrderedDict
+
+
+class FeatureCache:
+    """
+    A small LRU cache for features of original htmls, so that workers scoring
+    several solutions of the same task only extract them once.
+    """
+    def __init__(self, maxsize: int = 4):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+
+    def get(self, key):
+        if key not in self.items:
+            return None
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def set(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
@@ -1,3 +1,4 @@
+import os
 import uuid
 
 from bs4 import BeautifulSoup
@@ -31,6 +32,8 @@ def erase_texts(input_file_path, output_file_path):
 
 
 async def inpaint_image(url, output_file_path, load_time = DEFAULT_LOAD_TIME):
+    if os.path.exists(output_file_path):
+        return
     erased_html_path = f'{url.replace(HTML_EXTENSION, "_erased.html")}'
     erase_texts(url, erased_html_path)
     await take_screenshot(erased_html_path, output_file_path, load_time)
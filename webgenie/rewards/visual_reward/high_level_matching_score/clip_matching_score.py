@@ -4,9 +4,30 @@ import torch
 from PIL import Image
 
 from webgenie.constants import HTML_EXTENSION, IMAGE_EXTENSION
+from webgenie.rewards.visual_reward.common.feature_cache import FeatureCache
 from webgenie.rewards.visual_reward.common.inpaint_image import inpaint_image
 
 
+clip_model = {
+    "model": None,
+    "preprocess": None,
+    "device": None,
+}
+original_embedding_cache = FeatureCache()
+
+
+def load_clip_model():
+    global clip_model
+    if clip_model["model"] is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model, preprocess = clip.load("ViT-B/32", device=device)
+        clip_model["model"] = model
+        clip_model["preprocess"] = preprocess
+        clip_model["device"] = device
+        bt.logging.info(f"Loaded clip model on {device}.")
+    return clip_model["model"], clip_model["preprocess"], clip_model["device"]
+
+
 def rescale(image_path):
     # Load the image
     with Image.open(image_path) as img:
@@ -57,11 +78,13 @@ def calculate_embedding_vector(image_path, model, preprocess, device):
 async def calculate_clip_score(predict_html_path_list, original_html_path):
     bt.logging.info(f"Calculating clip score.")
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model, preprocess = clip.load("ViT-B/32", device=device)
-    original_img_path = original_html_path.replace(HTML_EXTENSION, f"_inpainted{IMAGE_EXTENSION}")
-    await inpaint_image(original_html_path, original_img_path)
-    original_embedding_vector = calculate_embedding_vector(original_img_path, model, preprocess, device)
+    model, preprocess, device = load_clip_model()
+    original_embedding_vector = original_embedding_cache.get(original_html_path)
+    if original_embedding_vector is None:
+        original_img_path = original_html_path.replace(HTML_EXTENSION, f"_inpainted{IMAGE_EXTENSION}")
+        await inpaint_image(original_html_path, original_img_path)
+        original_embedding_vector = calculate_embedding_vector(original_img_path, model, preprocess, device)
+        original_embedding_cache.set(original_html_path, original_embedding_vector)
     
     results = []
     for predict_html_path in predict_html_path_list:
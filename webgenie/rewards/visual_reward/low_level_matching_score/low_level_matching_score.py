@@ -6,17 +6,25 @@ from webgenie.rewards.visual_reward.low_level_matching_score.text_matching_score
 from webgenie.rewards.visual_reward.low_level_matching_score.input_matching_score import calculate_input_matching_similarity
 
 from webgenie.rewards.visual_reward.common.extract_html_elements import extract_html_elements
+from webgenie.rewards.visual_reward.common.feature_cache import FeatureCache
+
+
+original_elements_cache = FeatureCache()
 
 
 async def low_level_matching_score(predict_html_path_list, original_html_path):
-    
+    original_elements = original_elements_cache.get(original_html_path)
+    if original_elements is None:
+        original_elements = await extract_html_elements(original_html_path)
+        original_elements_cache.set(original_html_path, original_elements)
+        bt.logging.info(f"Extracted original html elements.")
+
     (
         original_text_elements, 
         original_button_elements, 
         original_input_elements, 
         original_anchor_elements,
-    ) = await extract_html_elements(original_html_path)
-    bt.logging.info(f"Extracted original html elements.")
+    ) = original_elements
 
     results = []
     for predict_html_path in predict_html_path_list:
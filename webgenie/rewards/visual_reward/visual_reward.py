@@ -4,101 +4,177 @@
 import bittensor as bt
 import os
 import asyncio
-import multiprocessing
 import numpy as np
-import uuid
+import shutil
 from datetime import datetime
 from typing import List
 
-from webgenie.constants import WORK_DIR
+from webgenie.constants import (
+    WORK_DIR,
+    HTML_EXTENSION,
+    IMAGE_EXTENSION,
+    VISUAL_REWARD_JOB_TIMEOUT,
+)
+from webgenie.helpers.htmls import normalized_html_hash
+from webgenie.helpers.task_corpus import task_corpus
+from webgenie.rewards.resource_budget import resource_slot, CPU_RESOURCE
 from webgenie.rewards.reward import Reward
-from webgenie.rewards.visual_reward.common.browser import start_browser, stop_browser
+from webgenie.rewards.scoring_job import ScoringJob, ContentStore
+from webgenie.rewards.scoring_executor import scoring_executor, run_in_worker_loop
+from webgenie.rewards.visual_reward.common.browser import ensure_browser
+from webgenie.rewards.visual_reward.common.inpaint_image import inpaint_image
+from webgenie.rewards.visual_reward.common.take_screenshot import take_screenshot
 from webgenie.rewards.visual_reward.high_level_matching_score import high_level_matching_score
 from webgenie.rewards.visual_reward.low_level_matching_score import low_level_matching_score
 from webgenie.tasks import Task, ImageTask, Solution
 
 
+# Features of the task corpus written by render_original, with the extension of their file in the store
+ORIGINAL_RENDER_FEATURES = {
+    "visual_render.png": IMAGE_EXTENSION,
+    "visual_render_inpainted.png": f"_inpainted{IMAGE_EXTENSION}",
+}
+
+
+async def render_original(original_html_path: str):
+    await ensure_browser()
+    await take_screenshot(original_html_path, original_html_path.replace(HTML_EXTENSION, IMAGE_EXTENSION))
+    await inpaint_image(original_html_path, original_html_path.replace(HTML_EXTENSION, f"_inpainted{IMAGE_EXTENSION}"))
+
+
+async def render_solution(miner_html_path: str):
+    await ensure_browser()
+    await take_screenshot(miner_html_path, miner_html_path.replace(HTML_EXTENSION, IMAGE_EXTENSION))
+
+
+async def visual_score(miner_html_path: str, original_html_path: str) -> float:
+    await ensure_browser()
+    try:
+        high_level_score = (await high_level_matching_score([miner_html_path], original_html_path))[0]
+    except Exception as e:
+        bt.logging.error(f"Error in high_level_matching_score: {e}")
+        high_level_score = 0
+    try:
+        low_level_score = (await low_level_matching_score([miner_html_path], original_html_path))[0]
+    except Exception as e:
+        bt.logging.error(f"Error in low_level_matching_score: {e}")
+        low_level_score = 0
+
+    bt.logging.debug(f"High level visual score: {high_level_score}")
+    bt.logging.debug(f"Low level visual score: {low_level_score}")
+    return float(high_level_score * 0.3 + low_level_score * 0.7)
+
+
+def render_original_job(job: ScoringJob):
+    run_in_worker_loop(render_original(job.ground_truth_path()))
+
+
+def render_solution_job(job: ScoringJob):
+    run_in_worker_loop(render_solution(job.solution_path()))
+
+
+def visual_score_job(job: ScoringJob) -> float:
+    return run_in_worker_loop(visual_score(job.solution_path(), job.ground_truth_path()))
+
+
+def load_original_renders(corpus_key: str, store: ContentStore, ground_truth_ref: str) -> bool:
+    """
+    Copies the original renders from the task corpus to the store, returns False when they are not in the corpus.
+    """
+    features = task_corpus.get_features(corpus_key, list(ORIGINAL_RENDER_FEATURES))
+    if features is None:
+        return False
+    for name, extension in ORIGINAL_RENDER_FEATURES.items():
+        with open(store.path(ground_truth_ref, extension), "wb") as f:
+            f.write(features[name])
+    return True
+
+
+def save_original_renders(corpus_key: str, store: ContentStore, ground_truth_ref: str):
+    features = {}
+    for name, extension in ORIGINAL_RENDER_FEATURES.items():
+        path = store.path(ground_truth_ref, extension)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            features[name] = f.read()
+    task_corpus.put_features(corpus_key, features)
+
+
+async def run_visual_job(job_fn, job: ScoringJob):
+    async with resource_slot(CPU_RESOURCE):
+        return await scoring_executor.run(job_fn, job, timeout=VISUAL_REWARD_JOB_TIMEOUT)
+
+
 class VisualReward(Reward):
     def __init__(self):
         pass
 
-    async def reward_worker(self, task: Task, solutions: List[Solution], current_work_dir: str) -> np.ndarray:
-        await start_browser()
-        bt.logging.info(f"Rewarding image task in visual reward")
-        
-        original_html_path = f"{current_work_dir}/original_{uuid.uuid4()}.html"
-        with open(original_html_path, "w") as f:
-            f.write(task.ground_truth_html)
-
-        miner_html_paths = []
-        for solution in solutions:
-            path = f"{current_work_dir}/miner{solution.miner_uid}_{uuid.uuid4()}.html"
-            with open(path, "w") as f:
-                f.write(solution.html)
-            miner_html_paths.append(path)
-        try:
-            high_level_scores = await high_level_matching_score(miner_html_paths, original_html_path)
-        except Exception as e:
-            bt.logging.error(f"Error in high_level_matching_score: {e}")
-            high_level_scores = np.zeros(len(miner_html_paths))
-        try:
-            low_level_scores = await low_level_matching_score(miner_html_paths, original_html_path)
-        except Exception as e:
-            bt.logging.error(f"Error in low_level_matching_score: {e}")
-            low_level_scores = np.zeros(len(miner_html_paths))
-        
-        bt.logging.debug(f"High level visual scores: {high_level_scores}")
-        bt.logging.debug(f"Low level visual scores: {low_level_scores}")
-
-        scores = high_level_scores * 0.3 + low_level_scores * 0.7
-        await stop_browser()
-        
-        for html_path in miner_html_paths:
-            os.remove(html_path)
-        os.remove(original_html_path)
-
-        return scores
-    
-    def sync_reward_worker(self, task: Task, solutions: List[Solution], current_work_dir: str) -> np.ndarray:
-        try:
-            # Timeout of 1 hour for visual reward processing
-            VISUAL_REWARD_TIMEOUT = 60 * 60 * 2# seconds
-            
-            # Run the async reward worker with timeout
-            return asyncio.run(
-                asyncio.wait_for(
-                    self.reward_worker(task, solutions, current_work_dir),
-                    timeout=VISUAL_REWARD_TIMEOUT
-                )
-            )
-        except Exception as e:
-            bt.logging.error(f"Error in sync_reward_worker: {e}")
-            return [0] * len(solutions)
-
     async def reward(self, task: Task, solutions: List[Solution]) -> np.ndarray:
         if not isinstance(task, ImageTask):
             raise ValueError(f"Task is not a ImageTask: {type(task)}")
 
+        bt.logging.info(f"Rewarding image task in visual reward")
         timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M")
         current_work_dir = f"{WORK_DIR}/task_{timestamp}_{task.task_id}"
         os.makedirs(current_work_dir, exist_ok=True)
 
-        # Use ProcessPoolExecutor for parallel processing
-        with multiprocessing.Pool(processes=os.cpu_count()) as pool:
-            # Convert solutions into chunks for parallel processing
-            chunk_size = max(1, len(solutions) // os.cpu_count())
-            solution_chunks = [solutions[i:i + chunk_size] for i in range(0, len(solutions), chunk_size)]
-            
-            # Create partial tasks for each chunk
-            futures = []
-            for chunk in solution_chunks:
-                future = pool.apply_async(self.sync_reward_worker, args=(task, chunk, current_work_dir))
-                futures.append(future)
-            
-            # Gather all results
-            chunk_scores = []
-            for future in futures:
-                chunk_scores.extend(future.get())
-                
-            scores = np.array(chunk_scores)
-        return scores
+        try:
+            store = ContentStore(current_work_dir)
+            ground_truth_ref = store.put(task.ground_truth_html)
+            jobs = [
+                ScoringJob(
+                    task_id=task.task_id,
+                    store_root=current_work_dir,
+                    ground_truth_ref=ground_truth_ref,
+                    solution_ref=store.put(solution.html),
+                    miner_uid=solution.miner_uid,
+                )
+                for solution in solutions
+            ]
+            original_job = ScoringJob(
+                task_id=task.task_id,
+                store_root=current_work_dir,
+                ground_truth_ref=ground_truth_ref,
+            )
+
+            # The original renders of ground truths in the task corpus are precomputed
+            corpus_key = normalized_html_hash(task.ground_truth_html)
+            has_original_renders = await asyncio.to_thread(load_original_renders, corpus_key, store, ground_truth_ref)
+
+            # Render every distinct html once, the original renders are shared by all scoring jobs
+            jobs_by_ref = {}
+            for job in jobs:
+                if job.solution_ref != ground_truth_ref:
+                    jobs_by_ref.setdefault(job.solution_ref, job)
+            render_jobs = [run_visual_job(render_solution_job, job) for job in jobs_by_ref.values()]
+            if not has_original_renders:
+                render_jobs.insert(0, run_visual_job(render_original_job, original_job))
+            render_results = await asyncio.gather(*render_jobs, return_exceptions=True)
+            for result in render_results:
+                if isinstance(result, Exception):
+                    bt.logging.error(f"Error rendering html in visual reward: {result!r}")
+            if not has_original_renders:
+                await asyncio.to_thread(save_original_renders, corpus_key, store, ground_truth_ref)
+
+            # Solutions with the same html share one visual score, the low level score depends on
+            # the DOM and the clip score on text-erased renders, so equal screenshots are not enough
+            scored_jobs = {}
+            for job in jobs:
+                scored_jobs.setdefault(job.solution_ref, job)
+            bt.logging.info(f"Found {len(scored_jobs)} unique htmls among {len(jobs)} solutions")
+
+            score_results = await asyncio.gather(
+                *[run_visual_job(visual_score_job, job) for job in scored_jobs.values()],
+                return_exceptions=True,
+            )
+            score_by_ref = {}
+            for job, result in zip(scored_jobs.values(), score_results):
+                if isinstance(result, Exception):
+                    bt.logging.error(f"Error in visual score job for miner {job.miner_uid}: {result!r}")
+                    result = 0
+                score_by_ref[job.solution_ref] = result
+
+            return np.array([score_by_ref[job.solution_ref] for job in jobs])
+        finally:
+            shutil.rmtree(current_work_dir, ignore_errors=True)
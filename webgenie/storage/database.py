@@ -1,13 +1,37 @@
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-# Create the database engine
-engine = create_engine('sqlite:///webgenie-validator.db', echo=True)
+from sqlalchemy.orm import Session as SqlAlchemySession
+
+# The database engine, created on first use so that importing the storage doesn't touch the database
+engine = None
+engine_lock = threading.Lock()
+
+
+def get_engine():
+    global engine
+    with engine_lock:
+        if engine is None:
+            # Register the models before creating the tables
+            from . import models
+
+            engine = create_engine('sqlite:///webgenie-validator.db', echo=True)
+            Base.metadata.create_all(engine)
+        return engine
+
+
+class LazySession(SqlAlchemySession):
+    """
+    A session that binds to the engine when it first talks to the database.
+    """
+    def get_bind(self, *args, **kwargs):
+        return get_engine()
+
 
 # Create the session maker
-Session = sessionmaker(engine)
+Session = sessionmaker(class_=LazySession)
 
 # Create the base class for SQLAlchemy models
 class Base(DeclarativeBase):
     pass
-
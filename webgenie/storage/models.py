@@ -1,7 +1,8 @@
 from sqlalchemy import Column, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from datetime import datetime
-from .database import Base, engine
+from typing import Optional
+from .database import Base
 
 class Neuron(Base):
     __tablename__ = "neurons"
@@ -69,10 +70,9 @@ class SolutionEvaluation(Base):
     solution_id: Mapped[int] = mapped_column(ForeignKey("task_solutions.id"), index=True)
     score_type_id: Mapped[int] = mapped_column(ForeignKey("evaluation_types.id"), index=True)
     judgement_id: Mapped[int] = mapped_column(ForeignKey("judgements.id"), index=True)
-    value: Mapped[float]
+    # NULL for the scores that were not computed
+    value: Mapped[Optional[float]]
 
     # Relationships
     score_type: Mapped["EvaluationType"] = relationship(back_populates="solution_scores")
     solution: Mapped["TaskSolution"] = relationship(back_populates="solution_scores")
-
-Base.metadata.create_all(engine)
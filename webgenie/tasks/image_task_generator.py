@@ -1,3 +1,4 @@
+import asyncio
 import bittensor as bt
 import numpy as np
 import random
@@ -9,22 +10,26 @@ from webgenie.tasks.metric_types import (
     SEO_METRIC_NAME,
 )
 from webgenie.tasks.task_generator import TaskGenerator
-from webgenie.constants import IMAGE_TASK_TIMEOUT, GROUND_TRUTH_HTML_LOAD_TIME
+from webgenie.constants import (
+    IMAGE_TASK_TIMEOUT,
+    GROUND_TRUTH_HTML_LOAD_TIME,
+    TASK_CORPUS_OFFLINE,
+    TASK_CORPUS_REUSE_RATE,
+)
 from webgenie.helpers.htmls import (
     html_to_screenshot, 
     preprocess_html, 
     is_empty_html,
 )
 from webgenie.helpers.images import base64_to_image
+from webgenie.helpers.task_corpus import task_corpus
 from webgenie.protocol import WebgenieImageSynapse
 from webgenie.tasks.solution import Solution
 from webgenie.tasks.task import Task, ImageTask
-from webgenie.rewards import (
-    QualityReward,
-    VisualReward,
-    LighthouseReward,
-)
+from webgenie import rewards
 from webgenie.datasets import (
+    CorpusDataset,
+    DatasetEntry,
     RandomWebsiteDataset,
     SyntheticDataset,
     HuggingfaceDataset,
@@ -35,35 +40,71 @@ class ImageTaskGenerator(TaskGenerator):
     def __init__(self):
         super().__init__()
         
-        self.datasets = [
-            (RandomWebsiteDataset(), 0.8),
-            (SyntheticDataset(), 0.1),
-            (HuggingfaceDataset(dataset_name="SALT-NLP/Design2Code-hf", split="train", html_column="text"), 0.1),
-        ]
+        # Offline replay doesn't touch the web or the llm, so the other datasets are not loaded
+        if not TASK_CORPUS_OFFLINE:
+            self.datasets = [
+                (RandomWebsiteDataset(), 0.8),
+                (SyntheticDataset(), 0.1),
+                (HuggingfaceDataset(dataset_name="SALT-NLP/Design2Code-hf", split="train", html_column="text"), 0.1),
+            ]
+
+        self.corpus_dataset = CorpusDataset(task_corpus)
 
         self.metrics = {
-            ACCURACY_METRIC_NAME: VisualReward(),
-            SEO_METRIC_NAME: LighthouseReward(),
-            QUALITY_METRIC_NAME: QualityReward(),
+            ACCURACY_METRIC_NAME: rewards.VisualReward(),
+            SEO_METRIC_NAME: rewards.LighthouseReward(),
+            QUALITY_METRIC_NAME: rewards.QualityReward(),
         }
 
-    async def generate_task(self) -> Tuple[Task, bt.Synapse]:
+    async def fetch_context(self) -> DatasetEntry:
         bt.logging.info("Generating Image task")
-        
-        dataset, _ = random.choices(self.datasets, weights=[weight for _, weight in self.datasets])[0]
-        dataset_entry = await dataset.generate_context()
+        if TASK_CORPUS_OFFLINE or random.random() < TASK_CORPUS_REUSE_RATE:
+            try:
+                return await self.corpus_dataset.generate_context()
+            except Exception as e:
+                if TASK_CORPUS_OFFLINE:
+                    raise e
+                bt.logging.debug(f"Generating a fresh task instead: {e}")
+
+        try:
+            dataset_entry = await super().fetch_context()
+        except Exception as e:
+            # Keep the query loop supplied while the datasets are failing
+            bt.logging.warning(f"Error generating dataset entry, replaying from the task corpus: {e}")
+            try:
+                return await self.corpus_dataset.generate_context()
+            except Exception:
+                raise e
         bt.logging.debug(f"Generated dataset entry: {dataset_entry.src}")
+        return dataset_entry
 
-        ground_truth_html = preprocess_html(dataset_entry.ground_truth_html)
+    async def preprocess_context(self, dataset_entry: DatasetEntry) -> DatasetEntry:
+        if dataset_entry.base64_image:
+            # Entries of the task corpus are preprocessed and rendered already
+            return dataset_entry
+
+        ground_truth_html = await asyncio.to_thread(preprocess_html, dataset_entry.ground_truth_html)
         bt.logging.info(f"Preprocessed ground truth html")
         if not ground_truth_html :
             raise ValueError("Invalid ground truth html")
 
         if is_empty_html(ground_truth_html):
             raise ValueError("Empty ground truth html")
-        
-        base64_image = await html_to_screenshot(ground_truth_html, page_load_time=GROUND_TRUTH_HTML_LOAD_TIME)    
-        bt.logging.debug(f"Screenshot generated for {dataset_entry.src}")
+
+        return dataset_entry.model_copy(update={"ground_truth_html": ground_truth_html})
+
+    async def render_task(self, dataset_entry: DatasetEntry) -> Tuple[Task, bt.Synapse]:
+        ground_truth_html = dataset_entry.ground_truth_html
+        base64_image = dataset_entry.base64_image
+        if not base64_image:
+            base64_image = await html_to_screenshot(ground_truth_html, page_load_time=GROUND_TRUTH_HTML_LOAD_TIME)    
+            bt.logging.debug(f"Screenshot generated for {dataset_entry.src}")
+            await asyncio.to_thread(
+                task_corpus.add,
+                ground_truth_html,
+                base64_image,
+                {"src": dataset_entry.src, "topic": dataset_entry.topic, "prompt": dataset_entry.prompt},
+            )
         image_task = ImageTask(
             base64_image=base64_image, 
             ground_truth_html=ground_truth_html,
@@ -0,0 +1,54 @@
+import bittensor as bt
+import asyncio
+import numpy as np
+import time
+from typing import List, Optional
+
+from webgenie.rewards import Reward
+from webgenie.tasks.solution import Solution
+from webgenie.tasks.task import Task
+
+
+class MetricEngine:
+    """
+    Runs the rewards of a task generator concurrently.
+    Each reward bounds its own jobs with the resource budgets in `webgenie.rewards.resource_budget`,
+    so the total latency is close to the slowest metric instead of the sum of all metrics.
+    """
+    def __init__(self, metrics: dict[str, Reward]):
+        self.metrics = metrics
+        self.wall_times: dict[str, float] = {}
+
+    async def _run_metric(self, metric_name: str, task: Task, solutions: List[Solution]) -> np.ndarray:
+        start_time = time.time()
+        try:
+            return await self.metrics[metric_name].reward(task, solutions)
+        finally:
+            self.wall_times[metric_name] = time.time() - start_time
+
+    async def run(
+        self,
+        task: Task,
+        solutions: List[Solution],
+        metric_names: Optional[List[str]] = None,
+    ) -> dict[str, np.ndarray]:
+        if metric_names is None:
+            metric_names = list(self.metrics.keys())
+
+        start_time = time.time()
+        metric_tasks = [
+            asyncio.create_task(self._run_metric(metric_name, task, solutions))
+            for metric_name in metric_names
+        ]
+        try:
+            results = await asyncio.gather(*metric_tasks)
+        except BaseException:
+            for metric_task in metric_tasks:
+                metric_task.cancel()
+            raise
+
+        wall_times = ", ".join(
+            f"{metric_name}: {self.wall_times[metric_name]:.2f}s" for metric_name in metric_names
+        )
+        bt.logging.info(f"Metric wall times - {wall_times}, Total: {time.time() - start_time:.2f}s")
+        return dict(zip(metric_names, results))
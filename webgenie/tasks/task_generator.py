@@ -1,22 +1,47 @@
 import bittensor as bt
 import numpy as np
-from typing import List, Tuple
+import random
+from typing import List, Optional, Tuple
 
+from webgenie.datasets import Dataset, DatasetEntry
 from webgenie.rewards import Reward
+from webgenie.tasks.metric_engine import MetricEngine
 from webgenie.tasks.solution import Solution
 from webgenie.tasks.task import Task
 
 
 class TaskGenerator:
+    """
+    Generates a task in three stages, fetch_context, preprocess_context and render_task,
+    so that the task synthesizer can bound the concurrency of every stage on its own.
+    """
     def __init__(self):
+        self.datasets: List[Tuple[Dataset, float]] = []
         self.metrics: dict[str, Reward] = {}
+        self.metric_wall_times: dict[str, float] = {}
 
-    async def generate_task(self) -> Tuple[Task, bt.Synapse]:
+    async def fetch_context(self) -> DatasetEntry:
+        dataset, _ = random.choices(self.datasets, weights=[weight for _, weight in self.datasets])[0]
+        return await dataset.generate_context()
+
+    async def preprocess_context(self, dataset_entry: DatasetEntry) -> DatasetEntry:
+        return dataset_entry
+
+    async def render_task(self, dataset_entry: DatasetEntry) -> Tuple[Task, bt.Synapse]:
         pass
+
+    async def generate_task(self) -> Tuple[Task, bt.Synapse]:
+        dataset_entry = await self.fetch_context()
+        dataset_entry = await self.preprocess_context(dataset_entry)
+        return await self.render_task(dataset_entry)
     
-    async def calculate_scores(self, task: Task, solutions: List[Solution]) -> dict[str, np.ndarray]:
-        scores: dict[str, np.ndarray] = {}
-        for metric_name, reward_model in self.metrics.items():
-            reward_scores = await reward_model.reward(task, solutions)
-            scores[metric_name] = reward_scores
+    async def calculate_scores(
+        self, 
+        task: Task, 
+        solutions: List[Solution], 
+        metric_names: Optional[List[str]] = None,
+    ) -> dict[str, np.ndarray]:
+        metric_engine = MetricEngine(self.metrics)
+        scores = await metric_engine.run(task, solutions, metric_names)
+        self.metric_wall_times.update(metric_engine.wall_times)
         return scores
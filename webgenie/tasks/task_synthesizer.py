@@ -0,0 +1,139 @@
+import asyncio
+import bittensor as bt
+import random
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from webgenie.constants import (
+    BLOCK_IN_SECONDS,
+    MAX_SYNTHETIC_TASK_SIZE,
+    SYNTHESIS_WORKER_COUNT,
+    SYNTHESIS_BACKGROUND_WORKER_COUNT,
+    SYNTHESIS_FETCH_CONCURRENCY,
+    SYNTHESIS_PREPROCESS_CONCURRENCY,
+    SYNTHESIS_RENDER_CONCURRENCY,
+    SYNTHETIC_TASK_TIMEOUT,
+)
+from webgenie.tasks.task_generator import TaskGenerator
+
+# How long an idle worker waits before it checks the buffer again (seconds)
+SYNTHESIS_IDLE_SECONDS = 1
+
+
+class TaskSynthesizer:
+    """
+    Keeps the synthetic task buffer filled up to `max_size` tasks with concurrent workers.
+
+    Every task goes through the fetch, preprocess and render stages of its generator, and every
+    stage has its own concurrency limit. While `is_priority` returns True, e.g. right before our
+    query window, all workers run, otherwise only `background_worker_count` of them.
+    """
+    def __init__(
+        self,
+        task_generators: List[Tuple[TaskGenerator, float]],
+        synthetic_tasks: list,
+        lock: threading.Lock,
+        is_priority: Optional[Callable[[], bool]] = None,
+        max_size: int = MAX_SYNTHETIC_TASK_SIZE,
+        worker_count: int = SYNTHESIS_WORKER_COUNT,
+        background_worker_count: int = SYNTHESIS_BACKGROUND_WORKER_COUNT,
+        fetch_concurrency: int = SYNTHESIS_FETCH_CONCURRENCY,
+        preprocess_concurrency: int = SYNTHESIS_PREPROCESS_CONCURRENCY,
+        render_concurrency: int = SYNTHESIS_RENDER_CONCURRENCY,
+    ):
+        self.task_generators = task_generators
+        self.synthetic_tasks = synthetic_tasks
+        self.lock = lock
+        self.is_priority = is_priority
+        self.max_size = max_size
+        self.worker_count = worker_count
+        self.background_worker_count = min(background_worker_count, worker_count)
+        self.fetch_concurrency = fetch_concurrency
+        self.preprocess_concurrency = preprocess_concurrency
+        self.render_concurrency = render_concurrency
+
+        # Tasks that are being synthesized, they count against max_size
+        self.in_progress = 0
+        # Fill the buffer at full speed until we know where our query window is
+        self.priority = True
+        self.should_exit = False
+
+    def reserve_slot(self) -> bool:
+        with self.lock:
+            if len(self.synthetic_tasks) + self.in_progress >= self.max_size:
+                return False
+            self.in_progress += 1
+            return True
+
+    def release_slot(self, task: Optional[Tuple] = None):
+        with self.lock:
+            self.in_progress -= 1
+            if task is not None:
+                self.synthetic_tasks.append(task)
+
+    def active_worker_count(self) -> int:
+        if self.priority:
+            return self.worker_count
+        with self.lock:
+            is_empty = not self.synthetic_tasks
+        return self.worker_count if is_empty else self.background_worker_count
+
+    async def synthesize_task(self, semaphores: dict) -> Tuple:
+        task_generator, _ = random.choices(
+            self.task_generators,
+            weights=[weight for _, weight in self.task_generators],
+        )[0]
+        async with semaphores["fetch"]:
+            dataset_entry = await task_generator.fetch_context()
+        async with semaphores["preprocess"]:
+            dataset_entry = await task_generator.preprocess_context(dataset_entry)
+        async with semaphores["render"]:
+            return await task_generator.render_task(dataset_entry)
+
+    async def worker(self, index: int, semaphores: dict):
+        while not self.should_exit:
+            if index >= self.active_worker_count() or not self.reserve_slot():
+                await asyncio.sleep(SYNTHESIS_IDLE_SECONDS)
+                continue
+
+            task = None
+            try:
+                task = await asyncio.wait_for(self.synthesize_task(semaphores), timeout=SYNTHETIC_TASK_TIMEOUT)
+                bt.logging.success(f"Successfully generated task for {task[0].src}")
+            except Exception as e:
+                bt.logging.error(f"Error in synthensize_task: {e}")
+                await asyncio.sleep(SYNTHESIS_IDLE_SECONDS)
+            finally:
+                self.release_slot(task)
+
+    async def refresh_priority(self):
+        while not self.should_exit:
+            if self.is_priority is not None:
+                try:
+                    priority = await asyncio.to_thread(self.is_priority)
+                except Exception as e:
+                    bt.logging.warning(f"Error checking the task synthesis priority: {e}")
+                    priority = True
+                if priority != self.priority:
+                    bt.logging.info(f"Task synthesis {'prioritized' if priority else 'in background'}")
+                self.priority = priority
+            await asyncio.sleep(BLOCK_IN_SECONDS)
+
+    async def run(self):
+        """
+        Runs the workers until stop() is called.
+        """
+        # The semaphores belong to the event loop that runs the workers
+        semaphores = {
+            "fetch": asyncio.Semaphore(self.fetch_concurrency),
+            "preprocess": asyncio.Semaphore(self.preprocess_concurrency),
+            "render": asyncio.Semaphore(self.render_concurrency),
+        }
+        bt.logging.info(f"Task synthesizer starting with {self.worker_count} workers")
+        await asyncio.gather(
+            self.refresh_priority(),
+            *[self.worker(index, semaphores) for index in range(self.worker_count)],
+        )
+
+    def stop(self):
+        self.should_exit = True
@@ -1,6 +1,5 @@
 import bittensor as bt
 import numpy as np
-import random
 from typing import Tuple, List
 
 from webgenie.tasks.metric_types import (
@@ -10,13 +9,11 @@ from webgenie.tasks.metric_types import (
 from webgenie.tasks.task_generator import TaskGenerator
 from webgenie.constants import TEXT_TASK_TIMEOUT
 from webgenie.datasets import (
+    DatasetEntry,
     SyntheticDataset,
 )
 from webgenie.protocol import WebgenieTextSynapse
-from webgenie.rewards import (
-    QualityReward,
-    RtcReward,
-)
+from webgenie import rewards
 from webgenie.tasks.solution import Solution
 from webgenie.tasks.task import Task, TextTask
 
@@ -30,15 +27,15 @@ class TextTaskGenerator(TaskGenerator):
         ]
 
         self.metrics = {
-            ACCURACY_METRIC_NAME: RtcReward(),
-            QUALITY_METRIC_NAME: QualityReward(),
+            ACCURACY_METRIC_NAME: rewards.RtcReward(),
+            QUALITY_METRIC_NAME: rewards.QualityReward(),
         }
 
-    async def generate_task(self) -> Tuple[Task, bt.Synapse]:
+    async def fetch_context(self) -> DatasetEntry:
         bt.logging.info("Generating Text task")
-        dataset, _ = random.choices(self.datasets, weights=[weight for _, weight in self.datasets])[0]
-        dataset_entry = await dataset.generate_context()
-        
+        return await super().fetch_context()
+
+    async def render_task(self, dataset_entry: DatasetEntry) -> Tuple[Task, bt.Synapse]:
         return (
             TextTask(
                 prompt=dataset_entry.prompt, 